@@ -8,12 +8,19 @@ from app.models import db
 jwt = JWTManager()
 migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        # Sobrescritas pontuais (ex.: banco descartável dos testes)
+        app.config.update(config)
 
     # Inicializações
     db.init_app(app)
+
+    # JSON pelo orjson (JSON_ORJSON), com a mesma saída do provider padrão
+    from app.services.serializacao import init_json
+    init_json(app)
     migrate.init_app(app, db)
     
     # Configurar CORS para aceitar requisições do frontend
@@ -21,11 +28,48 @@ def create_app():
         r"/api/*": {
             "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["X-DB-Queries", "Server-Timing", "X-Cache"]
         }
     })
     
     jwt.init_app(app)
+    # O token curto do SSE (vai na URL) só abre o /api/events
+    from app.routes.events import token_fora_do_escopo, token_restrito_aos_eventos
+    jwt.token_verification_loader(token_restrito_aos_eventos)
+    jwt.token_verification_failed_loader(token_fora_do_escopo)
+
+    # Contagem de consultas por requisição / detector de N+1
+    from app.services.monitoramento import init_monitoramento
+    init_monitoramento(app)
+
+    # Notificações de alteração (SSE)
+    from app.services.events import init_eventos
+    init_eventos(app)
+
+    # Índice em memória dos responsáveis por filial (autocompletar)
+    from app.services.responsaveis import init_responsaveis
+    init_responsaveis(app)
+
+    # Cache da lista de filiais (invalidado pela versão no banco)
+    from app.services.filiais import init_filiais
+    init_filiais(app)
+
+    # Cache de respostas das listagens, invalidado pelas gravações
+    from app.services.cache_respostas import init_cache_respostas
+    init_cache_respostas(app)
+
+    # Gravação assíncrona da auditoria (opcional, AUDITORIA_ASSINCRONA)
+    from app.services.audit import init_auditoria
+    init_auditoria(app)
+
+    # Fila de importações CSV em segundo plano
+    from app.services.import_jobs import init_importacao
+    init_importacao(app)
+
+    # Comandos de manutenção (flask auditoria ...)
+    from app.cli import init_cli
+    init_cli(app)
 
     # Importação dos Blueprints
     from app.routes.assets import bp_assets
@@ -34,6 +78,9 @@ def create_app():
     from app.routes.emails import bp_emails
     from app.routes.softwares import bp_softwares
     from app.routes.imports import bp_imports
+    from app.routes.sync import bp_sync
+    from app.routes.events import bp_events
+    from app.routes.search import bp_search
 
     # Registro dos Blueprints
     app.register_blueprint(bp_assets)
@@ -42,5 +89,8 @@ def create_app():
     app.register_blueprint(bp_emails)
     app.register_blueprint(bp_softwares)
     app.register_blueprint(bp_imports)
+    app.register_blueprint(bp_sync)
+    app.register_blueprint(bp_events)
+    app.register_blueprint(bp_search)
 
     return app
\ No newline at end of file
@@ -0,0 +1,42 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+auditoria_cli = AppGroup('auditoria', help='Manutenção da auditoria (audit_logs).')
+
+
+@auditoria_cli.command('reconstruir-resumo')
+def reconstruir_resumo_cmd():
+    """Recalcula audit_resumo a partir de audit_logs."""
+    from app.services.estatisticas import reconstruir_resumo
+    total = reconstruir_resumo()
+    click.echo(f"Resumo reconstruído: {total} linhas.")
+
+
+
+@auditoria_cli.command('particoes')
+@click.option('--meses', default=3, show_default=True, help='Meses à frente com partição criada.')
+def particoes_cmd(meses):
+    """Cria as partições mensais de audit_logs que ainda faltam (rodar mensalmente)."""
+    from app.services.arquivo_auditoria import garantir_particoes
+    criadas = garantir_particoes(meses)
+    click.echo(f"Partições criadas: {', '.join(criadas)}" if criadas else "Nenhuma partição nova.")
+
+
+@auditoria_cli.command('arquivar')
+@click.option('--meses', type=int, default=None, help='Meses mantidos no banco (padrão: AUDITORIA_RETENCAO_MESES).')
+@click.option('--destino', default=None, help='Pasta dos arquivos (padrão: AUDITORIA_ARQUIVO_DIR).')
+def arquivar_cmd(meses, destino):
+    """Desanexa partições antigas de audit_logs e grava em .jsonl.gz."""
+    from app.services.arquivo_auditoria import arquivar_particoes
+    meses = meses if meses is not None else current_app.config['AUDITORIA_RETENCAO_MESES']
+    destino = destino or current_app.config['AUDITORIA_ARQUIVO_DIR']
+    arquivadas = arquivar_particoes(meses, destino)
+    for nome, total in arquivadas:
+        click.echo(f"{nome}: {total} logs arquivados")
+    if not arquivadas:
+        click.echo("Nada a arquivar.")
+
+
+def init_cli(app):
+    app.cli.add_command(auditoria_cli)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import JSON, ARRAY
+from sqlalchemy.dialects.postgresql import JSON, JSONB, ARRAY
 
 db = SQLAlchemy()
 
@@ -67,8 +67,8 @@ class Asset(db.Model):
     responsavel = db.Column(db.String(120))
     status = db.Column(db.String(50), default='Ativo')
     
-    # Campos específicos por tipo
-    especificacoes = db.Column(JSON)
+    # Campos específicos por tipo (hostname, dominio, vpn...); JSONB indexado para filtros spec.<chave>
+    especificacoes = db.Column(JSONB)
     
     observacoes = db.Column(db.Text)
     dt_compra = db.Column(db.Date)
@@ -79,11 +79,15 @@ class Asset(db.Model):
     anydesk = db.Column(db.String(50))
     
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
-    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relacionamentos
     softwares = db.relationship('Software', back_populates='asset', cascade='all, delete-orphan')
     emails = db.relationship('Email', back_populates='asset', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_assets_especificacoes', especificacoes, postgresql_using='gin'),
+    )
     
     def to_dict(self, include_relationships=False):
         data = {
@@ -137,7 +141,7 @@ class Celular(db.Model):
     valor = db.Column(db.Numeric(10, 2))
     
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
-    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -175,7 +179,7 @@ class Software(db.Model):
     ativo = db.Column(db.Boolean, default=True)
     
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
-    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relacionamento
     asset = db.relationship('Asset', back_populates='softwares')
@@ -214,7 +218,7 @@ class Email(db.Model):
     ativo = db.Column(db.Boolean, default=True)
     
     criado_em = db.Column(db.DateTime, default=datetime.utcnow)
-    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relacionamento
     asset = db.relationship('Asset', back_populates='emails')
@@ -253,8 +257,15 @@ class AuditLog(db.Model):
     dados_antes = db.Column(JSON)
     dados_depois = db.Column(JSON)
     ip_address = db.Column(db.String(50))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    
+    # Chave de partição (particionamento mensal via migração)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Histórico de um registro e logs de um usuário, já na ordem das consultas
+    __table_args__ = (
+        db.Index('ix_audit_logs_entidade_timestamp', entidade, entidade_id, timestamp.desc()),
+        db.Index('ix_audit_logs_usuario_timestamp', usuario_nome, timestamp.desc()),
+    )
+
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -269,3 +280,22 @@ class AuditLog(db.Model):
             'ip_address': self.ip_address,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
+
+
+class AuditResumo(db.Model):
+    """Contagem diária de logs por ação/usuário/entidade, mantida a cada gravação (AUDITORIA_RESUMO)"""
+    __tablename__ = 'audit_resumo'
+
+    dia = db.Column(db.Date, primary_key=True)
+    acao = db.Column(db.String(50), primary_key=True)
+    usuario_nome = db.Column(db.String(120), primary_key=True)  # '' quando o log não tem usuário
+    entidade = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Versao(db.Model):
+    """Contador de versão por conjunto de dados (ex.: 'filiais'), incrementado a cada alteração para invalidar caches em memória de todos os processos"""
+    __tablename__ = 'versoes'
+
+    chave = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
@@ -1,11 +1,22 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
-from app.models import db, Asset, Filial, Celular, Usuario
+from app.models import db, Asset, Email, Filial, Software
 from app.services.audit import registrar_historico, registrar_exclusao
+from app.services.pagination import paginar_keyset, ler_limite, CursorInvalido
+from app.services.responsaveis import get_indice
+from app.services.filiais import get_cache_filiais, registrar_alteracao_filiais
+from app.services.condicional import get_condicional, pagina_keyset
+from app.services.cache_respostas import cache_resposta, tags_ativo, tags_lista
+from app.services.serializacao import ASSET, EMAIL, SOFTWARE, ler_campos
+from app.services.busca import escapar_like
+from sqlalchemy import or_
 from datetime import datetime, date
 
 bp_assets = Blueprint('assets', __name__)
 
+LIMITE_RESPONSAVEIS = 20
+LIMITE_RESPONSAVEIS_MAXIMO = 100
+
 
 def _parse_date(value):
     if not value:
@@ -59,32 +70,138 @@ def _asset_fields_from_payload(payload, existing_especificacoes=None):
 
     return campos
 
+
+def _filtrar_assets(query, args):
+    """Aplica no banco os filtros que antes eram feitos no navegador."""
+    filial = args.get('filial')
+    if filial:
+        query = query.filter(Asset.filial == filial)
+
+    status = args.get('status')
+    if status:
+        query = query.filter(Asset.status.in_([s.strip() for s in status.split(',') if s.strip()]))
+    if args.get('inativos', 'true').lower() == 'false':
+        query = query.filter(or_(Asset.status.is_(None), Asset.status != 'Inativo'))
+
+    tipo = args.get('tipo')
+    if tipo:
+        query = query.filter(Asset.tipo == tipo)
+
+    setor = args.get('setor')
+    if setor:
+        query = query.filter(Asset.setor.ilike(f"%{escapar_like(setor)}%", escape='\\'))
+
+    responsavel = args.get('responsavel')
+    if responsavel:
+        query = query.filter(Asset.responsavel.ilike(f"%{escapar_like(responsavel)}%", escape='\\'))
+
+    patrimonio = args.get('patrimonio')
+    if patrimonio:
+        # Prefixo: aproveita o índice de patrimonio
+        query = query.filter(Asset.patrimonio.like(f"{escapar_like(patrimonio)}%", escape='\\'))
+
+    # spec.<chave>=valor filtra dentro de especificacoes (valores repetidos: qualquer um deles)
+    for parametro, valores in args.lists():
+        chave = parametro[len('spec.'):] if parametro.startswith('spec.') else None
+        if chave:
+            query = query.filter(or_(*(_filtro_especificacao(chave, valor) for valor in valores)))
+
+    return query
+
+
+def _filtro_especificacao(chave, valor):
+    """Vira @> / ? no JSONB (índice GIN); `spec.chave=` só exige a chave."""
+    if valor == '':
+        return Asset.especificacoes.has_key(chave)
+    return Asset.especificacoes.contains({chave: valor})
+
+
 # --- ROTAS DE ATIVOS ---
 
 @bp_assets.route('/api/assets', methods=['GET'])
 @jwt_required()
+@cache_resposta(tags_lista('assets'))
+@get_condicional(lambda args: _filtrar_assets(Asset.query, args), Asset.atualizado_em, paginada=pagina_keyset)
 def get_assets():
-    filial = request.args.get('filial')
-    query = Asset.query
-    if filial:
-        query = query.filter_by(filial=filial)
-    assets = query.all()
-    return jsonify([asset.to_dict() for asset in assets])
+    """
+    Lista ativos com filtros no servidor.
+
+    Além dos campos fixos aceita `spec.<chave>=valor` (ex.: spec.vpn=sim),
+    filtrado no banco dentro de especificacoes.
+
+    Sem `limite`/`cursor` mantém a resposta antiga (lista completa). Com eles,
+    pagina por chave (`ordenar=id` ou `ordenar=atualizado_em`) e devolve
+    {itens, proximo_cursor[, total]}.
+
+    `fields=patrimonio,filial,...` limita as colunas do SELECT e do JSON (o
+    id vem sempre); nomes que não são colunas saem de especificacoes.
+    """
+    query = _filtrar_assets(Asset.query, request.args)
+    campos = ler_campos(request.args.get('fields'))
+
+    if not pagina_keyset(request.args):
+        codificador = ASSET.projetar(campos)
+        return jsonify(codificador.lista(codificador.selecionar(query)))
+
+    ordenar = request.args.get('ordenar', 'id')
+    if ordenar == 'atualizado_em':
+        colunas, descendente = [Asset.atualizado_em, Asset.id], True
+    elif ordenar == 'id':
+        colunas, descendente = [Asset.id], False
+    else:
+        return jsonify({'erro': 'Ordenação inválida'}), 400
+
+    # A chave da paginação é selecionada mesmo fora da projeção
+    codificador = ASSET.projetar(campos, ocultas=colunas)
+    try:
+        assets, proximo_cursor = paginar_keyset(
+            codificador.selecionar(query), colunas,
+            cursor=request.args.get('cursor'),
+            limite=ler_limite(request.args.get('limite')),
+            descendente=descendente
+        )
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+
+    resposta = {
+        'itens': codificador.lista(assets),
+        'proximo_cursor': proximo_cursor
+    }
+    if request.args.get('total', 'false').lower() == 'true':
+        resposta['total'] = query.order_by(None).count()
+    return jsonify(resposta)
 
 @bp_assets.route('/api/assets/<id>', methods=['GET'])
 @jwt_required()
+@cache_resposta(tags_ativo)
 def get_one_asset(id):
+    """
+    Ativo com softwares e emails aninhados. `fields` funciona como na lista
+    e também aceita 'softwares' e 'emails'; relações não pedidas não são
+    consultadas.
+    """
     try:
         asset_id = int(id)
     except ValueError:
         return jsonify({'erro': 'ID inválido'}), 400
 
-    asset = Asset.query.get(asset_id)
-    if not asset:
+    campos = ler_campos(request.args.get('fields'))
+    relacoes = ('softwares', 'emails') if campos is None else [c for c in ('softwares', 'emails') if c in campos]
+    if campos is not None:
+        campos = tuple(c for c in campos if c not in relacoes)
+
+    data = ASSET.projetar(campos).um(Asset.query.filter(Asset.id == asset_id))
+    if data is None:
         return jsonify({'erro': 'Ativo não encontrado'}), 404
-    
+
     # Retornar com relacionamentos aninhados
-    return jsonify(asset.to_dict(include_relationships=True))
+    if 'softwares' in relacoes:
+        query = Software.query.join(Software.asset).filter(Software.asset_id == asset_id)
+        data['softwares'] = SOFTWARE.lista(SOFTWARE.selecionar(query))
+    if 'emails' in relacoes:
+        query = Email.query.outerjoin(Email.asset).filter(Email.asset_id == asset_id)
+        data['emails'] = EMAIL.lista(EMAIL.selecionar(query))
+    return jsonify(data)
 
 # --- NOVOS ENDPOINTS: Emails e Softwares de um Asset ---
 
@@ -131,9 +248,9 @@ def create_asset():
     asset.atualizado_em = datetime.now()
 
     db.session.add(asset)
-    db.session.commit()
-
+    db.session.flush()  # gera o id para a auditoria
     registrar_historico(asset.id, None, asset.to_dict(), usuario=user_name, entidade="Asset")
+    db.session.commit()
     return jsonify({"msg": "Criado com sucesso!", "id": str(asset.id)}), 201
 
 @bp_assets.route('/api/assets/<id>', methods=['PUT'])
@@ -159,8 +276,8 @@ def update_asset(id):
         setattr(asset, chave, valor)
     asset.atualizado_em = datetime.now()
 
-    db.session.commit()
     registrar_historico(asset.id, antigo, asset.to_dict(), usuario=user_name, entidade="Asset")
+    db.session.commit()
     return jsonify({"msg": "Atualizado com sucesso!"}), 200
 
 @bp_assets.route('/api/assets/<id>', methods=['DELETE'])
@@ -182,31 +299,29 @@ def delete_asset(id):
 
     if hard:
         db.session.delete(asset)
-        db.session.commit()
         registrar_exclusao(asset_id, antigo, usuario=user_name, entidade="Asset")
+        db.session.commit()
         return jsonify({"msg": "Ativo excluido definitivamente!"}), 200
 
     asset.status = 'Inativo'
     asset.atualizado_em = datetime.now()
-    db.session.commit()
     registrar_historico(asset_id, antigo, asset.to_dict(), usuario=user_name, entidade="Asset")
+    db.session.commit()
     return jsonify({"msg": "Ativo inativado com sucesso!"}), 200
 
 # --- ROTAS DE FILIAIS (Gerenciamento Completo) ---
 
 @bp_assets.route('/api/filiais', methods=['GET'])
 def get_filiais():
-    filiais = Filial.query.order_by(Filial.nome.asc()).all()
-    return jsonify([f.to_dict() for f in filiais])
-
-# --- NOVA ROTA: BUSCAR FUNCIONÁRIOS POR FILIAL ---
-
-@bp_assets.route('/api/funcionarios/<filial>', methods=['GET'])
-def get_funcionarios_by_filial(filial):
-    """Retorna lista de funcionários de uma filial específica"""
-    funcionarios = Usuario.query.filter_by(filial=filial).order_by(Usuario.nome.asc()).all()
-    result = [f.nome for f in funcionarios]
-    return jsonify(result)
+    """
+    Lista servida do cache em memória (app/services/filiais.py) com ETag
+    forte; If-None-Match com o mesmo valor recebe 304 sem corpo.
+    """
+    _, corpo, etag = get_cache_filiais().obter()
+    resposta = current_app.response_class(corpo, mimetype='application/json')
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'no-cache'  # o navegador sempre revalida
+    return resposta.make_conditional(request)
 
 @bp_assets.route('/api/filiais', methods=['POST'])
 @jwt_required()
@@ -223,7 +338,9 @@ def create_filial():
 
     filial = Filial(nome=nome)
     db.session.add(filial)
+    registrar_alteracao_filiais()
     db.session.commit()
+    get_cache_filiais().invalidar()
     return jsonify({"msg": "Filial criada!"}), 201
 
 # NOVA ROTA: DELETAR FILIAL
@@ -240,38 +357,27 @@ def delete_filial(id):
         return jsonify({'erro': 'Filial não encontrada'}), 404
 
     db.session.delete(filial)
+    registrar_alteracao_filiais()
     db.session.commit()
+    get_cache_filiais().invalidar()
     return jsonify({"msg": "Filial removida com sucesso!"}), 200
 
-# --- NOVA ROTA: Listar Responsáveis por Filial ---
+# --- RESPONSÁVEIS (autocompletar do formulário) ---
+
+@bp_assets.route('/api/responsaveis', methods=['GET'])
+@jwt_required()
+def get_responsaveis():
+    """
+    Autocompletar de responsáveis: ?filial=&q=&limit=. Casa `q` com o início
+    do nome ou de qualquer palavra dele, sem diferenciar acentos. Servido pelo
+    índice em memória de app/services/responsaveis.py, sem consultar o banco.
+    """
+    filial = request.args.get('filial') or None
+    termo = request.args.get('q', '')
+    limite = ler_limite(request.args.get('limit'), padrao=LIMITE_RESPONSAVEIS, maximo=LIMITE_RESPONSAVEIS_MAXIMO)
+    return jsonify(get_indice().buscar(filial, termo, limite))
+
 @bp_assets.route('/api/funcionarios/<path:filial>', methods=['GET'])
-# @jwt_required() # Pode descomentar se quiser proteger
 def get_funcionarios_por_filial(filial):
-    try:
-        # Decodifica a URL (ex: "01%20-%20Matriz" vira "01 - Matriz")
-        from urllib.parse import unquote
-        filial_decode = unquote(filial)
-        
-        # Busca no banco todos os responsáveis distintos dessa filial
-        # 1. Busca em Workstations
-        resps_assets = db.session.query(Asset.responsavel).filter(
-            Asset.filial == filial_decode,
-            Asset.responsavel.isnot(None),
-            Asset.responsavel != ""
-        ).distinct().all()
-        
-        # 2. Busca em Celulares (opcional, mas bom para garantir)
-        resps_cel = db.session.query(Celular.responsavel).filter(
-            Celular.filial == filial_decode,
-            Celular.responsavel.isnot(None),
-            Celular.responsavel != ""
-        ).distinct().all()
-        
-        # Junta tudo, remove vazios e ordena
-        todos = set([r[0] for r in resps_assets] + [r[0] for r in resps_cel])
-        todos.discard("")
-        todos.discard(None)
-        
-        return jsonify(sorted(list(todos))), 200
-    except Exception as e:
-        return jsonify({"erro": str(e)}), 500
\ No newline at end of file
+    """Lista completa de responsáveis da filial (rota antiga, mantida para compatibilidade)"""
+    return jsonify(get_indice().buscar(filial, limite=None)), 200
@@ -1,11 +1,30 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.models import db, Usuario, AuditLog
 from app.auth import create_user, login_user, get_current_user
-from sqlalchemy import func
+from app.services.audit import ACOES_POR_CAMPO, ENTIDADES, expandir_logs, metricas_auditoria, obter_logs_ativo
+from app.services.pagination import paginar_keyset, ler_limite, CursorInvalido
+from app.services.estatisticas import estatisticas_auditoria
+from app.services.condicional import get_condicional
+from app.services.serializacao import USUARIO, CampoDesconhecido, ler_campos
+from app.services.busca import escapar_like
+from datetime import datetime, timedelta
 
 bp_auth = Blueprint('auth', __name__)
 
+FORMATOS_EXPORTACAO = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+COLUNAS_EXPORTACAO = ('id', 'timestamp', 'usuario_nome', 'acao', 'entidade', 'entidade_id',
+                      'descricao', 'dados_antes', 'dados_depois', 'ip_address')
+TAMANHO_BLOCO_EXPORTACAO = 1000
+# Leituras de logs para encher uma página de /api/logs filtrada por ação de campo
+LEITURAS_POR_PAGINA = 5
+
 # --- ROTAS DE AUTENTICAÇÃO ---
 
 @bp_auth.route('/api/auth/login', methods=['POST'])
@@ -48,10 +67,14 @@ def get_me():
 
 @bp_auth.route('/api/auth/usuarios', methods=['GET'])
 @jwt_required()
+@get_condicional(lambda args: Usuario.query, Usuario.atualizado_em)
 def list_usuarios():
-    """Lista todos os usuários (apenas admin)"""
-    usuarios = Usuario.query.all()
-    return jsonify([u.to_dict() for u in usuarios]), 200
+    """Lista todos os usuários (apenas admin); `fields=a,b` limita as colunas"""
+    try:
+        codificador = USUARIO.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+    return jsonify(codificador.lista(codificador.selecionar(Usuario.query))), 200
 
 @bp_auth.route('/api/auth/usuarios/<int:usuario_id>', methods=['PUT'])
 @jwt_required()
@@ -95,46 +118,178 @@ def delete_usuario(usuario_id):
 @bp_auth.route('/api/logs/ativo/<int:asset_id>', methods=['GET'])
 @jwt_required()
 def get_logs_ativo(asset_id):
-    """Retorna logs de um ativo específico"""
-    logs = AuditLog.query.filter_by(entidade_id=str(asset_id)).order_by(AuditLog.timestamp.desc()).limit(100).all()
-    return jsonify([log.to_dict() for log in logs]), 200
+    """
+    Retorna logs de um registro (?entidade=Asset|Celular|Email|Software, padrão
+    Asset, ou "todas"). Os meses arquivados só entram com ?arquivados=true:
+    ler os arquivos .jsonl.gz custa bem mais que a consulta ao banco.
+    """
+    entidade = request.args.get('entidade', 'Asset')
+    if entidade == 'todas':
+        entidade = None
+    elif entidade not in ENTIDADES:
+        return jsonify({'erro': f"entidade deve ser uma de: {', '.join(ENTIDADES)} ou todas"}), 400
+
+    incluir_arquivados = request.args.get('arquivados', 'false').lower() == 'true'
+    return jsonify(obter_logs_ativo(
+        asset_id, limite=100, incluir_arquivados=incluir_arquivados, entidade=entidade
+    )), 200
 
 @bp_auth.route('/api/logs', methods=['GET'])
 @jwt_required()
 def get_logs():
-    """Retorna todos os logs do sistema"""
-    filtro_usuario = request.args.get('usuario')
-    limite = int(request.args.get('limite', 100))
-    
-    query = AuditLog.query
-    
-    if filtro_usuario:
-        query = query.filter_by(usuario_nome=filtro_usuario)
-    
-    logs = query.order_by(AuditLog.timestamp.desc()).limit(limite).all()
-    return jsonify([log.to_dict() for log in logs]), 200
+    """
+    Lista os logs do mais recente para o mais antigo, paginando por
+    (timestamp, id). Filtros: usuario, acao, entidade, entidade_id, de/ate
+    (ISO; `ate` só com a data inclui o dia todo) e busca (trecho da
+    descrição). Devolve {itens, proximo_cursor}; `limite` tem teto no servidor.
+
+    A página é contada em logs gravados e cada ATUALIZACAO vira o resumo mais
+    uma linha por campo, então `itens` pode passar de `limite` (um log nunca
+    é partido entre páginas). Com acao=ALTERACAO|ADICAO|REMOCAO o filtro só
+    se aplica depois da expansão: lê mais logs (até LEITURAS_POR_PAGINA vezes)
+    até juntar `limite` itens, e a página pode vir curta com proximo_cursor
+    preenchido; o fim é proximo_cursor null.
+    """
+    acao = request.args.get('acao')
+    limite = ler_limite(request.args.get('limite'))
+    proximo_cursor = request.args.get('cursor')
+    itens = []
+    try:
+        query = _filtrar_logs(AuditLog.query, request.args)
+        for _ in range(LEITURAS_POR_PAGINA):
+            logs, proximo_cursor = paginar_keyset(
+                query, [AuditLog.timestamp, AuditLog.id],
+                cursor=proximo_cursor, limite=limite, descendente=True
+            )
+            itens += _itens_logs(logs, acao)
+            if acao not in ACOES_POR_CAMPO or len(itens) >= limite or not proximo_cursor:
+                break
+    except (CursorInvalido, ValueError) as e:
+        return jsonify({'erro': str(e)}), 400
+
+    return jsonify({'itens': itens, 'proximo_cursor': proximo_cursor}), 200
+
+
+@bp_auth.route('/api/logs/export', methods=['GET'])
+@jwt_required()
+def exportar_logs():
+    """
+    Exporta os logs em ordem cronológica (?format=csv|jsonl), com os mesmos
+    filtros de /api/logs. As linhas são lidas por cursor no servidor e
+    enviadas em blocos (chunked): a memória não cresce com o tamanho do extrato.
+    """
+    formato = request.args.get('format', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'erro': 'format deve ser csv ou jsonl'}), 400
+    try:
+        query = _filtrar_logs(AuditLog.query, request.args)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    acao = request.args.get('acao')
+    logs = query.order_by(AuditLog.timestamp, AuditLog.id).yield_per(TAMANHO_BLOCO_EXPORTACAO)
+
+    def gerar():
+        bloco = io.StringIO()
+        if formato == 'csv':
+            escritor = csv.writer(bloco)
+            bloco.write('\ufeff')  # BOM: o Excel reconhece o UTF-8
+            escritor.writerow(COLUNAS_EXPORTACAO)
+        for numero, log in enumerate(logs, 1):
+            for item in _itens_logs([log], acao):
+                if formato == 'csv':
+                    escritor.writerow([_celula_csv(item[coluna]) for coluna in COLUNAS_EXPORTACAO])
+                else:
+                    bloco.write(json.dumps(item, ensure_ascii=False))
+                    bloco.write('\n')
+            if numero % TAMANHO_BLOCO_EXPORTACAO == 0:
+                yield bloco.getvalue()
+                bloco.seek(0)
+                bloco.truncate()
+        yield bloco.getvalue()
+
+    mimetype, extensao = FORMATOS_EXPORTACAO[formato]
+    nome = f"logs_auditoria_{datetime.now():%Y%m%d_%H%M%S}.{extensao}"
+    return Response(stream_with_context(gerar()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{nome}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _celula_csv(valor):
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def _itens_logs(logs, acao=None):
+    """Visão por campo dos logs; com uma ação por campo, só as linhas dela."""
+    itens = expandir_logs([log.to_dict() for log in logs])
+    if acao in ACOES_POR_CAMPO:
+        itens = [item for item in itens if item['acao'] == acao]
+    return itens
+
+
+def _filtrar_logs(query, args):
+    """Filtros da listagem de logs; ValueError para valores inválidos."""
+    usuario = args.get('usuario')
+    if usuario:
+        query = query.filter(AuditLog.usuario_nome == usuario)
+
+    acao = args.get('acao')
+    if acao:
+        # Alterações por campo são gravadas dentro de um ATUALIZACAO compacto
+        query = query.filter(AuditLog.acao == ("ATUALIZACAO" if acao in ACOES_POR_CAMPO else acao))
+
+    entidade = args.get('entidade')
+    if entidade:
+        if entidade not in ENTIDADES:
+            raise ValueError(f"entidade deve ser uma de: {', '.join(ENTIDADES)}")
+        query = query.filter(AuditLog.entidade == entidade)
+
+    entidade_id = args.get('entidade_id')
+    if entidade_id:
+        query = query.filter(AuditLog.entidade_id == entidade_id)
+
+    de = args.get('de')
+    if de:
+        query = query.filter(AuditLog.timestamp >= _ler_data(de, 'de'))
+
+    ate = args.get('ate')
+    if ate:
+        limite = _ler_data(ate, 'ate')
+        if len(ate) == 10:
+            query = query.filter(AuditLog.timestamp < limite + timedelta(days=1))
+        else:
+            query = query.filter(AuditLog.timestamp <= limite)
+
+    busca = args.get('busca')
+    if busca:
+        query = query.filter(AuditLog.descricao.ilike(f"%{escapar_like(busca)}%", escape='\\'))
+
+    return query
+
+
+def _ler_data(valor, parametro):
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"{parametro} deve ser uma data ISO (AAAA-MM-DD ou AAAA-MM-DDTHH:MM:SS)")
+
 
 @bp_auth.route('/api/logs/estatisticas', methods=['GET'])
 @jwt_required()
 def get_estatisticas_logs():
-    """Retorna estatísticas dos logs"""
-    total_logs = db.session.query(func.count(AuditLog.id)).scalar()
-    
-    usuarios_unicos = db.session.query(AuditLog.usuario_nome).distinct().all()
-    usuarios_unicos = [u[0] for u in usuarios_unicos if u[0]]
-    
-    acoes = db.session.query(AuditLog.acao).distinct().all()
-    acoes = [a[0] for a in acoes]
-    
-    # Logs por ação
-    logs_por_acao = {}
-    for acao in acoes:
-        count = db.session.query(func.count(AuditLog.id)).filter_by(acao=acao).scalar()
-        logs_por_acao[acao] = count
-    
-    return jsonify({
-        'total_logs': total_logs,
-        'usuarios': usuarios_unicos,
-        'acoes': acoes,
-        'logs_por_acao': logs_por_acao
-    }), 200
+    """Retorna estatísticas dos logs (?periodo=dia|semana&dias=30 para a série temporal)"""
+    periodo = request.args.get('periodo', 'dia')
+    try:
+        dias = min(max(int(request.args.get('dias', 30)), 1), 366)
+        return jsonify(estatisticas_auditoria(periodo, dias)), 200
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+@bp_auth.route('/api/logs/fila', methods=['GET'])
+@jwt_required()
+def get_fila_auditoria():
+    """Profundidade da fila de auditoria assíncrona, gravados e descartados"""
+    return jsonify(metricas_auditoria()), 200
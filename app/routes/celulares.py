@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from app.models import db, Celular
 from app.services.audit import registrar_historico, registrar_exclusao
+from app.services.condicional import get_condicional
+from app.services.cache_respostas import cache_resposta, tags_lista
+from app.services.serializacao import CELULAR, CampoDesconhecido, ler_campos
 from datetime import datetime, date
 
 bp_celulares = Blueprint('celulares', __name__)
@@ -28,16 +31,24 @@ def _status_value(payload):
 
 # --- ROTAS DE CELULARES ---
 
-@bp_celulares.route('/api/celulares', methods=['GET'])
-@jwt_required()
-def get_celulares():
-    """Listar todos os celulares, opcionalmente filtrar por filial"""
-    filial = request.args.get('filial')
+def _filtrar_celulares(args):
+    filial = args.get('filial')
     query = Celular.query
     if filial:
         query = query.filter_by(filial=filial)
-    celulares = query.all()
-    return jsonify([celular.to_dict() for celular in celulares]), 200
+    return query
+
+@bp_celulares.route('/api/celulares', methods=['GET'])
+@jwt_required()
+@cache_resposta(tags_lista('celulares'))
+@get_condicional(_filtrar_celulares, Celular.atualizado_em)
+def get_celulares():
+    """Listar todos os celulares, opcionalmente filtrar por filial; `fields=a,b` limita as colunas (o id vem sempre)"""
+    try:
+        codificador = CELULAR.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+    return jsonify(codificador.lista(codificador.selecionar(_filtrar_celulares(request.args)))), 200
 
 @bp_celulares.route('/api/celulares/<id>', methods=['GET'])
 @jwt_required()
@@ -48,10 +59,15 @@ def get_celular(id):
     except ValueError:
         return jsonify({'erro': 'ID inválido'}), 400
 
-    celular = Celular.query.get(celular_id)
-    if not celular:
+    try:
+        codificador = CELULAR.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+
+    celular = codificador.um(Celular.query.filter(Celular.id == celular_id))
+    if celular is None:
         return jsonify({'erro': 'Celular não encontrado'}), 404
-    return jsonify(celular.to_dict()), 200
+    return jsonify(celular), 200
 
 @bp_celulares.route('/api/celulares', methods=['POST'])
 @jwt_required()
@@ -85,9 +101,9 @@ def create_celular():
 
     celular.atualizado_em = datetime.now()
     db.session.add(celular)
-    db.session.commit()
-
+    db.session.flush()  # gera o id para a auditoria
     registrar_historico(celular.id, None, celular.to_dict(), usuario=user_name, entidade="Celular")
+    db.session.commit()
 
     return jsonify({
         'msg': 'Celular criado com sucesso!',
@@ -127,9 +143,8 @@ def update_celular(id):
         celular.valor = data.get('valor')
 
     celular.atualizado_em = datetime.now()
-    db.session.commit()
-
     registrar_historico(celular.id, celular_antigo, celular.to_dict(), usuario=user_name, entidade="Celular")
+    db.session.commit()
 
     return jsonify({'msg': 'Celular atualizado com sucesso!'}), 200
 
@@ -157,13 +172,13 @@ def delete_celular(id):
         if 'admin' not in permissoes:
             return jsonify({'erro': 'Apenas admins podem excluir definitivamente'}), 403
         db.session.delete(celular)
-        db.session.commit()
         registrar_exclusao(celular_id, celular_antigo, usuario=user_name, entidade="Celular")
+        db.session.commit()
         return jsonify({'msg': 'Celular excluido definitivamente!'}), 200
 
     celular.status = 'Inativo'
     celular.atualizado_em = datetime.now()
-    db.session.commit()
     registrar_historico(celular_id, celular_antigo, celular.to_dict(), usuario=user_name, entidade="Celular")
+    db.session.commit()
 
     return jsonify({'msg': 'Celular inativado com sucesso!'}), 200
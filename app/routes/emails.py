@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from app.models import db, Email, Asset
 from app.services.audit import registrar_historico
+from app.services.condicional import get_condicional
+from app.services.cache_respostas import cache_resposta, tags_filhos
+from app.services.serializacao import EMAIL, CampoDesconhecido, ler_campos
 from datetime import datetime
 
 bp_emails = Blueprint('emails', __name__)
@@ -16,27 +19,35 @@ def _status_to_ativo(value):
 
 # --- ROTAS DE EMAILS (ZIMBRA/GOOGLE) ---
 
-@bp_emails.route('/api/emails', methods=['GET'])
-@jwt_required()
-def get_emails():
-    """Listar todos os emails, opcionalmente filtrar por asset_id ou filial"""
-    asset_id = request.args.get('asset_id')
-    filial = request.args.get('filial')
-    tipo = request.args.get('tipo')  # 'google' ou 'zimbra'
+def _filtrar_emails(args):
+    asset_id = args.get('asset_id')
+    filial = args.get('filial')
+    tipo = args.get('tipo')  # 'google' ou 'zimbra'
 
-    query = Email.query
+    query = Email.query.outerjoin(Email.asset)
     if asset_id:
         try:
             query = query.filter(Email.asset_id == int(asset_id))
         except ValueError:
             pass
     if filial:
-        query = query.join(Asset).filter(Asset.filial == filial)
+        query = query.filter(Asset.filial == filial)
     if tipo:
         query = query.filter(Email.tipo == tipo)
+    return query
 
-    emails = query.all()
-    return jsonify([email.to_dict() for email in emails]), 200
+@bp_emails.route('/api/emails', methods=['GET'])
+@jwt_required()
+@cache_resposta(tags_filhos('emails'))
+@get_condicional(_filtrar_emails, Email.atualizado_em, Asset.atualizado_em)
+def get_emails():
+    """Listar todos os emails, opcionalmente filtrar por asset_id ou filial; `fields=a,b` limita as colunas (o id vem sempre)"""
+    try:
+        codificador = EMAIL.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+    # Colunas direto do SELECT, com o patrimônio do Asset já ligado (sem objetos ORM)
+    return jsonify(codificador.lista(codificador.selecionar(_filtrar_emails(request.args)))), 200
 
 @bp_emails.route('/api/emails/<id>', methods=['GET'])
 @jwt_required()
@@ -47,10 +58,15 @@ def get_email(id):
     except ValueError:
         return jsonify({'erro': 'ID inválido'}), 400
 
-    email = Email.query.get(email_id)
-    if not email:
+    try:
+        codificador = EMAIL.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+
+    email = codificador.um(Email.query.outerjoin(Email.asset).filter(Email.id == email_id))
+    if email is None:
         return jsonify({'erro': 'Email não encontrado'}), 404
-    return jsonify(email.to_dict()), 200
+    return jsonify(email), 200
 
 @bp_emails.route('/api/emails', methods=['POST'])
 @jwt_required()
@@ -87,9 +103,9 @@ def create_email():
 
     email.atualizado_em = datetime.now()
     db.session.add(email)
-    db.session.commit()
-
+    db.session.flush()  # gera o id para a auditoria
     registrar_historico(email.id, None, email.to_dict(include_password=True), usuario=user_name, entidade="Email")
+    db.session.commit()
 
     return jsonify({
         'msg': 'Email criado com sucesso!',
@@ -122,6 +138,7 @@ def update_email(id):
     if 'asset_id' in data:
         try:
             email.asset_id = int(data.get('asset_id'))
+            db.session.expire(email, ['asset'])  # snapshot da auditoria com o novo ativo
         except ValueError:
             return jsonify({'erro': 'Asset ID inválido'}), 400
 
@@ -129,9 +146,8 @@ def update_email(id):
         email.ativo = _status_to_ativo(data.get('ativo') if 'ativo' in data else data.get('status'))
 
     email.atualizado_em = datetime.now()
-    db.session.commit()
-
     registrar_historico(email.id, email_antigo, email.to_dict(include_password=True), usuario=user_name, entidade="Email")
+    db.session.commit()
 
     return jsonify({'msg': 'Email atualizado com sucesso!'}), 200
 
@@ -154,8 +170,7 @@ def delete_email(id):
     email_antigo = email.to_dict(include_password=True)
     email.ativo = False
     email.atualizado_em = datetime.now()
-    db.session.commit()
-
     registrar_historico(email.id, email_antigo, email.to_dict(include_password=True), usuario=user_name, entidade="Email")
+    db.session.commit()
 
     return jsonify({'msg': 'Email inativado com sucesso!'}), 200
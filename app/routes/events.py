@@ -0,0 +1,86 @@
+import json
+import queue
+from datetime import timedelta
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from app.services.events import get_broadcaster
+
+bp_events = Blueprint('events', __name__)
+
+INTERVALO_HEARTBEAT = 15  # segundos
+ESCOPO_EVENTOS = 'eventos'
+
+
+@bp_events.route('/api/events/token', methods=['POST'])
+@jwt_required()
+def token_eventos():
+    """
+    Token curto (EVENTOS_TOKEN_VALIDADE segundos) que só abre o /api/events.
+
+    EventSource não envia cabeçalhos e o token vai na URL, onde acaba em logs
+    de proxy e no histórico; por isso não serve o token de 24h do login.
+    """
+    token = create_access_token(
+        identity=get_jwt_identity(),
+        additional_claims={'escopo': ESCOPO_EVENTOS},
+        expires_delta=timedelta(seconds=current_app.config['EVENTOS_TOKEN_VALIDADE'])
+    )
+    return jsonify({'token': token})
+
+
+def token_restrito_aos_eventos(jwt_header, jwt_data):
+    """
+    Verificação de todo token (JWTManager.token_verification_loader): o token
+    dos eventos só vale no stream, e o stream só aceita esse token.
+    """
+    no_stream = request.endpoint == 'events.stream_eventos'
+    return (jwt_data.get('escopo') == ESCOPO_EVENTOS) == no_stream
+
+
+def token_fora_do_escopo(jwt_header, jwt_data):
+    return jsonify({'erro': 'Token não vale para esta rota'}), 401
+
+
+@bp_events.route('/api/events', methods=['GET'])
+@jwt_required(locations=['query_string'])
+def stream_eventos():
+    """
+    Stream SSE com notificações de alteração (Asset, Celular, Email, Software).
+
+    EventSource não envia cabeçalhos: o token vai em `?jwt=<token>` e tem de
+    ser o de POST /api/events/token (validade curta, só serve aqui); ele só é
+    conferido na abertura da conexão. Cada commit gera um único evento com as
+    alterações agrupadas, {"alteracoes": [{entidade, acao, ids, total}]} (ids
+    é null quando passa de MAXIMO_IDS_POR_EVENTO); o cliente busca os dados
+    pelo /api/sync.
+
+    A resposta fica aberta e prende uma thread do servidor por cliente: em
+    produção rode com workers de threads ou gevent (um worker síncrono por
+    processo ficaria preso no primeiro stream). Passando de
+    EVENTOS_MAX_CONEXOES por processo a resposta é 503 com Retry-After.
+    """
+    broadcaster = get_broadcaster()
+    fila = broadcaster.assinar()
+    if fila is None:
+        # O cliente reconecta depois; até lá a busca periódica do frontend cobre
+        resposta = jsonify({'erro': 'Limite de conexões de eventos atingido'})
+        return resposta, 503, {'Retry-After': '30'}
+
+    def gerar():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    evento = fila.get(timeout=INTERVALO_HEARTBEAT)
+                except queue.Empty:
+                    # Comentário SSE mantém a conexão viva através de proxies
+                    yield ': ping\n\n'
+                    continue
+                yield f"event: alteracao\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            broadcaster.cancelar(fila)
+
+    return Response(gerar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
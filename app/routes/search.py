@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.services.busca import CAMPOS_BUSCA, buscar
+from app.services.pagination import ler_limite
+
+bp_search = Blueprint('search', __name__)
+
+LIMITE_BUSCA = 20
+LIMITE_BUSCA_MAXIMO = 50
+
+
+@bp_search.route('/api/search', methods=['GET'])
+@jwt_required()
+def search():
+    """
+    Busca global (?q=) em ativos, celulares, e-mails e softwares, incluindo
+    campos das especificações (hostname, dominio, vpn...). Resultados das
+    quatro entidades vêm juntos, por relevância. `entidades=Asset,Email`
+    restringe a busca; `limite` vai até 50.
+    """
+    termo = request.args.get('q', '')
+    entidades = [e.strip() for e in request.args.get('entidades', '').split(',') if e.strip()]
+    invalidas = [e for e in entidades if e not in CAMPOS_BUSCA]
+    if invalidas:
+        return jsonify({'erro': f"Entidades inválidas: {', '.join(invalidas)}"}), 400
+
+    limite = ler_limite(request.args.get('limite'), padrao=LIMITE_BUSCA, maximo=LIMITE_BUSCA_MAXIMO)
+    try:
+        itens = buscar(termo, limite=limite, entidades=entidades)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    return jsonify({'itens': itens}), 200
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from app.models import db, Software, Asset
+from sqlalchemy.orm import joinedload
 from app.services.audit import registrar_historico
+from app.services.condicional import get_condicional
+from app.services.cache_respostas import cache_resposta, tags_filhos
+from app.services.serializacao import SOFTWARE, CampoDesconhecido, ler_campos
 from datetime import datetime, date
 
 bp_softwares = Blueprint('softwares', __name__)
@@ -31,24 +35,32 @@ def _status_to_ativo(value):
 
 # --- ROTAS DE SOFTWARES/LICENÇAS ---
 
-@bp_softwares.route('/api/softwares', methods=['GET'])
-@jwt_required()
-def get_softwares():
-    """Listar todos os softwares, opcionalmente filtrar por asset_id ou filial"""
-    asset_id = request.args.get('asset_id')
-    filial = request.args.get('filial')
+def _filtrar_softwares(args):
+    asset_id = args.get('asset_id')
+    filial = args.get('filial')
 
-    query = Software.query
+    query = Software.query.join(Software.asset)
     if asset_id:
         try:
             query = query.filter(Software.asset_id == int(asset_id))
         except ValueError:
             pass
     if filial:
-        query = query.join(Asset).filter(Asset.filial == filial)
+        query = query.filter(Asset.filial == filial)
+    return query
 
-    softwares = query.all()
-    return jsonify([software.to_dict() for software in softwares]), 200
+@bp_softwares.route('/api/softwares', methods=['GET'])
+@jwt_required()
+@cache_resposta(tags_filhos('softwares'))
+@get_condicional(_filtrar_softwares, Software.atualizado_em, Asset.atualizado_em)
+def get_softwares():
+    """Listar todos os softwares, opcionalmente filtrar por asset_id ou filial; `fields=a,b` limita as colunas (o id vem sempre)"""
+    try:
+        codificador = SOFTWARE.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+    # Colunas direto do SELECT, com o patrimônio do Asset já ligado (sem objetos ORM)
+    return jsonify(codificador.lista(codificador.selecionar(_filtrar_softwares(request.args)))), 200
 
 @bp_softwares.route('/api/softwares/<id>', methods=['GET'])
 @jwt_required()
@@ -59,10 +71,15 @@ def get_software(id):
     except ValueError:
         return jsonify({'erro': 'ID inválido'}), 400
 
-    software = Software.query.get(software_id)
-    if not software:
+    try:
+        codificador = SOFTWARE.projetar(ler_campos(request.args.get('fields')))
+    except CampoDesconhecido as e:
+        return jsonify({'erro': str(e)}), 400
+
+    software = codificador.um(Software.query.join(Software.asset).filter(Software.id == software_id))
+    if software is None:
         return jsonify({'erro': 'Software não encontrado'}), 404
-    return jsonify(software.to_dict()), 200
+    return jsonify(software), 200
 
 @bp_softwares.route('/api/softwares', methods=['POST'])
 @jwt_required()
@@ -99,9 +116,9 @@ def create_software():
 
     software.atualizado_em = datetime.now()
     db.session.add(software)
-    db.session.commit()
-
+    db.session.flush()  # gera o id para a auditoria
     registrar_historico(software.id, None, software.to_dict(), usuario=user_name, entidade="Software")
+    db.session.commit()
 
     return jsonify({
         'msg': 'Software/Licença criado com sucesso!',
@@ -134,6 +151,7 @@ def update_software(id):
     if 'asset_id' in data:
         try:
             software.asset_id = int(data.get('asset_id'))
+            db.session.expire(software, ['asset'])  # snapshot da auditoria com o novo ativo
         except ValueError:
             return jsonify({'erro': 'Asset ID inválido'}), 400
 
@@ -149,9 +167,8 @@ def update_software(id):
         software.ativo = _status_to_ativo(data.get('ativo') if 'ativo' in data else data.get('status'))
 
     software.atualizado_em = datetime.now()
-    db.session.commit()
-
     registrar_historico(software.id, software_antigo, software.to_dict(), usuario=user_name, entidade="Software")
+    db.session.commit()
 
     return jsonify({'msg': 'Software/Licença atualizado com sucesso!'}), 200
 
@@ -174,9 +191,8 @@ def delete_software(id):
     software_antigo = software.to_dict()
     software.ativo = False
     software.atualizado_em = datetime.now()
-    db.session.commit()
-
     registrar_historico(software.id, software_antigo, software.to_dict(), usuario=user_name, entidade="Software")
+    db.session.commit()
 
     return jsonify({'msg': 'Software/Licença inativado com sucesso!'}), 200
 
@@ -192,7 +208,7 @@ def verificar_vencimento():
     data_limite = datetime.now().date() + timedelta(days=dias)
     hoje = datetime.now().date()
 
-    softwares = Software.query.filter(
+    softwares = Software.query.options(joinedload(Software.asset)).filter(
         Software.dt_vencimento >= hoje,
         Software.dt_vencimento <= data_limite,
         Software.ativo.is_(True)
@@ -0,0 +1,126 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.models import db, Asset, Celular, Email, Software, AuditLog
+from app.services.pagination import codificar_cursor, decodificar_cursor, CursorInvalido
+from app.services.filiais import get_cache_filiais, versao_filiais
+from sqlalchemy import func, or_
+from sqlalchemy.orm import contains_eager
+from datetime import datetime, timedelta
+
+bp_sync = Blueprint('sync', __name__)
+
+# Folga aplicada ao "since" para não perder linhas cujo atualizado_em foi
+# definido antes do commit de outra transação. Linhas repetidas são
+# inofensivas: o cliente mescla pelo id.
+MARGEM_SYNC = timedelta(seconds=5)
+
+# Chave da resposta -> (modelo, nome da entidade nos logs de auditoria)
+ENTIDADES_SYNC = {
+    'assets': (Asset, 'Asset'),
+    'celulares': (Celular, 'Celular'),
+    'emails': (Email, 'Email'),
+    'softwares': (Software, 'Software'),
+}
+
+
+def _coluna_filial(chave):
+    """Emails e softwares não têm filial própria: valem a do ativo vinculado."""
+    return Asset.filial if chave in ('emails', 'softwares') else ENTIDADES_SYNC[chave][0].filial
+
+
+def _query_entidade(chave, filial, desde):
+    modelo = ENTIDADES_SYNC[chave][0]
+    query = modelo.query
+    if chave in ('emails', 'softwares'):
+        # to_dict lê asset.patrimonio: carrega o pai no mesmo SELECT
+        query = query.outerjoin(modelo.asset).options(contains_eager(modelo.asset))
+    if filial:
+        query = query.filter(_coluna_filial(chave) == filial)
+    if desde is not None:
+        query = query.filter(_alterado_desde(chave, filial, desde))
+    return query
+
+
+def _alterado_desde(chave, filial, desde):
+    modelo = ENTIDADES_SYNC[chave][0]
+    if filial and chave in ('emails', 'softwares'):
+        # Ativo que mudou de filial leva os filhos junto sem tocar no atualizado_em deles
+        return or_(modelo.atualizado_em > desde, Asset.atualizado_em > desde)
+    return modelo.atualizado_em > desde
+
+
+def _saidos_da_filial(chave, filial, desde):
+    """Ids alterados desde o token que agora estão fora da filial (ex.: ativo transferido)."""
+    modelo = ENTIDADES_SYNC[chave][0]
+    query = db.session.query(modelo.id)
+    if chave in ('emails', 'softwares'):
+        query = query.outerjoin(modelo.asset)
+    query = query.filter(
+        _alterado_desde(chave, filial, desde),
+        func.coalesce(_coluna_filial(chave), '') != filial
+    )
+    return {str(id_) for id_, in query}
+
+
+@bp_sync.route('/api/sync', methods=['GET'])
+@jwt_required()
+def sync():
+    """
+    Sincronização incremental das listas principais.
+
+    Sem `since` devolve o retrato completo. Com `since` devolve só as linhas
+    criadas/alteradas (inclusive inativadas) desde o token e os ids excluídos
+    definitivamente, obtidos dos logs de EXCLUSAO. `filiais` vem nulo quando
+    não mudou. O `token` da resposta deve ser enviado na próxima chamada.
+
+    `filial` restringe as listas em `filial_em` (chaves separadas por
+    vírgula; padrão: todas). No delta, linhas que saíram da filial desde o
+    token vêm em `removidos`, para o cliente tirá-las da lista local.
+    """
+    filial = request.args.get('filial')
+    filial_em = request.args.get('filial_em')
+    escopo_filial = set(filial_em.split(',')) if filial_em else set(ENTIDADES_SYNC)
+    if not escopo_filial <= set(ENTIDADES_SYNC):
+        return jsonify({'erro': f"filial_em inválido. Use {', '.join(ENTIDADES_SYNC)}"}), 400
+    since = request.args.get('since')
+    agora = datetime.now()
+    # Contador incrementado a cada criação/remoção de filial (tabela versoes)
+    versao = versao_filiais()
+
+    desde = None
+    versao_anterior = None
+    if since:
+        try:
+            valores = decodificar_cursor(since, 2)
+            desde = datetime.fromisoformat(valores[0]) - MARGEM_SYNC
+            versao_anterior = valores[1]
+        except (CursorInvalido, TypeError, ValueError):
+            return jsonify({'erro': 'Token de sincronização inválido'}), 400
+
+    resposta = {'completo': desde is None, 'removidos': {}}
+
+    if desde is None or versao != versao_anterior:
+        # Com a versão que vai no token, para o cache não devolver uma lista anterior a ela
+        resposta['filiais'] = get_cache_filiais().obter(versao)[0]
+    else:
+        resposta['filiais'] = None
+
+    for chave, (modelo, entidade) in ENTIDADES_SYNC.items():
+        filial_chave = filial if chave in escopo_filial else None
+        query = _query_entidade(chave, filial_chave, desde)
+        resposta[chave] = [item.to_dict() for item in query.all()]
+
+        removidos = set()
+        if desde is not None:
+            logs = db.session.query(AuditLog.entidade_id).filter(
+                AuditLog.acao == 'EXCLUSAO',
+                AuditLog.entidade == entidade,
+                AuditLog.timestamp > desde
+            ).all()
+            removidos = {log.entidade_id for log in logs if log.entidade_id}
+            if filial_chave:
+                removidos |= _saidos_da_filial(chave, filial_chave, desde)
+        resposta['removidos'][chave] = sorted(removidos)
+
+    resposta['token'] = codificar_cursor([agora, versao])
+    return jsonify(resposta), 200
@@ -0,0 +1,194 @@
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import date
+from flask import current_app
+from sqlalchemy import text
+from app.models import db, AuditLog
+from app.services.sensiveis import ocultar_sensiveis
+
+# Partições mensais criadas pela migração "particionar audit_logs por mês"
+PADRAO_PARTICAO = re.compile(r'^audit_logs_(\d{4})_(\d{2})$')
+SUFIXO_ARQUIVO = '.jsonl.gz'
+SUFIXO_INDICE = '.indice.json'
+
+
+def _primeiro_dia(dia):
+    return date(dia.year, dia.month, 1)
+
+
+def _somar_meses(dia, meses):
+    total = dia.year * 12 + dia.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def nome_particao(mes):
+    return f"audit_logs_{mes:%Y_%m}"
+
+
+def tabela_particionada():
+    """True quando audit_logs é particionada (bancos migrados; create_all gera tabela comum)."""
+    return bool(db.session.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE relname = 'audit_logs' AND relnamespace = 'public'::regnamespace"
+    )).scalar())
+
+
+def _tabelas_mensais():
+    """{mes: anexada?} para toda tabela audit_logs_AAAA_MM, anexada ou já desanexada."""
+    linhas = db.session.execute(text("""
+        SELECT c.relname, i.inhparent IS NOT NULL
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+        WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace
+          AND c.relname LIKE 'audit\\_logs\\_%'
+    """)).all()
+    tabelas = {}
+    for nome, anexada in linhas:
+        casamento = PADRAO_PARTICAO.match(nome)
+        if casamento:
+            tabelas[date(int(casamento.group(1)), int(casamento.group(2)), 1)] = anexada
+    return tabelas
+
+
+def garantir_particoes(meses_a_frente=3):
+    """
+    Cria as partições do mês atual até `meses_a_frente`. Linhas que já
+    tenham caído na partição padrão para esse mês são movidas para a nova.
+    Retorna os nomes criados.
+    """
+    if not tabela_particionada():
+        return []
+
+    existentes = _tabelas_mensais()
+    criadas = []
+    mes = _primeiro_dia(date.today())
+    for _ in range(meses_a_frente + 1):
+        if mes not in existentes:
+            _criar_particao(mes)
+            criadas.append(nome_particao(mes))
+        mes = _somar_meses(mes, 1)
+    db.session.commit()
+    return criadas
+
+
+def _criar_particao(mes):
+    nome = nome_particao(mes)
+    inicio, fim = mes.isoformat(), _somar_meses(mes, 1).isoformat()
+    intervalo = f"\"timestamp\" >= '{inicio}' AND \"timestamp\" < '{fim}'"
+    db.session.execute(text(f"CREATE TABLE {nome} (LIKE audit_logs INCLUDING DEFAULTS)"))
+    db.session.execute(text(f"INSERT INTO {nome} SELECT * FROM audit_logs_padrao WHERE {intervalo}"))
+    db.session.execute(text(f"DELETE FROM audit_logs_padrao WHERE {intervalo}"))
+    db.session.execute(text(
+        f"ALTER TABLE audit_logs ATTACH PARTITION {nome} FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+    ))
+
+
+def arquivar_particoes(meses_retencao, destino):
+    """
+    Desanexa as partições mais antigas que `meses_retencao` meses, grava cada
+    uma em destino/audit_logs_AAAA_MM.jsonl.gz (+ um índice de entidades) e
+    apaga a tabela. Tabelas desanexadas numa execução interrompida são
+    retomadas. Retorna [(nome, linhas)].
+    """
+    if not tabela_particionada():
+        return []
+
+    os.makedirs(destino, exist_ok=True)
+    limite = _somar_meses(_primeiro_dia(date.today()), -meses_retencao)
+    arquivadas = []
+    for mes, anexada in sorted(_tabelas_mensais().items()):
+        if mes >= limite:
+            continue
+        nome = nome_particao(mes)
+        if anexada:
+            # Depois do DETACH as consultas em audit_logs já não veem estas linhas
+            db.session.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {nome}"))
+            db.session.commit()
+        total = _exportar_tabela(nome, destino)
+        db.session.execute(text(f"DROP TABLE {nome}"))
+        db.session.commit()
+        arquivadas.append((nome, total))
+    return arquivadas
+
+
+def _exportar_tabela(nome, destino):
+    """Exporta em streaming para .jsonl.gz; só troca o arquivo final quando termina."""
+    caminho = os.path.join(destino, nome + SUFIXO_ARQUIVO)
+    temporario = caminho + '.tmp'
+    indice = {}
+    total = 0
+
+    resultado = db.session.execute(
+        text(f'SELECT * FROM {nome} ORDER BY "timestamp", id'),
+        execution_options={'yield_per': 1000}
+    )
+    with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+        for linha in resultado.mappings():
+            registro = AuditLog(**linha).to_dict()
+            # Linhas anteriores ao mascaramento por padrão não saem em claro no arquivo
+            registro['dados_antes'] = ocultar_sensiveis(registro['dados_antes'])
+            registro['dados_depois'] = ocultar_sensiveis(registro['dados_depois'])
+            arquivo.write(json.dumps(registro, ensure_ascii=False, default=str))
+            arquivo.write('\n')
+            indice.setdefault(registro['entidade'], set()).add(registro['entidade_id'])
+            total += 1
+
+    os.replace(temporario, caminho)
+    with open(os.path.join(destino, nome + SUFIXO_INDICE), 'w', encoding='utf-8') as arquivo:
+        json.dump({entidade: sorted(filter(None, ids)) for entidade, ids in indice.items()}, arquivo)
+    return total
+
+
+# --- LEITURA DOS MESES ARQUIVADOS ---
+
+_cache_indices = {}
+_lock_indices = threading.Lock()
+
+
+def _indice(caminho_indice):
+    """Índice {entidade: set(ids)} de um arquivo, em cache enquanto o arquivo não mudar."""
+    mtime = os.path.getmtime(caminho_indice)
+    with _lock_indices:
+        em_cache = _cache_indices.get(caminho_indice)
+        if em_cache and em_cache[0] == mtime:
+            return em_cache[1]
+    with open(caminho_indice, encoding='utf-8') as arquivo:
+        indice = {entidade: set(ids) for entidade, ids in json.load(arquivo).items()}
+    with _lock_indices:
+        _cache_indices[caminho_indice] = (mtime, indice)
+    return indice
+
+
+def ler_arquivados(entidade_id, entidade=None, limite=100, destino=None):
+    """
+    Logs de um registro nos meses arquivados, do mais recente para o mais
+    antigo. Só abre os arquivos cujo índice contém o registro.
+    """
+    destino = destino or current_app.config.get('AUDITORIA_ARQUIVO_DIR')
+    if not destino or not os.path.isdir(destino) or limite <= 0:
+        return []
+
+    entidade_id = str(entidade_id)
+    nomes = sorted((nome for nome in os.listdir(destino) if nome.endswith(SUFIXO_ARQUIVO)), reverse=True)
+    logs = []
+    for nome in nomes:
+        base = os.path.join(destino, nome[:-len(SUFIXO_ARQUIVO)])
+        if os.path.exists(base + SUFIXO_INDICE):
+            indice = _indice(base + SUFIXO_INDICE)
+            entidades = [entidade] if entidade else list(indice)
+            if not any(entidade_id in indice.get(nome_entidade, ()) for nome_entidade in entidades):
+                continue
+
+        do_mes = []
+        with gzip.open(base + SUFIXO_ARQUIVO, 'rt', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                registro = json.loads(linha)
+                if registro.get('entidade_id') == entidade_id and (not entidade or registro.get('entidade') == entidade):
+                    do_mes.append(registro)
+        # Arquivo em ordem crescente; a resposta é do mais recente para o mais antigo
+        logs.extend(reversed(do_mes))
+        if len(logs) >= limite:
+            break
+    return logs[:limite]
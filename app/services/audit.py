@@ -1,43 +1,124 @@
+import atexit
+import logging
+import queue
+import threading
 from datetime import datetime
+from functools import partial
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert
 from app.models import db, AuditLog
+from app.services.events import notificar_alteracao
+from app.services.responsaveis import acompanhar_responsavel
+from app.services.cache_respostas import invalidar_respostas
+from app.services.estatisticas import acumular_resumo
+from app.services.arquivo_auditoria import ler_arquivados
+from app.services.sensiveis import ocultar_sensiveis, valor_auditado
 
+logger = logging.getLogger(__name__)
 
-def registrar_exclusao(asset_id, dados_antigos, usuario="Sistema", entidade="Asset"):
-    """Registra remoção definitiva preservando snapshot para auditoria."""
+
+def _entidade_id(registro_id):
     try:
-        entidade_id = str(int(asset_id))
+        return str(int(registro_id))
     except (TypeError, ValueError):
-        entidade_id = None
+        return None
+
+# Campos que não entram no diff de uma alteração
+IGNORAR_NO_DIFF = ('_id', 'updated_at', 'created_at', 'criado_em', 'atualizado_em')
 
-    log = AuditLog(
+def registrar_exclusao(asset_id, dados_antigos, usuario="Sistema", entidade="Asset"):
+    """
+    Registra remoção definitiva preservando snapshot para auditoria.
+    O log entra na transação do chamador, que é quem faz o commit.
+    """
+    entidade_id = _entidade_id(asset_id)
+    log = _montar_log_exclusao(entidade_id, dados_antigos, usuario, entidade, datetime.now())
+
+    if _escritor_assincrono():
+        _agendar(lambda: [log])
+    else:
+        db.session.add(AuditLog(**log))
+        acumular_resumo([log])
+    notificar_alteracao(entidade, entidade_id, "excluido")
+    acompanhar_responsavel(entidade, dados_antigos, None)
+    invalidar_respostas(entidade, dados_antigos, None)
+
+def _montar_log_exclusao(entidade_id, dados_antigos, usuario, entidade, agora):
+    return dict(
         usuario_nome=usuario,
         acao="EXCLUSAO",
         entidade=entidade,
         entidade_id=entidade_id,
         descricao=f"Ativo {dados_antigos.get('patrimonio', 'N/A')} excluido definitivamente" if dados_antigos else "Registro excluido definitivamente",
-        dados_antes=dados_antigos,
+        dados_antes=ocultar_sensiveis(dados_antigos),
         dados_depois=None,
-        timestamp=datetime.now()
+        timestamp=agora
     )
-    db.session.add(log)
-    db.session.commit()
 
 def registrar_historico(asset_id, dados_antigos, dados_novos, usuario="Sistema", entidade="Asset"):
     """
-    Compara o documento antigo com o novo e gera logs detalhados para o que mudou.
-    Registra: criação, alterações de campos, adições e remoções de itens.
+    Compara o documento antigo com o novo e registra a criação ou um único
+    log de atualização com as chaves que mudaram (senhas mascaradas).
+
+    Os logs entram na transação do chamador (sem commit próprio): a alteração
+    e a auditoria são gravadas juntas ou nenhuma das duas. Com
+    AUDITORIA_ASSINCRONA o diff é calculado e gravado pela thread do
+    EscritorAuditoria depois do commit do chamador.
     """
+    acompanhar_responsavel(entidade, dados_antigos, dados_novos)
+    invalidar_respostas(entidade, dados_antigos, dados_novos)
+    if _escritor_assincrono():
+        _agendar(partial(_linhas_historico, asset_id, dados_antigos, dados_novos, usuario, entidade, datetime.now()))
+        notificar_alteracao(entidade, _entidade_id(asset_id), "atualizado" if dados_antigos else "criado")
+        return
 
-    try:
-        entidade_id = str(int(asset_id))
-    except (TypeError, ValueError):
-        entidade_id = None
+    entidade_id, logs, evento = _montar_logs_historico(asset_id, dados_antigos, dados_novos, usuario, entidade)
+
+    if logs:
+        db.session.add_all(AuditLog(**log) for log in logs)
+        acumular_resumo(logs)
+        notificar_alteracao(entidade, entidade_id, evento)
+
+def registrar_historico_em_lote(alteracoes, usuario="Sistema", entidade="Asset"):
+    """
+    Versão em lote de registrar_historico para importações e operações em massa.
+    `alteracoes` é um iterável de (id, dados_antigos, dados_novos). Todos os
+    logs vão num único INSERT de várias linhas, na transação do chamador.
+    Retorna a quantidade de logs gravados.
+    """
+    linhas = []
+    for asset_id, dados_antigos, dados_novos in alteracoes:
+        acompanhar_responsavel(entidade, dados_antigos, dados_novos)
+        invalidar_respostas(entidade, dados_antigos, dados_novos)
+        entidade_id, logs, evento = _montar_logs_historico(asset_id, dados_antigos, dados_novos, usuario, entidade)
+        if logs:
+            linhas.extend(logs)
+            notificar_alteracao(entidade, entidade_id, evento)
+
+    if linhas:
+        db.session.execute(insert(AuditLog), linhas)
+        acumular_resumo(linhas)
+    return len(linhas)
 
-    logs = []
+def _linhas_historico(*args):
+    return _montar_logs_historico(*args)[1]
+
+def _montar_logs_historico(asset_id, dados_antigos, dados_novos, usuario, entidade, agora=None):
+    """
+    Retorna (entidade_id, logs, evento), com os logs como dicionários de colunas.
+
+    Uma alteração vira um único log ATUALIZACAO cujo dados_antes/dados_depois
+    trazem só as chaves alteradas (valor antigo / valor novo). A visão por
+    campo (ALTERACAO, ADICAO, REMOCAO) é montada na leitura por expandir_logs.
+    """
+    entidade_id = _entidade_id(asset_id)
+
+    agora = agora or datetime.now()
+    dados_novos_brutos, dados_novos = dados_novos, ocultar_sensiveis(dados_novos)
 
     # É uma criação nova
     if not dados_antigos:
-        logs.append(AuditLog(
+        return entidade_id, [dict(
             usuario_nome=usuario,
             acao="CRIACAO",
             entidade=entidade,
@@ -45,93 +126,105 @@ def registrar_historico(asset_id, dados_antigos, dados_novos, usuario="Sistema",
             descricao=f"Ativo {dados_novos.get('patrimonio', 'N/A')} cadastrado no sistema",
             dados_antes=None,
             dados_depois=dados_novos,
-            timestamp=datetime.now()
-        ))
-        db.session.add_all(logs)
-        db.session.commit()
-        return
+            timestamp=agora
+        )], "criado"
 
-    ignorar = ['_id', 'updated_at', 'created_at', 'criado_em', 'atualizado_em']
+    antes, depois = {}, {}
+    for chave, valor_novo in dados_novos_brutos.items():
+        if chave in IGNORAR_NO_DIFF:
+            continue
+        valor_antigo = dados_antigos.get(chave)
+        if valor_antigo != valor_novo:
+            # Compara os valores reais, mas grava a senha mascarada
+            antes[chave] = valor_auditado(chave, valor_antigo)
+            depois[chave] = valor_auditado(chave, valor_novo)
 
-    # Detectar campos alterados
-    campos_alterados = []
+    if not depois:
+        return entidade_id, [], "atualizado"
 
-    for chave, valor_novo in dados_novos.items():
-        if chave in ignorar:
-            continue
+    return entidade_id, [dict(
+        usuario_nome=usuario,
+        acao="ATUALIZACAO",
+        entidade=entidade,
+        entidade_id=entidade_id,
+        descricao=f"Ativo {dados_novos.get('patrimonio', 'N/A')} atualizado",
+        dados_antes=antes,
+        dados_depois=depois,
+        timestamp=agora
+    )], "atualizado"
 
-        valor_antigo = dados_antigos.get(chave)
+# Valores de AuditLog.entidade
+ENTIDADES = ('Asset', 'Celular', 'Email', 'Software')
 
-        if valor_antigo != valor_novo:
-            # Se for lista, detectar o que foi adicionado/removido
+# Ações da visão por campo, gravadas dentro de um ATUALIZACAO compacto
+ACOES_POR_CAMPO = ('ALTERACAO', 'ADICAO', 'REMOCAO')
+
+def expandir_logs(logs):
+    """
+    Monta a visão por campo a partir dos logs (dicionários de to_dict): cada
+    ATUALIZACAO compacta vira o resumo com os campos_alterados seguido de um
+    ALTERACAO por campo (ADICAO/REMOCAO para listas). Logs no formato antigo,
+    como os de meses arquivados antes da compactação, passam como estão.
+    """
+    expandidos = []
+    for log in logs:
+        # Mascara também o que foi gravado antes do mascaramento por padrão (ex.: meses arquivados)
+        log = {**log, 'dados_antes': ocultar_sensiveis(log.get('dados_antes')),
+               'dados_depois': ocultar_sensiveis(log.get('dados_depois'))}
+        antes = log['dados_antes'] or {}
+        if log.get('acao') != "ATUALIZACAO" or 'campos_alterados' in antes:
+            expandidos.append(log)
+            continue
+
+        campos_alterados = []
+        por_campo = []
+        for chave, valor_novo in (log.get('dados_depois') or {}).items():
+            valor_antigo = antes.get(chave)
             if isinstance(valor_novo, list) and isinstance(valor_antigo, list):
                 adicionados = [item for item in valor_novo if item not in valor_antigo]
                 removidos = [item for item in valor_antigo if item not in valor_novo]
-
                 if adicionados:
-                    logs.append(AuditLog(
-                        usuario_nome=usuario,
-                        acao="ADICAO",
-                        entidade=entidade,
-                        entidade_id=entidade_id,
-                        descricao=f"Itens adicionados em {chave}",
-                        dados_antes=None,
-                        dados_depois={"campo": chave, "itens_adicionados": adicionados},
-                        timestamp=datetime.now()
-                    ))
+                    por_campo.append(("ADICAO", f"Itens adicionados em {chave}",
+                                      None, {"campo": chave, "itens_adicionados": adicionados}))
                     campos_alterados.append(f"{chave} (+)")
-
                 if removidos:
-                    logs.append(AuditLog(
-                        usuario_nome=usuario,
-                        acao="REMOCAO",
-                        entidade=entidade,
-                        entidade_id=entidade_id,
-                        descricao=f"Itens removidos em {chave}",
-                        dados_antes={"campo": chave, "itens_removidos": removidos},
-                        dados_depois=None,
-                        timestamp=datetime.now()
-                    ))
+                    por_campo.append(("REMOCAO", f"Itens removidos em {chave}",
+                                      {"campo": chave, "itens_removidos": removidos}, None))
                     campos_alterados.append(f"{chave} (-)")
             else:
-                logs.append(AuditLog(
-                    usuario_nome=usuario,
-                    acao="ALTERACAO",
-                    entidade=entidade,
-                    entidade_id=entidade_id,
-                    descricao=f"Campo {chave} alterado",
-                    dados_antes={chave: valor_antigo},
-                    dados_depois={chave: valor_novo},
-                    timestamp=datetime.now()
-                ))
+                por_campo.append(("ALTERACAO", f"Campo {chave} alterado", {chave: valor_antigo}, {chave: valor_novo}))
                 campos_alterados.append(chave)
 
-    # Registrar log geral de alteração
-    if campos_alterados:
-        logs.append(AuditLog(
-            usuario_nome=usuario,
-            acao="ATUALIZACAO",
-            entidade=entidade,
-            entidade_id=entidade_id,
-            descricao=f"Ativo {dados_novos.get('patrimonio', 'N/A')} atualizado",
-            dados_antes={"campos_alterados": campos_alterados},
-            dados_depois=dados_novos,
-            timestamp=datetime.now()
-        ))
-
-    if logs:
-        db.session.add_all(logs)
-        db.session.commit()
+        expandidos.append({**log, 'dados_antes': {"campos_alterados": campos_alterados}})
+        for numero, (acao, descricao, dados_antes, dados_depois) in enumerate(por_campo, 1):
+            expandidos.append({
+                **log,
+                'id': f"{log['id']}.{numero}",
+                'acao': acao,
+                'descricao': descricao,
+                'dados_antes': dados_antes,
+                'dados_depois': dados_depois,
+            })
+    return expandidos
 
-def obter_logs_ativo(asset_id):
-    """Retorna todos os logs de um ativo"""
-    try:
-        entidade_id = str(int(asset_id))
-    except (TypeError, ValueError):
-        entidade_id = None
+def obter_logs_ativo(asset_id, limite=100, incluir_arquivados=False, entidade="Asset"):
+    """
+    Retorna os logs de um registro (visão por campo), do mais recente para o
+    mais antigo. Os ids se repetem entre Asset/Celular/Email/Software, por
+    isso a busca é por (entidade, entidade_id); entidade=None traz todas. Com
+    `incluir_arquivados`, se o banco não tiver `limite` logs, completa com os
+    meses já arquivados.
+    """
+    entidade_id = _entidade_id(asset_id)
 
-    logs = AuditLog.query.filter_by(entidade_id=entidade_id).order_by(AuditLog.timestamp.desc()).all()
-    return [log.to_dict() for log in logs]
+    query = AuditLog.query.filter_by(entidade_id=entidade_id)
+    if entidade:
+        query = query.filter_by(entidade=entidade)
+    logs = query.order_by(AuditLog.timestamp.desc()).limit(limite).all()
+    resultado = [log.to_dict() for log in logs]
+    if incluir_arquivados and entidade_id and len(resultado) < limite:
+        resultado.extend(ler_arquivados(entidade_id, entidade=entidade, limite=limite - len(resultado)))
+    return expandir_logs(resultado)
 
 def obter_todos_os_logs(filtro_usuario=None, limite=100):
     """Retorna todos os logs do sistema com opção de filtro"""
@@ -140,4 +233,178 @@ def obter_todos_os_logs(filtro_usuario=None, limite=100):
         query = query.filter_by(usuario_nome=filtro_usuario)
 
     logs = query.order_by(AuditLog.timestamp.desc()).limit(limite).all()
-    return [log.to_dict() for log in logs]
\ No newline at end of file
+    return expandir_logs([log.to_dict() for log in logs])
+
+
+# --- GRAVAÇÃO ASSÍNCRONA (AUDITORIA_ASSINCRONA) ---
+
+class EscritorAuditoria:
+    """
+    Fila limitada + thread que grava a auditoria em lotes (INSERT de várias
+    linhas). As requisições só enfileiram; com a fila cheia esperam até
+    `espera_max` segundos (backpressure) e então descartam, contando o descarte.
+    Se o INSERT do lote falha, as linhas são gravadas uma a uma e só as que
+    falham de novo são descartadas (logadas e contadas em `falhas`).
+    """
+
+    def __init__(self, app, tamanho_fila=10000, tamanho_lote=500, espera_max=0.5):
+        self.app = app
+        self.tamanho_lote = tamanho_lote
+        self.espera_max = espera_max
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enfileirados = 0
+        self.gravados = 0
+        self.descartados = 0
+        self.falhas = 0
+        self.lotes = 0
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name='auditoria', daemon=True)
+        self._thread.start()
+        atexit.register(self.parar)
+
+    def enfileirar(self, tarefas):
+        for tarefa in tarefas:
+            try:
+                self._fila.put(tarefa, timeout=self.espera_max)
+                with self._lock:
+                    self.enfileirados += 1
+            except queue.Full:
+                with self._lock:
+                    self.descartados += 1
+                logger.warning('Fila de auditoria cheia: registro descartado')
+
+    def parar(self, timeout=10):
+        """Grava o que ainda está na fila e encerra a thread (chamado no desligamento)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._fila.put(None)
+        self._thread.join(timeout)
+
+    def metricas(self):
+        with self._lock:
+            return {
+                'assincrona': True,
+                'fila': self._fila.qsize(),
+                'capacidade': self._fila.maxsize,
+                'enfileirados': self.enfileirados,
+                'gravados': self.gravados,
+                'descartados': self.descartados,
+                'falhas': self.falhas,
+                'lotes': self.lotes
+            }
+
+    def _executar(self):
+        with self.app.app_context():
+            parar = False
+            while not parar:
+                lote = [self._fila.get()]
+                # Junta o que já estiver na fila, até o tamanho do lote
+                while len(lote) < self.tamanho_lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in lote:
+                    parar = True
+                    lote = [tarefa for tarefa in lote if tarefa is not None]
+                    while True:
+                        try:
+                            tarefa = self._fila.get_nowait()
+                        except queue.Empty:
+                            break
+                        if tarefa is not None:
+                            lote.append(tarefa)
+                if lote:
+                    self._gravar(lote)
+
+    def _gravar(self, tarefas):
+        linhas = []
+        for tarefa in tarefas:
+            try:
+                linhas.extend(tarefa())
+            except Exception:
+                with self._lock:
+                    self.falhas += 1
+                logger.exception('Falha ao montar registro de auditoria')
+        if not linhas:
+            return
+        try:
+            self._inserir(linhas)
+        except Exception:
+            # Uma linha ruim não pode levar o lote inteiro: tenta uma a uma
+            logger.exception('Falha ao gravar lote de auditoria; gravando linha a linha')
+            for linha in linhas:
+                try:
+                    self._inserir([linha])
+                except Exception:
+                    with self._lock:
+                        self.falhas += 1
+                    logger.exception('Registro de auditoria descartado: %r', linha)
+            return
+        with self._lock:
+            self.lotes += 1
+
+    def _inserir(self, linhas):
+        with db.engine.begin() as conn:
+            conn.execute(insert(AuditLog), linhas)
+            acumular_resumo(linhas, conn)
+        with self._lock:
+            self.gravados += len(linhas)
+
+
+def init_auditoria(app):
+    """Liga o escritor assíncrono quando AUDITORIA_ASSINCRONA estiver ativo."""
+    if not app.config.get('AUDITORIA_ASSINCRONA'):
+        return None
+    escritor = EscritorAuditoria(
+        app,
+        tamanho_fila=app.config.get('AUDITORIA_FILA_MAX', 10000),
+        tamanho_lote=app.config.get('AUDITORIA_LOTE', 500),
+        espera_max=app.config.get('AUDITORIA_ESPERA_MAX', 0.5)
+    )
+    escritor.iniciar()
+    app.extensions['auditoria'] = escritor
+    _registrar_listeners()
+    return escritor
+
+
+def metricas_auditoria():
+    escritor = _escritor_assincrono()
+    return escritor.metricas() if escritor else {'assincrona': False}
+
+
+def _escritor_assincrono():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('auditoria')
+
+
+def _agendar(tarefa):
+    """Guarda a tarefa até o commit do chamador; um rollback a descarta."""
+    db.session.info.setdefault('auditoria_pendente', []).append(tarefa)
+
+
+_listeners_registrados = False
+
+
+def _registrar_listeners():
+    global _listeners_registrados
+    if _listeners_registrados:
+        return
+    event.listen(db.session, 'after_commit', _apos_commit)
+    event.listen(db.session, 'after_rollback', _apos_rollback)
+    _listeners_registrados = True
+
+
+def _apos_commit(session):
+    tarefas = session.info.pop('auditoria_pendente', None)
+    escritor = _escritor_assincrono()
+    if tarefas and escritor:
+        escritor.enfileirar(tarefas)
+
+
+def _apos_rollback(session):
+    session.info.pop('auditoria_pendente', None)
@@ -0,0 +1,89 @@
+import re
+from sqlalchemy import func, literal, literal_column, or_, select, union_all
+from sqlalchemy.orm import joinedload
+from app.models import db, Asset, Celular, Email, Software
+
+# Campos pesquisados por entidade (a migração "busca textual" usa os mesmos)
+CAMPOS_BUSCA = {
+    'Asset': (Asset, ('patrimonio', 'responsavel', 'setor', 'modelo', 'anydesk', 'marca',
+                      'numero_serie', 'filial', 'tipo')),
+    'Celular': (Celular, ('patrimonio', 'responsavel', 'modelo', 'imei', 'numero', 'operadora', 'filial')),
+    'Email': (Email, ('endereco', 'usuario', 'tipo')),
+    'Software': (Software, ('nome', 'versao', 'tipo_licenca')),
+}
+
+TAMANHO_MINIMO = 2
+
+def buscar(termo, limite=20, entidades=None):
+    """
+    Busca `termo` em ativos, celulares, e-mails e softwares (incluindo os
+    valores de especificacoes, menos as senhas) e devolve os `limite` melhores resultados
+    juntos, ordenados por relevância: [{entidade, id, relevancia, dados}].
+    """
+    termo = ' '.join(termo.split()).lower()
+    if len(termo) < TAMANHO_MINIMO:
+        raise ValueError(f"A busca precisa de pelo menos {TAMANHO_MINIMO} caracteres")
+
+    entidades = entidades or list(CAMPOS_BUSCA)
+    consulta = union_all(*(_consulta_indexada(entidade, termo) for entidade in entidades)).subquery()
+    acertos = db.session.execute(
+        select(consulta).order_by(consulta.c.relevancia.desc(), consulta.c.entidade, consulta.c.id).limit(limite)
+    ).all()
+
+    registros = _carregar(acertos)
+    return [
+        {
+            'entidade': entidade,
+            'id': str(registro_id),
+            'relevancia': round(float(relevancia), 4),
+            'dados': registros[(entidade, registro_id)].to_dict(),
+        }
+        for entidade, registro_id, relevancia in acertos
+        if (entidade, registro_id) in registros
+    ]
+
+
+def _consulta_indexada(entidade, termo):
+    """tsvector para palavras (com prefixo), trigramas para trechos e erros de digitação."""
+    modelo = CAMPOS_BUSCA[entidade][0]
+    tabela = modelo.__tablename__
+    texto = literal_column(f"{tabela}.busca_texto")
+    documento = literal_column(f"{tabela}.busca_documento")
+
+    condicoes = [
+        texto.like(f"%{escapar_like(termo)}%", escape='\\'),
+        literal(termo).op('<%')(texto),
+    ]
+    relevancia = func.word_similarity(termo, texto)
+    palavras = re.findall(r'\w+', termo)
+    if palavras:
+        # Palavras como prefixo ("funcion" acha "funcionario"); a palavra exata pesa mais
+        consulta_ts = func.to_tsquery('simple', ' & '.join(f"{palavra}:*" for palavra in palavras))
+        consulta_exata = func.to_tsquery('simple', ' & '.join(palavras))
+        condicoes.append(documento.op('@@')(consulta_ts))
+        relevancia = relevancia + func.ts_rank(documento, consulta_ts) + func.ts_rank(documento, consulta_exata)
+
+    return (select(literal(entidade).label('entidade'), modelo.id.label('id'), relevancia.label('relevancia'))
+            .select_from(modelo).where(or_(*condicoes)))
+
+
+def _carregar(acertos):
+    """Carrega só os registros encontrados: uma consulta por entidade."""
+    ids = {}
+    for entidade, registro_id, _ in acertos:
+        ids.setdefault(entidade, []).append(registro_id)
+
+    registros = {}
+    for entidade, lista in ids.items():
+        modelo = CAMPOS_BUSCA[entidade][0]
+        query = modelo.query.filter(modelo.id.in_(lista))
+        if modelo in (Email, Software):
+            # to_dict lê asset.patrimonio
+            query = query.options(joinedload(modelo.asset))
+        registros.update(((entidade, registro.id), registro) for registro in query)
+    return registros
+
+
+def escapar_like(valor):
+    """Escapa \\, % e _ para usar `valor` literalmente num LIKE/ILIKE com escape='\\'."""
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -0,0 +1,292 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from werkzeug.http import unquote_etag
+from app.models import db
+
+# Cabeçalhos da resposta original repetidos nos acertos (validadores do GET condicional)
+CABECALHOS_GUARDADOS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+# Campos do ativo que mudam as listas de e-mails/softwares (exibidos ou usados nos filtros)
+CAMPOS_ATIVO_NOS_FILHOS = ('patrimonio', 'filial', 'status')
+
+
+class BackendMemoria:
+    """
+    Cache no próprio processo (padrão): LRU com TTL e limite total de bytes.
+    Com vários processos cada um tem o seu e só vê as invalidações das
+    próprias gravações; as dos outros aparecem quando o TTL vence.
+    """
+
+    def __init__(self, ttl=30, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # chave -> (expira_em, dados)
+        self._versoes = {}  # tag -> contador
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            expira_em, dados = entrada
+            if expira_em <= time.monotonic():
+                self._remover(chave)
+                return None
+            self._entradas.move_to_end(chave)
+            return dados
+
+    def gravar(self, chave, dados):
+        # Uma resposta maior que metade do limite expulsaria quase tudo
+        if len(dados) > self.max_bytes // 2:
+            return
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (time.monotonic() + self.ttl, dados)
+            self.bytes += len(dados)
+            while self.bytes > self.max_bytes:
+                self._remover(next(iter(self._entradas)))
+
+    def versoes(self, tags):
+        with self._lock:
+            return [self._versoes.get(tag, 0) for tag in tags]
+
+    def incrementar(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versoes[tag] = self._versoes.get(tag, 0) + 1
+
+    def _remover(self, chave):
+        _, dados = self._entradas.pop(chave)
+        self.bytes -= len(dados)
+
+
+class BackendCompartilhado:
+    """
+    Cache compartilhado entre processos em um servidor no estilo Redis.
+    `cliente` só precisa de get, set(ex=), mget e incr (redis.Redis ou um
+    substituto local com a mesma interface). Expiração e LRU ficam por conta
+    do servidor (TTL por chave + maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, cliente, ttl=30, prefixo='inventario:cache:'):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def obter(self, chave):
+        return self.cliente.get(f"{self.prefixo}r:{chave}")
+
+    def gravar(self, chave, dados):
+        self.cliente.set(f"{self.prefixo}r:{chave}", dados, ex=self.ttl)
+
+    def versoes(self, tags):
+        if not tags:
+            return []
+        valores = self.cliente.mget([f"{self.prefixo}t:{tag}" for tag in tags])
+        return [int(valor or 0) for valor in valores]
+
+    def incrementar(self, tags):
+        for tag in tags:
+            self.cliente.incr(f"{self.prefixo}t:{tag}")
+
+
+class CacheRespostas:
+    """
+    Respostas GET serializadas, por rota + parâmetros. Cada entrada guarda a
+    versão das tags de que depende (ex.: 'assets:filial:Matriz', 'asset:42'),
+    lidas antes de consultar o banco; gravações incrementam as tags afetadas
+    depois do commit e as entradas com versão antiga deixam de valer.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def ler(self, chave, versoes):
+        dados = self.backend.obter(chave)
+        if dados is None:
+            return None
+        meta, _, corpo = dados.partition(b'\n')
+        meta = json.loads(meta)
+        if meta['versoes'] != versoes:
+            return None
+        return meta, corpo
+
+    def guardar(self, chave, versoes, resposta):
+        meta = {
+            'versoes': versoes,
+            'mimetype': resposta.mimetype,
+            'cabecalhos': {nome: resposta.headers[nome] for nome in CABECALHOS_GUARDADOS if nome in resposta.headers},
+        }
+        self.backend.gravar(chave, json.dumps(meta).encode('utf-8') + b'\n' + resposta.get_data())
+
+    def invalidar(self, tags):
+        self.backend.incrementar(sorted(set(tags)))
+
+
+def init_cache_respostas(app, backend=None):
+    """Liga o cache (CACHE_RESPOSTAS); `backend` permite injetar outro armazenamento."""
+    if not app.config.get('CACHE_RESPOSTAS', True):
+        return None
+    ttl = app.config.get('CACHE_RESPOSTAS_TTL', 30)
+    if backend is None:
+        if app.config.get('CACHE_RESPOSTAS_BACKEND', 'memoria') == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_RESPOSTAS_BACKEND=redis requer o pacote 'redis' (pip install redis)")
+            backend = BackendCompartilhado(redis.Redis.from_url(app.config['CACHE_RESPOSTAS_REDIS_URL']), ttl=ttl)
+        else:
+            backend = BackendMemoria(ttl=ttl, max_bytes=app.config.get('CACHE_RESPOSTAS_MAX_MB', 64) * 1024 * 1024)
+    cache = CacheRespostas(backend)
+    app.extensions['cache_respostas'] = cache
+    _registrar_listeners()
+    return cache
+
+
+def cache_resposta(tags):
+    """
+    Decorator das rotas GET cacheadas. `tags(args, view_args)` diz de quais
+    tags a resposta depende. Acerto com If-None-Match igual à ETag guardada
+    vira 304; o cabeçalho X-Cache indica HIT ou MISS.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('cache_respostas')
+            if cache is None:
+                return view(*args, **kwargs)
+
+            chave = '|'.join([request.endpoint or ''] + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+                             + [f"{k}={v}" for k, v in sorted(request.args.items(multi=True))])
+            lista_tags = sorted(set(tags(request.args, kwargs)))
+            try:
+                # Versões lidas antes do banco: se algo mudar no meio, a entrada já nasce vencida
+                versoes = [[tag, versao] for tag, versao in zip(lista_tags, cache.backend.versoes(lista_tags))]
+                entrada = cache.ler(chave, versoes)
+            except Exception:
+                current_app.logger.exception('Falha ao ler o cache de respostas')
+                return view(*args, **kwargs)
+
+            if entrada is not None:
+                meta, corpo = entrada
+                etag = meta['cabecalhos'].get('ETag')
+                if etag and request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+                    resposta = current_app.response_class(status=304)
+                else:
+                    resposta = current_app.response_class(corpo, mimetype=meta['mimetype'])
+                resposta.headers.update(meta['cabecalhos'])
+                resposta.headers['X-Cache'] = 'HIT'
+                return resposta
+
+            resposta = make_response(view(*args, **kwargs))
+            if resposta.status_code == 200 and not resposta.is_streamed:
+                try:
+                    cache.guardar(chave, versoes, resposta)
+                except Exception:
+                    current_app.logger.exception('Falha ao gravar no cache de respostas')
+            resposta.headers['X-Cache'] = 'MISS'
+            return resposta
+        return wrapper
+    return decorador
+
+
+# --- Tags das rotas e das gravações ---
+
+def tags_lista(colecao):
+    """Listas de assets/celulares: por filial quando filtradas por filial, senão a coleção toda."""
+    def tags(args, view_args):
+        filial = args.get('filial')
+        return [f"{colecao}:filial:{filial}"] if filial else [colecao]
+    return tags
+
+
+def tags_filhos(colecao):
+    """Listas de emails/softwares: por ativo quando filtradas por asset_id, senão a coleção toda."""
+    def tags(args, view_args):
+        asset_id = args.get('asset_id')
+        return [f"{colecao}:asset:{asset_id}"] if asset_id else [colecao]
+    return tags
+
+
+def tags_ativo(args, view_args):
+    # /api/assets/007 e /api/assets/7 são o mesmo ativo e caem na mesma tag
+    asset_id = view_args.get('id')
+    try:
+        asset_id = int(asset_id)
+    except (TypeError, ValueError):
+        pass
+    return [f"asset:{asset_id}"]
+
+
+def tags_alteracao(entidade, dados_antigos, dados_novos):
+    """Tags afetadas pela gravação de um registro, a partir dos documentos antes/depois."""
+    documentos = [d for d in (dados_antigos, dados_novos) if d]
+    if not documentos:
+        return []
+
+    if entidade in ('Asset', 'Celular'):
+        colecao = 'assets' if entidade == 'Asset' else 'celulares'
+        tags = [colecao] + [f"{colecao}:filial:{d.get('filial')}" for d in documentos]
+        if entidade == 'Asset':
+            asset_id = documentos[-1].get('id')
+            tags.append(f"asset:{asset_id}")
+            # E-mails e softwares exibem o patrimônio do ativo, são filtrados pela filial dele e saem junto com ele
+            if not dados_novos or not dados_antigos or any(
+                    dados_antigos.get(campo) != dados_novos.get(campo) for campo in CAMPOS_ATIVO_NOS_FILHOS):
+                for filhos in ('emails', 'softwares'):
+                    tags += [filhos, f"{filhos}:asset:{asset_id}"]
+        return tags
+
+    if entidade in ('Email', 'Software'):
+        colecao = 'emails' if entidade == 'Email' else 'softwares'
+        tags = [colecao]
+        for asset_id in {d.get('asset_id') for d in documentos if d.get('asset_id')}:
+            tags += [f"{colecao}:asset:{asset_id}", f"asset:{asset_id}"]
+        return tags
+
+    return []
+
+
+def invalidar_respostas(entidade, dados_antigos, dados_novos):
+    """Agenda a invalidação das tags afetadas para quando a transação atual for confirmada."""
+    tags = tags_alteracao(entidade, dados_antigos, dados_novos)
+    if tags:
+        db.session.info.setdefault('cache_tags_pendentes', set()).update(tags)
+
+
+_listeners_registrados = False
+
+
+def _registrar_listeners():
+    global _listeners_registrados
+    if _listeners_registrados:
+        return
+    event.listen(db.session, 'after_commit', _apos_commit)
+    event.listen(db.session, 'after_rollback', _apos_rollback)
+    _listeners_registrados = True
+
+
+def _apos_commit(session):
+    tags = session.info.pop('cache_tags_pendentes', None)
+    if not tags:
+        return
+    cache = current_app.extensions.get('cache_respostas')
+    if cache is None:
+        return
+    try:
+        cache.invalidar(tags)
+    except Exception:
+        # Backend compartilhado fora do ar: o TTL acaba expirando as entradas
+        current_app.logger.exception('Falha ao invalidar o cache de respostas')
+
+
+def _apos_rollback(session):
+    session.info.pop('cache_tags_pendentes', None)
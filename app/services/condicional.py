@@ -0,0 +1,75 @@
+import hashlib
+from functools import wraps
+from flask import current_app, g, make_response, request
+from sqlalchemy import func
+
+
+def impressao_colecao(query, colunas_data):
+    """
+    (quantidade, maiores datas) da coleção filtrada numa única consulta
+    agregada, que os índices de atualizado_em deixam barata.
+    """
+    agregados = [func.count()] + [func.max(coluna) for coluna in colunas_data]
+    return tuple(query.order_by(None).with_entities(*agregados).one())
+
+
+def _etag(impressao):
+    partes = [request.endpoint or ''] + [str(valor) for valor in impressao]
+    partes += [f"{chave}={valor}" for chave, valor in sorted(request.args.items(multi=True))]
+    return hashlib.sha256('\x1f'.join(partes).encode('utf-8')).hexdigest()[:32]
+
+
+def get_condicional(consulta, *colunas_data, paginada=None):
+    """
+    GET condicional para rotas de listagem.
+
+    `consulta(args)` monta a query filtrada da coleção (sem opções de carga)
+    e `colunas_data` são as colunas atualizado_em que influenciam o JSON
+    (inclusive de tabelas ligadas, como o patrimônio do ativo nos e-mails).
+    Antes da rota roda só o agregado count/max; se o If-None-Match do
+    cliente bate com a ETag resultante, responde 304 sem montar a lista.
+
+    Last-Modified vai na resposta como informação, mas só a ETag gera 304:
+    uma exclusão definitiva não move max(atualizado_em), só a contagem.
+    A impressão fica em g.impressao_colecao para quem quiser reaproveitá-la.
+
+    `paginada(args)` identifica as requisições de uma página só (limite/
+    cursor). Nelas o agregado da coleção inteira custaria mais que a própria
+    página, então a rota roda e a ETag é o hash do corpo: o 304 poupa a
+    transferência e o custo continua proporcional ao tamanho da página.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if paginada is not None and paginada(request.args):
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+                resposta.add_etag()
+                resposta.headers['Cache-Control'] = 'no-cache'
+                return resposta.make_conditional(request)
+
+            impressao = impressao_colecao(consulta(request.args), colunas_data)
+            etag = _etag(impressao)
+            modificado = max((data for data in impressao[1:] if data is not None), default=None)
+            g.impressao_colecao = etag
+
+            if request.if_none_match.contains_weak(etag):
+                resposta = current_app.response_class(status=304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+
+            resposta.set_etag(etag, weak=True)  # mesma impressão, mesmo conteúdo (não é hash dos bytes)
+            if modificado is not None:
+                resposta.last_modified = modificado
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return wrapper
+    return decorador
+
+
+def pagina_keyset(args):
+    """Requisição paginada por chave (parâmetros limite/cursor das listagens)."""
+    return 'limite' in args or 'cursor' in args
@@ -0,0 +1,134 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects import postgresql
+from app.models import db, AuditLog, AuditResumo
+
+PERIODOS = ('dia', 'semana')
+DIMENSOES = ('acao', 'usuario_nome', 'entidade', 'periodo')
+
+
+def estatisticas_auditoria(periodo='dia', dias=30):
+    """
+    Totais por ação, usuário e entidade, mais a série por dia/semana dos
+    últimos `dias`, numa única consulta agregada (GROUPING SETS). Com
+    AUDITORIA_RESUMO lê da tabela de resumo, cujo tamanho não depende da
+    quantidade de logs.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}")
+
+    usar_resumo = current_app.config.get('AUDITORIA_RESUMO', False)
+    base = _base_resumo() if usar_resumo else _base_logs()
+    inicio = date.today() - timedelta(days=dias - 1)
+    if not usar_resumo:
+        inicio = datetime.combine(inicio, datetime.min.time())
+    base = base.add_columns(
+        case((base.selected_columns.data >= inicio, _truncar(base.selected_columns.data, periodo)), else_=None).label('periodo')
+    ).subquery()
+
+    resultado = {
+        'total_logs': 0,
+        'logs_por_acao': {},
+        'logs_por_usuario': {},
+        'logs_por_entidade': {},
+        'serie': []
+    }
+    for linha in db.session.execute(_agregar(base)):
+        total = int(linha.total or 0)
+        agrupado = [dimensao for dimensao in DIMENSOES if not getattr(linha, f'g_{dimensao}')]
+        if not agrupado:
+            resultado['total_logs'] = total
+        elif agrupado == ['periodo']:
+            if linha.periodo is not None:
+                resultado['serie'].append({'periodo': _formatar_periodo(linha.periodo), 'total': total})
+        elif agrupado == ['usuario_nome']:
+            if linha.usuario_nome:
+                resultado['logs_por_usuario'][linha.usuario_nome] = total
+        else:
+            resultado[f'logs_por_{agrupado[0]}'][getattr(linha, agrupado[0])] = total
+
+    resultado['serie'].sort(key=lambda item: item['periodo'])
+    resultado['usuarios'] = list(resultado['logs_por_usuario'])
+    resultado['acoes'] = list(resultado['logs_por_acao'])
+    resultado['periodo'] = periodo
+    resultado['fonte'] = 'resumo' if usar_resumo else 'audit_logs'
+    return resultado
+
+
+def _base_logs():
+    return select(
+        AuditLog.acao, AuditLog.usuario_nome, AuditLog.entidade,
+        AuditLog.timestamp.label('data'), literal(1).label('peso')
+    )
+
+
+def _base_resumo():
+    return select(
+        AuditResumo.acao, AuditResumo.usuario_nome, AuditResumo.entidade,
+        AuditResumo.dia.label('data'), AuditResumo.total.label('peso')
+    )
+
+
+def _agregar(base):
+    """Um agrupamento por dimensão + o total geral (GROUPING SETS), com flags g_<dimensao> (1 = não agrupado)."""
+    colunas = [base.c[dimensao] for dimensao in DIMENSOES]
+    total = func.coalesce(func.sum(base.c.peso), 0).label('total')
+    return select(
+        *colunas,
+        *[func.grouping(coluna).label(f'g_{coluna.name}') for coluna in colunas],
+        total
+    ).group_by(func.grouping_sets(*[tuple_(coluna) for coluna in colunas], tuple_()))
+
+
+def _truncar(coluna, periodo):
+    return func.date_trunc('week' if periodo == 'semana' else 'day', coluna)
+
+
+def _formatar_periodo(valor):
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return valor.isoformat() if isinstance(valor, date) else str(valor)
+
+
+# --- RESUMO INCREMENTAL ---
+
+def acumular_resumo(logs, conexao=None):
+    """
+    Soma os logs recém-gravados (dicionários de colunas) na tabela de resumo,
+    na mesma transação da gravação. Não faz nada sem AUDITORIA_RESUMO.
+    """
+    if not logs or not current_app.config.get('AUDITORIA_RESUMO', False):
+        return
+
+    contagem = Counter(
+        ((log.get('timestamp') or datetime.now()).date(), log['acao'], log.get('usuario_nome') or '', log['entidade'])
+        for log in logs
+    )
+    valores = [
+        {'dia': dia, 'acao': acao, 'usuario_nome': usuario, 'entidade': entidade, 'total': total}
+        for (dia, acao, usuario, entidade), total in contagem.items()
+    ]
+
+    conexao = conexao if conexao is not None else db.session
+    stmt = postgresql.insert(AuditResumo).values(valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['dia', 'acao', 'usuario_nome', 'entidade'],
+        set_={'total': AuditResumo.total + stmt.excluded.total}
+    )
+    conexao.execute(stmt)
+
+
+def reconstruir_resumo():
+    """Recalcula a tabela de resumo a partir de audit_logs (ao ligar AUDITORIA_RESUMO)."""
+    db.session.execute(delete(AuditResumo))
+    dia = func.date(AuditLog.timestamp)
+    usuario = func.coalesce(AuditLog.usuario_nome, '')
+    db.session.execute(insert(AuditResumo).from_select(
+        ['dia', 'acao', 'usuario_nome', 'entidade', 'total'],
+        select(dia, AuditLog.acao, usuario, AuditLog.entidade, func.count())
+        .group_by(dia, AuditLog.acao, usuario, AuditLog.entidade)
+    ))
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(AuditResumo))
@@ -0,0 +1,201 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, text
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+CANAL_POSTGRES = 'inventario_eventos'
+# Acima disso o evento leva só o total: o cliente busca o delta pelo
+# /api/sync de qualquer forma e o payload do NOTIFY é limitado a 8000 bytes.
+MAXIMO_IDS_POR_EVENTO = 100
+LIMITE_PAYLOAD_NOTIFY = 8000
+
+
+class Broadcaster:
+    """
+    Distribui eventos do processo para todas as conexões SSE abertas.
+
+    Cada conexão ocupa uma thread (ou greenlet) do servidor enquanto estiver
+    aberta; `maximo_assinantes` limita quantas o processo aceita (None = sem
+    limite) para que o stream não tome todos os workers.
+    """
+
+    def __init__(self, tamanho_fila=100, maximo_assinantes=None):
+        self.tamanho_fila = tamanho_fila
+        self.maximo_assinantes = maximo_assinantes
+        self._assinantes = set()
+        self._lock = threading.Lock()
+
+    def assinar(self):
+        """Fila do novo assinante, ou None se o limite de conexões foi atingido."""
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            if self.maximo_assinantes is not None and len(self._assinantes) >= self.maximo_assinantes:
+                return None
+            self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def publicar(self, evento):
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                # Cliente lento: descarta, ele ressincroniza pelo /api/sync
+                pass
+
+
+class BackendMemoria:
+    """Entrega direta no broadcaster local (um único processo)."""
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+
+    def iniciar(self, app):
+        pass
+
+    def enviar(self, evento):
+        self.broadcaster.publicar(evento)
+
+
+class BackendPostgres:
+    """
+    Usa LISTEN/NOTIFY para manter vários processos em sincronia: cada processo
+    publica com pg_notify e uma thread por processo escuta o canal e repassa
+    ao broadcaster local (inclusive os eventos gerados por ele mesmo).
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self._dsn = None
+
+    def iniciar(self, app):
+        with app.app_context():
+            self._dsn = db.engine.url.render_as_string(hide_password=False)
+        thread = threading.Thread(target=self._escutar, name='eventos-listen', daemon=True)
+        thread.start()
+
+    def enviar(self, evento):
+        payload = json.dumps(evento)
+        if len(payload.encode('utf-8')) >= LIMITE_PAYLOAD_NOTIFY:
+            # Muitas entidades/ações no mesmo commit: manda só os totais
+            payload = json.dumps({'alteracoes': [
+                {**alteracao, 'ids': None} for alteracao in evento['alteracoes']
+            ]})
+        with db.engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:canal, :payload)"),
+                {'canal': CANAL_POSTGRES, 'payload': payload}
+            )
+
+    def _escutar(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CANAL_POSTGRES}")
+                while True:
+                    if select.select([conn], [], [], 15) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notificacao = conn.notifies.pop(0)
+                        try:
+                            self.broadcaster.publicar(json.loads(notificacao.payload))
+                        except ValueError:
+                            continue
+            except Exception:
+                # Banco indisponível: tenta reconectar sem derrubar o processo
+                logger.exception('Falha ao escutar o canal de eventos; reconectando em 5s')
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+def init_eventos(app):
+    """Configura o broadcaster e o backend escolhido em EVENTOS_BACKEND."""
+    broadcaster = Broadcaster(maximo_assinantes=app.config.get('EVENTOS_MAX_CONEXOES'))
+    if app.config.get('EVENTOS_BACKEND') == 'postgres':
+        backend = BackendPostgres(broadcaster)
+    else:
+        backend = BackendMemoria(broadcaster)
+    backend.iniciar(app)
+    app.extensions['eventos'] = backend
+    _registrar_listeners()
+    return backend
+
+
+def get_broadcaster():
+    return current_app.extensions['eventos'].broadcaster
+
+
+def notificar_alteracao(entidade, entidade_id, acao):
+    """
+    Agenda a alteração para o evento publicado quando a transação atual for
+    confirmada. As alterações de um commit são agrupadas por entidade e ação
+    (dict como conjunto ordenado de ids), então uma importação de mil linhas
+    gera um único evento.
+    """
+    pendentes = db.session.info.setdefault('eventos_pendentes', {})
+    pendentes.setdefault((entidade, acao), {})[entidade_id] = None
+
+
+def montar_evento(pendentes):
+    """{(entidade, acao): ids} -> {'alteracoes': [{entidade, acao, ids, total}]}."""
+    alteracoes = []
+    for (entidade, acao), ids in pendentes.items():
+        ids = list(ids)
+        alteracoes.append({
+            'entidade': entidade,
+            'acao': acao,
+            'ids': ids if len(ids) <= MAXIMO_IDS_POR_EVENTO else None,
+            'total': len(ids)
+        })
+    return {'alteracoes': alteracoes}
+
+
+_listeners_registrados = False
+
+
+def _registrar_listeners():
+    global _listeners_registrados
+    if _listeners_registrados:
+        return
+    event.listen(db.session, 'after_commit', _apos_commit)
+    event.listen(db.session, 'after_rollback', _apos_rollback)
+    _listeners_registrados = True
+
+
+def _apos_commit(session):
+    pendentes = session.info.pop('eventos_pendentes', None)
+    if not pendentes:
+        return
+    backend = current_app.extensions.get('eventos')
+    if backend is None:
+        return
+    try:
+        backend.enviar(montar_evento(pendentes))
+    except Exception:
+        # Notificação é melhor-esforço: nunca deve quebrar a escrita
+        current_app.logger.exception('Falha ao publicar eventos de alteração')
+
+
+def _apos_rollback(session):
+    session.info.pop('eventos_pendentes', None)
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from flask import current_app
+from sqlalchemy import update
+from app.models import db, Filial, Versao
+
+CHAVE_VERSAO = 'filiais'
+
+
+def incrementar_versao(chave):
+    """Incrementa o contador de `chave` na transação do chamador (o commit é dele)."""
+    resultado = db.session.execute(
+        update(Versao).where(Versao.chave == chave).values(versao=Versao.versao + 1)
+    )
+    if resultado.rowcount == 0:
+        db.session.add(Versao(chave=chave, versao=1))
+
+
+def versao_filiais():
+    """Versão atual das filiais no banco (0 antes da primeira alteração)."""
+    versao = db.session.query(Versao.versao).filter(Versao.chave == CHAVE_VERSAO).scalar()
+    return versao or 0
+
+
+class CacheFiliais:
+    """
+    Lista de filiais em memória, já serializada e com ETag, relida do banco só
+    quando a versão 'filiais' muda. A versão é conferida no máximo a cada
+    `intervalo` segundos (alterações de outros processos aparecem nesse
+    prazo); as deste processo invalidam o cache na hora.
+    """
+
+    def __init__(self, intervalo=5):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._versao = None
+        self._conferido_em = None
+        self._estado = None  # (lista de dicts, corpo JSON em bytes, etag)
+
+    def obter(self, versao=None):
+        """
+        Retorna (filiais, corpo, etag). Quem já leu a versão do banco a passa
+        em `versao`: se o cache estiver em outra, recarrega na hora.
+        """
+        with self._lock:
+            agora = time.monotonic()
+            if self._estado is not None and self._conferido_em is not None \
+                    and agora - self._conferido_em < self.intervalo \
+                    and versao in (None, self._versao):
+                return self._estado
+
+            # Versão antes da lista: se mudar no meio, a próxima conferência recarrega
+            if versao is None:
+                versao = versao_filiais()
+            if self._estado is None or versao != self._versao:
+                filiais = [f.to_dict() for f in Filial.query.order_by(Filial.nome.asc()).all()]
+                corpo = current_app.json.dumps(filiais).encode('utf-8')
+                self._estado = (filiais, corpo, hashlib.sha256(corpo).hexdigest()[:32])
+                self._versao = versao
+            self._conferido_em = agora
+            return self._estado
+
+    def invalidar(self):
+        with self._lock:
+            self._conferido_em = None
+
+
+def init_filiais(app):
+    cache = CacheFiliais(intervalo=app.config.get('FILIAIS_CACHE_INTERVALO', 5))
+    app.extensions['filiais'] = cache
+    return cache
+
+
+def get_cache_filiais():
+    return current_app.extensions['filiais']
+
+
+def registrar_alteracao_filiais():
+    """Chamado por quem cria/remove filiais, antes do commit."""
+    incrementar_versao(CHAVE_VERSAO)
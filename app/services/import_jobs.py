@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.models import db
+from app.services.importacao import IMPORTADORES, ler_linhas_csv, novo_resultado
+
+# Jobs finalizados ficam consultáveis por este tempo
+RETENCAO_JOBS = 3600  # segundos
+MAX_ERROS_RESPOSTA = 50
+
+
+class ImportJob:
+    """Estado de uma importação em segundo plano."""
+
+    def __init__(self, tipo, caminho, total_estimado, opcoes=None, dono=None):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.dono = dono  # identidade (JWT) de quem enviou o arquivo
+        self.opcoes = opcoes or {}  # modo/usuario repassados ao importador
+        self.caminho = caminho
+        self.total_estimado = total_estimado
+        self.status = 'pendente'
+        self.linhas_processadas = 0
+        self.resultado = novo_resultado()
+        self.mensagem = None
+        self.criado_em = datetime.now()
+        self.iniciado_em = None
+        self.finalizado_em = None
+        self._inicio = None
+        self._fim = None
+        self._cancelar = threading.Event()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    @property
+    def finalizado(self):
+        return self.status in ('concluido', 'erro', 'cancelado')
+
+    def cancelar(self):
+        self._cancelar.set()
+        if self.status == 'pendente':
+            self.status = 'cancelado'
+            self.finalizado_em = datetime.now()
+            self._fim = time.monotonic()
+
+    def contar(self, linhas):
+        """Repassa as linhas contando o progresso; para de ler ao ser cancelado."""
+        for item in linhas:
+            if self.cancelado:
+                return
+            self.linhas_processadas += 1
+            yield item
+
+    def to_dict(self):
+        decorrido = None
+        if self._inicio is not None:
+            decorrido = (self._fim or time.monotonic()) - self._inicio
+
+        linhas_por_segundo = None
+        eta = None
+        if decorrido:
+            linhas_por_segundo = round(self.linhas_processadas / decorrido, 1)
+            restantes = max(self.total_estimado - self.linhas_processadas, 0)
+            if not self.finalizado and linhas_por_segundo:
+                eta = round(restantes / linhas_por_segundo, 1)
+
+        erros = self.resultado['erros']
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'modo': self.opcoes.get('modo'),
+            'status': self.status,
+            'linhas_processadas': self.linhas_processadas,
+            'total_estimado': self.total_estimado,
+            'sucessos': self.resultado['sucessos'],
+            'atualizados': self.resultado['atualizados'],
+            'total_erros': len(erros),
+            'erros': erros[:MAX_ERROS_RESPOSTA],
+            'linhas_por_segundo': linhas_por_segundo,
+            'eta_segundos': eta,
+            'msg': self.mensagem,
+            'criado_em': self.criado_em.isoformat(),
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None
+        }
+
+
+class GerenciadorImportacao:
+    """
+    Fila de importações executada por um pool de threads (sem broker externo).
+
+    Os jobs vivem só na memória deste processo: com vários processos, o
+    GET/cancelar de um job só funciona no processo que o recebeu, e um
+    reinício perde os jobs em andamento. Rode a API com um único processo
+    (threads à vontade) ou com afinidade de sessão para /api/import.
+    """
+
+    def __init__(self, app, max_workers=2):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='importacao')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, tipo, caminho, dono=None, **opcoes):
+        job = ImportJob(tipo, caminho, _contar_linhas(caminho), opcoes, dono=dono)
+        with self._lock:
+            self._limpar_antigos()
+            self._jobs[job.id] = job
+        self._executor.submit(self._executar, job)
+        return job
+
+    def obter(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _executar(self, job):
+        try:
+            if job.cancelado:
+                return
+            job.status = 'processando'
+            job.iniciado_em = datetime.now()
+            job._inicio = time.monotonic()
+
+            with self.app.app_context():
+                try:
+                    resultado = IMPORTADORES[job.tipo](
+                        job.contar(ler_linhas_csv(job.caminho)), job.resultado, **job.opcoes
+                    )
+                    job.mensagem = resultado.get('msg')
+                    job.status = 'cancelado' if job.cancelado else 'concluido'
+                except Exception as e:
+                    db.session.rollback()
+                    job.mensagem = f"Erro na importação: {str(e)}"
+                    job.status = 'erro'
+                finally:
+                    db.session.remove()
+        finally:
+            if job.finalizado_em is None:
+                job.finalizado_em = datetime.now()
+                job._fim = time.monotonic()
+            _remover_arquivo(job.caminho)
+
+    def _limpar_antigos(self):
+        limite = datetime.now().timestamp() - RETENCAO_JOBS
+        antigos = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finalizado_em and job.finalizado_em.timestamp() < limite
+        ]
+        for job_id in antigos:
+            del self._jobs[job_id]
+
+
+def _contar_linhas(caminho):
+    """Estimativa de linhas de dados (sem o cabeçalho) para o cálculo do ETA."""
+    with open(caminho, 'rb') as arquivo:
+        total = sum(bloco.count(b'\n') for bloco in iter(lambda: arquivo.read(1024 * 1024), b''))
+    return max(total - 1, 0)
+
+
+def _remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def init_importacao(app):
+    app.extensions['importacao'] = GerenciadorImportacao(
+        app, max_workers=app.config.get('IMPORTACAO_WORKERS', 2)
+    )
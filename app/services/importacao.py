@@ -0,0 +1,805 @@
+import codecs
+import csv
+import io
+import itertools
+import json
+import os
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import joinedload
+from app.models import db, Asset, Celular, Software, Email
+from app.services.audit import registrar_historico_em_lote
+from app.services.cache_respostas import invalidar_respostas
+
+TAMANHO_LOTE = 500
+TAMANHO_BLOCO = 64 * 1024  # bytes lidos do arquivo por vez
+SEPARADORES = (';', ',', '\t')
+
+# Modos de importação (?mode=)
+MODO_INSERT = 'insert'          # só cria; existentes viram erro (padrão)
+MODO_UPSERT = 'upsert'          # cria ou atualiza
+MODO_UPDATE = 'update-only'     # só atualiza; inexistentes viram erro
+MODOS = (MODO_INSERT, MODO_UPSERT, MODO_UPDATE)
+
+# Colunas de Asset preenchidas pela importação (mesma ordem no COPY e no INSERT ... SELECT)
+COLUNAS_ASSET = [
+    'patrimonio', 'tipo', 'modelo', 'filial', 'responsavel', 'status',
+    'observacoes', 'anydesk', 'especificacoes', 'criado_em', 'atualizado_em'
+]
+
+# Campo do CSV -> tipo gravado no Email
+CAMPOS_EMAIL = ['softphone', 'zimbra', 'conta_google', 'email_secundario', 'conta_google_2']
+
+
+def normalizar_chave_asset(chave):
+    """Normaliza o cabeçalho: minúsculo, sem espaços/acentos e sem numeração inicial."""
+    return (chave.strip().lower().replace('ç', 'c').replace('ã', 'a').replace('õ', 'o')
+            .replace('.', '').replace(' ', '_').lstrip('0123456789_'))
+
+
+def mapear_linha_asset(row, agora=None):
+    """
+    Converte uma linha do CSV de patrimônios em {'asset', 'informado',
+    'softwares', 'emails'}. `asset` traz os valores padrão para criação;
+    `informado` só o que veio preenchido no CSV (usado para atualizar).
+    Retorna None para linhas vazias ou sem PAT.
+    """
+    if not row or all(not v for v in row.values()):
+        return None
+
+    row_norm = {}
+    for k, v in row.items():
+        if not k:
+            continue
+        row_norm[normalizar_chave_asset(k)] = v.strip() if isinstance(v, str) else ''
+
+    patrimonio = row_norm.get('pat', '')
+    if not patrimonio:
+        return None
+
+    agora = agora or datetime.now()
+    tipo = row_norm.get('tipo', '')
+
+    informado = {
+        'tipo': ('Notebook' if tipo.lower() in ['notebook', 'note'] else 'Desktop') if tipo else '',
+        'modelo': row_norm.get('modelo', ''),
+        'filial': row_norm.get('centro_de_custo_filial', '') or row_norm.get('filial', ''),
+        'responsavel': row_norm.get('em_uso', '') or row_norm.get('responsavel', ''),
+        'observacoes': row_norm.get('observacao', ''),
+        'anydesk': row_norm.get('anydesk', ''),
+    }
+    informado = {chave: valor for chave, valor in informado.items() if valor}
+
+    especificacoes = {
+        'hostname': row_norm.get('hostname', ''),
+        'gix_remoto': row_norm.get('gix_remoto_10_1_1_134_135', '') or row_norm.get('gix_remoto', ''),
+        'duapi': row_norm.get('duapi_10_1_1_122', '') or row_norm.get('duapi', ''),
+        'dominio': row_norm.get('dominio_10_1_1_129', '') or row_norm.get('dominio', ''),
+        'vpn': row_norm.get('vpn', ''),
+        'senha_bios': row_norm.get('senha_bios', ''),
+        'senha_windows': row_norm.get('senha_windows', ''),
+        'senha_vpn': row_norm.get('senha_vpn', ''),
+        'bitlocker': row_norm.get('bitlocker', ''),
+        'softphone': row_norm.get('softphone', ''),
+        'zimbra': row_norm.get('zimbra', ''),
+        'conta_google': row_norm.get('conta_google', ''),
+        'email_secundario': row_norm.get('email_secundario', ''),
+        'conta_google_2': row_norm.get('conta_google_2', '')
+    }
+    informado['especificacoes'] = {chave: valor for chave, valor in especificacoes.items() if valor}
+
+    asset = {
+        'patrimonio': patrimonio,
+        'tipo': informado.get('tipo', 'Desktop'),
+        'modelo': informado.get('modelo', 'Não informado'),
+        'filial': informado.get('filial', 'Não informada'),
+        'responsavel': informado.get('responsavel', 'Não atribuído'),
+        'status': 'Ativo',
+        'observacoes': informado.get('observacoes', 'Importado via CSV'),
+        'anydesk': informado.get('anydesk', ''),
+        'especificacoes': especificacoes,
+        'criado_em': agora,
+        'atualizado_em': agora
+    }
+
+    softwares = []
+    for i in range(1, 4):
+        pat_software = row_norm.get(f'pat_software_{i}', '')
+        nome_software = row_norm.get(f'software_{i}', '')
+        if pat_software and nome_software:
+            softwares.append({
+                'nome': nome_software,
+                'observacoes': f"PAT {pat_software}",
+                'ativo': True,
+                'criado_em': agora,
+                'atualizado_em': agora
+            })
+
+    emails = []
+    for tipo_email in CAMPOS_EMAIL:
+        valor = row_norm.get(tipo_email, '')
+        if valor and '@' in valor:
+            emails.append({
+                'endereco': valor,
+                'tipo': tipo_email,
+                'ativo': True,
+                'criado_em': agora,
+                'atualizado_em': agora
+            })
+
+    return {'asset': asset, 'informado': informado, 'softwares': softwares, 'emails': emails}
+
+
+def em_lotes(iteravel, tamanho):
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def ler_linhas_csv(fonte, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera (numero_da_linha, dict) a partir de um caminho ou de um stream binário
+    (ex.: o stream do upload do werkzeug), decodificando bloco a bloco: a
+    memória fica constante qualquer que seja o tamanho do arquivo.
+
+    O separador e a codificação são detectados no primeiro bloco; o BOM do
+    UTF-8 é descartado. Chaves e valores chegam sem espaços nas pontas.
+    """
+    if isinstance(fonte, (str, os.PathLike)):
+        with open(fonte, 'rb') as arquivo:
+            yield from ler_linhas_csv(arquivo, tamanho_bloco)
+        return
+
+    primeiro = fonte.read(tamanho_bloco)
+    if not primeiro:
+        return
+
+    encoding = _detectar_encoding(primeiro)
+    linhas = _linhas_texto(primeiro, fonte, encoding, tamanho_bloco)
+    cabecalho = next(linhas, '')
+    reader = csv.reader(itertools.chain([cabecalho], linhas), delimiter=_detectar_separador(cabecalho))
+
+    # Cabeçalho normalizado uma vez só, não a cada linha
+    chaves = [chave.strip() for chave in next(reader, [])]
+    for row in reader:
+        if not row:
+            continue
+        # line_num conta linhas físicas (campos entre aspas podem ter quebra de linha)
+        yield reader.line_num, {chave: valor.strip() for chave, valor in zip(chaves, row) if chave}
+
+
+def _detectar_encoding(bloco):
+    """UTF-8 (com ou sem BOM) quando o bloco decodifica; senão Windows-1252, comum nas exportações do ERP."""
+    try:
+        # Decoder incremental: uma sequência cortada no fim do bloco não conta como erro
+        codecs.getincrementaldecoder('utf-8')().decode(bloco)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def _detectar_separador(cabecalho):
+    """O separador mais frequente no cabeçalho; empate ou nenhum: vírgula."""
+    contagem = {separador: cabecalho.count(separador) for separador in SEPARADORES}
+    melhor = max(contagem, key=contagem.get)
+    return melhor if contagem[melhor] > contagem[','] else ','
+
+
+def _linhas_texto(primeiro, fonte, encoding, tamanho_bloco):
+    """Decodifica o stream aos poucos e entrega linha a linha (com o '\\n')."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+    resto = ''
+    bloco = primeiro
+    while bloco:
+        partes = (resto + decoder.decode(bloco)).split('\n')
+        resto = partes.pop()
+        for parte in partes:
+            yield parte + '\n'
+        bloco = fonte.read(tamanho_bloco)
+    resto += decoder.decode(b'', final=True)
+    if resto:
+        yield resto
+
+
+def novo_resultado():
+    return {'sucessos': 0, 'atualizados': 0, 'erros': []}
+
+
+def importar_assets(linhas, resultado=None, modo=MODO_INSERT, usuario="Sistema", tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa ativos (e softwares/emails vinculados) em lotes.
+
+    `linhas` é um iterável de (numero_da_linha, dict_do_csv). Cada lote faz uma
+    única consulta de existência, grava os ativos por COPY + INSERT ... ON
+    CONFLICT (PostgreSQL) ou executemany, registra a auditoria em lote e
+    confirma numa transação só.
+    """
+    resultado = resultado if resultado is not None else novo_resultado()
+    vistos = set()
+
+    def mapeadas():
+        for numero, row in linhas:
+            item = mapear_linha_asset(row)
+            if item:
+                yield numero, item
+
+    for lote in em_lotes(mapeadas(), tamanho_lote):
+        _importar_lote_assets(lote, vistos, resultado, modo, usuario)
+
+    resultado['msg'] = f"Importação concluída! {resultado['sucessos']} ativos criados."
+    if resultado['atualizados']:
+        resultado['msg'] += f" {resultado['atualizados']} atualizados."
+    return resultado
+
+
+def _importar_lote_assets(lote, vistos, resultado, modo, usuario):
+    erros = resultado['erros']
+    # Cada lote com o instante da própria gravação: o /api/sync e o GET
+    # condicional precisam ver os lotes gravados depois de uma leitura
+    agora = datetime.now()
+    for _, item in lote:
+        for registro in [item['asset'], *item['softwares'], *item['emails']]:
+            registro['criado_em'] = registro['atualizado_em'] = agora
+    patrimonios = {item['asset']['patrimonio'] for _, item in lote}
+    existentes = {
+        asset.patrimonio: asset
+        for asset in Asset.query.filter(Asset.patrimonio.in_(patrimonios))
+    }
+
+    novos = []
+    atualizar = []
+    for numero, item in lote:
+        patrimonio = item['asset']['patrimonio']
+        if patrimonio in vistos:
+            erros.append(f"Linha {numero}: Ativo {patrimonio} repetido no arquivo")
+            continue
+        vistos.add(patrimonio)
+        if patrimonio in existentes:
+            if modo == MODO_INSERT:
+                erros.append(f"Linha {numero}: Ativo {patrimonio} já existe")
+                continue
+            atualizar.append((numero, item, existentes[patrimonio]))
+        elif modo == MODO_UPDATE:
+            erros.append(f"Linha {numero}: Ativo {patrimonio} não existe")
+        else:
+            novos.append((numero, item))
+
+    if not novos and not atualizar:
+        return
+
+    numeros = [numero for numero, *_ in novos + atualizar]
+    try:
+        antes = {asset.id: asset.to_dict() for _, _, asset in atualizar}
+        registros_novos = [item['asset'] for _, item in novos]
+        registros_atualizar = [_mesclar_asset(asset, item) for _, item, asset in atualizar]
+
+        ids = _gravar_assets(registros_novos, registros_atualizar, modo)
+
+        softwares, emails = _filhos_assets(novos + [(n, i) for n, i, _ in atualizar], ids, erros)
+        if softwares:
+            db.session.execute(insert(Software), softwares)
+        if emails:
+            db.session.execute(insert(Email), emails)
+        # Filhos novos de ativos que já existiam não passam pela auditoria do ativo
+        for entidade, filhos in (('Software', softwares), ('Email', emails)):
+            for filho in filhos:
+                invalidar_respostas(entidade, None, {'asset_id': str(filho['asset_id'])})
+
+        # Diferenças campo a campo para a auditoria, numa única leitura
+        depois = Asset.query.filter(Asset.id.in_(ids.values())).execution_options(populate_existing=True).all()
+        registrar_historico_em_lote(
+            ((asset.id, antes.get(asset.id), asset.to_dict()) for asset in depois),
+            usuario=usuario, entidade="Asset"
+        )
+
+        db.session.commit()
+        resultado['sucessos'] += sum(1 for pat in ids if pat not in existentes)
+        resultado['atualizados'] += sum(1 for pat in ids if pat in existentes)
+    except Exception as e:
+        db.session.rollback()
+        erros.append(f"Linhas {min(numeros)} a {max(numeros)}: Erro ao gravar lote - {str(e)}")
+
+
+def _mesclar_asset(asset, item):
+    """Valores finais de um ativo existente: o que veio preenchido sobrescreve, o resto é mantido."""
+    registro = {coluna: getattr(asset, coluna) for coluna in COLUNAS_ASSET}
+    registro.update({chave: valor for chave, valor in item['informado'].items() if chave != 'especificacoes'})
+    registro['id'] = asset.id
+    registro['especificacoes'] = {**(asset.especificacoes or {}), **item['informado']['especificacoes']}
+    registro['atualizado_em'] = item['asset']['atualizado_em']
+    return registro
+
+
+def _filhos_assets(itens, ids, erros):
+    """Softwares e emails a criar para os ativos gravados, sem duplicar os existentes."""
+    enderecos = {email['endereco'] for _, item in itens for email in item['emails']}
+    emails_existentes = set(db.session.scalars(
+        select(Email.endereco).where(Email.endereco.in_(enderecos))
+    )) if enderecos else set()
+
+    softwares_existentes = set(db.session.execute(
+        select(Software.asset_id, Software.nome).where(Software.asset_id.in_(ids.values()))
+    ).all()) if any(item['softwares'] for _, item in itens) else set()
+
+    softwares = []
+    emails = []
+    for numero, item in itens:
+        patrimonio = item['asset']['patrimonio']
+        asset_id = ids.get(patrimonio)
+        if asset_id is None:
+            # Inserido/removido por outra requisição entre a checagem e a escrita
+            erros.append(f"Linha {numero}: Ativo {patrimonio} não pôde ser gravado (alterado concorrentemente)")
+            continue
+        for software in item['softwares']:
+            if (asset_id, software['nome']) not in softwares_existentes:
+                softwares_existentes.add((asset_id, software['nome']))
+                softwares.append({**software, 'asset_id': asset_id})
+        for email in item['emails']:
+            if email['endereco'] in emails_existentes:
+                erros.append(f"Linha {numero}: Email {email['endereco']} já existe")
+                continue
+            emails_existentes.add(email['endereco'])
+            emails.append({**email, 'asset_id': asset_id})
+    return softwares, emails
+
+
+def _gravar_assets(novos, atualizar, modo):
+    """Grava o lote e retorna {patrimonio: id} dos ativos efetivamente criados/atualizados."""
+    conn = db.session.connection()
+    if conn.dialect.name == 'postgresql' and conn.dialect.driver == 'psycopg2':
+        return _copiar_assets(conn, novos + atualizar, modo)
+
+    ids = {}
+    if novos:
+        linhas = db.session.execute(
+            insert(Asset).returning(Asset.id, Asset.patrimonio), novos
+        ).all()
+        ids.update({patrimonio: asset_id for asset_id, patrimonio in linhas})
+    if atualizar:
+        db.session.execute(update(Asset), [
+            {chave: valor for chave, valor in registro.items() if chave != 'criado_em'}
+            for registro in atualizar
+        ])
+        ids.update({registro['patrimonio']: registro['id'] for registro in atualizar})
+    return ids
+
+
+def _copiar_assets(conn, registros, modo):
+    """COPY para uma tabela temporária + INSERT ... SELECT / UPDATE ... FROM na mesma transação."""
+    colunas = ', '.join(COLUNAS_ASSET)
+    buffer = io.StringIO()
+    for registro in registros:
+        buffer.write(','.join(_valor_csv(registro.get(coluna)) for coluna in COLUNAS_ASSET))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE tmp_import_assets ON COMMIT DROP AS "
+        f"SELECT {colunas} FROM assets WITH NO DATA"
+    )
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY tmp_import_assets ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    atualizaveis = [coluna for coluna in COLUNAS_ASSET if coluna not in ('patrimonio', 'criado_em', 'especificacoes')]
+    # especificacoes é mesclada (chaves novas sobrescrevem, as demais ficam)
+    mescla = "COALESCE({alvo}.especificacoes, '{{}}'::jsonb) || {origem}.especificacoes"
+
+    if modo == MODO_UPDATE:
+        sets = ', '.join(f"{coluna} = t.{coluna}" for coluna in atualizaveis)
+        sql = (
+            f"UPDATE assets a SET {sets}, especificacoes = {mescla.format(alvo='a', origem='t')} "
+            f"FROM tmp_import_assets t WHERE a.patrimonio = t.patrimonio RETURNING a.id, a.patrimonio"
+        )
+    elif modo == MODO_UPSERT:
+        sets = ', '.join(f"{coluna} = EXCLUDED.{coluna}" for coluna in atualizaveis)
+        sql = (
+            f"INSERT INTO assets ({colunas}) SELECT {colunas} FROM tmp_import_assets "
+            f"ON CONFLICT (patrimonio) DO UPDATE SET {sets}, "
+            f"especificacoes = {mescla.format(alvo='assets', origem='EXCLUDED')} "
+            f"RETURNING id, patrimonio"
+        )
+    else:
+        sql = (
+            f"INSERT INTO assets ({colunas}) SELECT {colunas} FROM tmp_import_assets "
+            f"ON CONFLICT (patrimonio) DO NOTHING RETURNING id, patrimonio"
+        )
+
+    linhas = conn.exec_driver_sql(sql).all()
+    return {patrimonio: asset_id for asset_id, patrimonio in linhas}
+
+
+def _valor_csv(valor):
+    # Sem aspas = NULL no COPY csv; todo o resto vai entre aspas
+    if valor is None:
+        return ''
+    if isinstance(valor, dict):
+        valor = json.dumps(valor, ensure_ascii=False)
+    elif isinstance(valor, datetime):
+        valor = valor.isoformat()
+    else:
+        valor = str(valor)
+    return '"' + valor.replace('"', '""') + '"'
+
+
+def parse_date(date_str):
+    if not date_str: return None
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%Y/%m/%d'):
+        try: return datetime.strptime(date_str, fmt)
+        except ValueError: continue
+    return None
+
+
+def is_valid_email(text):
+    return text and '@' in text and '.' in text
+
+
+def importar_celulares(linhas, resultado=None, modo=MODO_INSERT, usuario="Sistema", tamanho_lote=TAMANHO_LOTE):
+    """Importa celulares: PAT, Filial, Em uso, AnyDesk, Senha, Cel. Princ., Cel. Sec., Conta Google, Sub Tipo, Marca, Modelo, Propriedade, Serial 1, IMEI 1, IMEI 2"""
+    resultado = resultado if resultado is not None else novo_resultado()
+    erros = resultado['erros']
+    vistos = set()
+
+    def mapeadas():
+        for linha, row in linhas:
+            # Normaliza chaves (remove espaços, pontos e põe minúsculo)
+            row = {k.strip().lower().replace('º', 'o').replace('.', '').replace(' ', '_'): (v or '').strip() for k, v in row.items() if k}
+
+            # Campo obrigatório: PAT
+            patrimonio = row.get('pat') or row.get('patrimonio')
+            if not patrimonio:
+                erros.append(f"Linha {linha}: Patrimônio vazio")
+                continue
+            if patrimonio in vistos:
+                erros.append(f"Linha {linha}: Celular {patrimonio} repetido no arquivo")
+                continue
+            vistos.add(patrimonio)
+
+            em_uso = row.get('em_uso', '')
+            informado = {
+                'filial': row.get('filial', ''),
+                'modelo': row.get('modelo', ''),
+                'imei': row.get('imei_1', '') or row.get('imei', ''),
+                'numero': row.get('cel_princ', '') or row.get('numero_principal', ''),
+                'responsavel': em_uso,
+                'status': "Em Uso" if em_uso else row.get('status', ''),
+            }
+            yield linha, patrimonio, {chave: valor for chave, valor in informado.items() if valor}
+
+    for lote in em_lotes(mapeadas(), tamanho_lote):
+        _importar_lote_celulares(lote, resultado, modo, usuario)
+
+    resultado['msg'] = f"Processado! {resultado['sucessos']} celulares criados."
+    if resultado['atualizados']:
+        resultado['msg'] += f" {resultado['atualizados']} atualizados."
+    return resultado
+
+
+def _importar_lote_celulares(lote, resultado, modo, usuario):
+    erros = resultado['erros']
+    existentes = {
+        celular.patrimonio: celular
+        for celular in Celular.query.filter(Celular.patrimonio.in_([pat for _, pat, _ in lote]))
+    }
+    agora = datetime.now()
+
+    registros = []
+    antes = {}
+    for linha, patrimonio, informado in lote:
+        celular = existentes.get(patrimonio)
+        if celular is None:
+            if modo == MODO_UPDATE:
+                erros.append(f"Linha {linha}: Celular {patrimonio} não existe")
+                continue
+            registros.append({
+                'patrimonio': patrimonio,
+                'filial': informado.get('filial', ''),
+                'modelo': informado.get('modelo', ''),
+                'imei': informado.get('imei') or None,  # vazio repetido violaria o UNIQUE
+                'numero': informado.get('numero', ''),
+                'responsavel': informado.get('responsavel', ''),
+                'status': informado.get('status', 'Reserva'),
+                'observacoes': "Importado via CSV",
+                'criado_em': agora,
+                'atualizado_em': agora
+            })
+        elif modo == MODO_INSERT:
+            erros.append(f"Linha {linha}: Celular {patrimonio} já existe")
+        else:
+            antes[celular.id] = celular.to_dict()
+            registros.append({
+                **{coluna: getattr(celular, coluna) for coluna in ('patrimonio', 'filial', 'modelo', 'imei', 'numero', 'responsavel', 'status', 'observacoes', 'criado_em')},
+                **informado,
+                'atualizado_em': agora
+            })
+
+    if not registros:
+        return
+
+    linhas = [linha for linha, _, _ in lote]
+    try:
+        stmt = postgresql.insert(Celular)
+        if modo == MODO_INSERT:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['patrimonio'])
+        else:
+            # Os valores já vêm mesclados com o registro atual; EXCLUDED é o estado final
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['patrimonio'],
+                set_={coluna: stmt.excluded[coluna] for coluna in registros[0] if coluna not in ('patrimonio', 'criado_em')}
+            )
+        ids = dict(db.session.execute(stmt.returning(Celular.patrimonio, Celular.id), registros).all())
+
+        depois = Celular.query.filter(Celular.id.in_(ids.values())).execution_options(populate_existing=True).all()
+        registrar_historico_em_lote(
+            ((celular.id, antes.get(celular.id), celular.to_dict()) for celular in depois),
+            usuario=usuario, entidade="Celular"
+        )
+
+        db.session.commit()
+        resultado['sucessos'] += sum(1 for pat in ids if pat not in existentes)
+        resultado['atualizados'] += sum(1 for pat in ids if pat in existentes)
+    except Exception as e:
+        db.session.rollback()
+        erros.append(f"Linhas {min(linhas)} a {max(linhas)}: Erro ao gravar lote - {str(e)}")
+
+
+def importar_emails(linhas, resultado=None, usuario="Sistema", tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa contas Google/Zimbra/Microsoft vinculadas por pat_pc ou pat_cel,
+    em lotes como os demais importadores. O endereço é único: repetidos no
+    arquivo ou já cadastrados viram erro da linha.
+    """
+    resultado = resultado if resultado is not None else novo_resultado()
+    erros = resultado['erros']
+    vistos = set()
+
+    # Definição das colunas
+    tipos = [
+        ('google', 'conta google', 'senha google'),
+        ('zimbra', 'conta zimbra', 'senha zimbra'),
+        ('microsoft', 'conta microsoft', 'senha microsoft')
+    ]
+
+    def mapeadas():
+        for linha, row in linhas:
+            # Normaliza chaves (remove espaços e põe minusculo)
+            row_norm = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+
+            # Tenta pegar PATs
+            pat_pc = row_norm.get('pat_pc')
+            pat_cel = row_norm.get('pat_cel')
+
+            # Se não tiver PAT nenhum, pula (regra de negócio)
+            if not pat_pc and not pat_cel:
+                erros.append(f"Linha {linha}: Sem vínculo (PAT PC ou Celular vazios). Ignorado.")
+                continue
+
+            # Pega endereço base (caso usem Sim/Não)
+            email_base_col = row_norm.get('endereço') or row_norm.get('endereco')
+
+            for tipo_db, col_conta, col_senha in tipos:
+                valor_conta = row_norm.get(col_conta, '')
+
+                # CENÁRIO 1: O usuário colocou o e-mail direto na coluna da conta (Ex: joao@gmail.com)
+                if is_valid_email(valor_conta):
+                    email_final = valor_conta
+                # CENÁRIO 2: Usuário colocou "Sim" e o e-mail está na primeira coluna
+                elif valor_conta.lower() in ['sim', 's', '1', 'true', 'ativo'] and is_valid_email(email_base_col):
+                    email_final = email_base_col
+                else:
+                    continue
+
+                if email_final in vistos:
+                    erros.append(f"Linha {linha}: {email_final} repetido no arquivo")
+                    continue
+                vistos.add(email_final)
+                yield linha, pat_pc, pat_cel, {
+                    'endereco': email_final,
+                    'tipo': tipo_db,
+                    'usuario': email_final.split('@')[0],
+                    'senha': row_norm.get(col_senha, ''),  # Salva a senha específica dessa conta
+                }
+
+    for lote in em_lotes(mapeadas(), tamanho_lote):
+        _importar_lote_emails(lote, resultado, usuario)
+
+    resultado['msg'] = f"Sucesso! {resultado['sucessos']} contas importadas."
+    return resultado
+
+
+def _importar_lote_emails(lote, resultado, usuario):
+    erros = resultado['erros']
+    pcs = dict(db.session.execute(
+        select(Asset.patrimonio, Asset.id).where(Asset.patrimonio.in_({pat for _, pat, _, _ in lote if pat}))
+    ).all())
+    celulares = set(db.session.scalars(
+        select(Celular.patrimonio).where(Celular.patrimonio.in_({pat for _, _, pat, _ in lote if pat}))
+    ))
+    existentes = set(db.session.scalars(
+        select(Email.endereco).where(Email.endereco.in_([conta['endereco'] for *_, conta in lote]))
+    ))
+    agora = datetime.now()
+
+    registros = {}
+    for linha, pat_pc, pat_cel, conta in lote:
+        asset_id = pcs.get(pat_pc) if pat_pc else None
+        observacoes = None
+        if asset_id is None:
+            if not pat_cel:
+                erros.append(f"Linha {linha}: PC '{pat_pc}' não encontrado no sistema.")
+                continue
+            if pat_cel not in celulares:
+                erros.append(f"Linha {linha}: Celular '{pat_cel}' não encontrado.")
+                continue
+            # emails.asset_id aponta para assets: a conta do celular entra sem vínculo
+            observacoes = f"Celular {pat_cel}"
+        if conta['endereco'] in existentes:
+            erros.append(f"Linha {linha}: {conta['endereco']} ({conta['tipo']}) já existe.")
+            continue
+        registros[conta['endereco']] = (linha, {
+            **conta,
+            'asset_id': asset_id,
+            'recuperacao': "",
+            'observacoes': observacoes,
+            'ativo': True,
+            'criado_em': agora,
+            'atualizado_em': agora
+        })
+
+    if not registros:
+        return
+
+    linhas = [linha for linha, *_ in lote]
+    try:
+        # Cadastro concorrente entre a consulta e o INSERT: ON CONFLICT (endereco) ignora
+        stmt = postgresql.insert(Email).on_conflict_do_nothing(index_elements=['endereco'])
+        ids = dict(db.session.execute(
+            stmt.returning(Email.endereco, Email.id), [registro for _, registro in registros.values()]
+        ).all())
+
+        novos = (Email.query.options(joinedload(Email.asset))
+                 .filter(Email.id.in_(ids.values())).execution_options(populate_existing=True).all())
+        registrar_historico_em_lote(
+            ((email.id, None, email.to_dict(include_password=True)) for email in novos),
+            usuario=usuario, entidade="Email"
+        )
+
+        db.session.commit()
+        resultado['sucessos'] += len(ids)
+        for endereco, (linha, registro) in registros.items():
+            if endereco not in ids:
+                erros.append(f"Linha {linha}: {endereco} ({registro['tipo']}) já existe.")
+    except Exception as e:
+        db.session.rollback()
+        erros.append(f"Linhas {min(linhas)} a {max(linhas)}: Erro ao gravar lote - {str(e)}")
+
+
+def importar_softwares(linhas, resultado=None, modo=MODO_INSERT, usuario="Sistema", tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa softwares/licenças vinculados a um computador pelo PAT.
+    Um software é identificado pelo par (computador, nome).
+    """
+    resultado = resultado if resultado is not None else novo_resultado()
+    erros = resultado['erros']
+
+    def mapeadas():
+        for linha, row in linhas:
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+
+            nome = row.get('nome')
+            pat_pc = row.get('pat_computador') or row.get('pat_pc') # Aceita os dois nomes
+
+            if not nome or not pat_pc:
+                erros.append(f"Linha {linha}: Nome ou PAT vazio")
+                continue
+
+            informado = {
+                'versao': row.get('versao', ''),
+                'tipo_licenca': row.get('tipo_licenca', ''),
+                'chave_licenca': row.get('chave_licenca', ''),
+                'dt_instalacao': parse_date(row.get('dt_instalacao')),
+                'dt_vencimento': parse_date(row.get('dt_vencimento')),
+                'custo_anual': float(row['custo_anual']) if row.get('custo_anual') else None,
+            }
+            yield linha, pat_pc, nome, {chave: valor for chave, valor in informado.items() if valor}
+
+    for lote in em_lotes(mapeadas(), tamanho_lote):
+        _importar_lote_softwares(lote, resultado, modo, usuario)
+
+    resultado['msg'] = f"Importado: {resultado['sucessos']} softwares."
+    if resultado['atualizados']:
+        resultado['msg'] += f" {resultado['atualizados']} atualizados."
+    return resultado
+
+
+def _importar_lote_softwares(lote, resultado, modo, usuario):
+    erros = resultado['erros']
+    pcs = dict(db.session.execute(
+        select(Asset.patrimonio, Asset.id).where(Asset.patrimonio.in_({pat for _, pat, _, _ in lote}))
+    ).all())
+    # Não há UNIQUE (asset_id, nome) para um ON CONFLICT: a chave é resolvida por consulta
+    existentes = {
+        (software.asset_id, software.nome): software
+        for software in Software.query.options(joinedload(Software.asset))
+            .filter(Software.asset_id.in_(pcs.values()))
+    }
+    agora = datetime.now()
+
+    novos = []
+    atualizar = []
+    antes = {}
+    vistos = set()
+    for linha, pat_pc, nome, informado in lote:
+        asset_id = pcs.get(pat_pc)
+        if asset_id is None:
+            erros.append(f"Linha {linha}: PC {pat_pc} não existe")
+            continue
+        software = existentes.get((asset_id, nome))
+        if modo != MODO_INSERT and (asset_id, nome) in vistos:
+            erros.append(f"Linha {linha}: Software {nome} repetido no arquivo para o PC {pat_pc}")
+            continue
+        vistos.add((asset_id, nome))
+
+        if software is None and modo == MODO_UPDATE:
+            erros.append(f"Linha {linha}: Software {nome} não existe no PC {pat_pc}")
+        elif software is None or modo == MODO_INSERT:
+            # No modo insert a importação continua sem checar duplicidade, como antes
+            novos.append({
+                'nome': nome,
+                'asset_id': asset_id,
+                'versao': informado.get('versao', ''),
+                'tipo_licenca': informado.get('tipo_licenca', 'Individual'),
+                'chave_licenca': informado.get('chave_licenca', ''),
+                'dt_instalacao': informado.get('dt_instalacao'),
+                'dt_vencimento': informado.get('dt_vencimento'),
+                'custo_anual': informado.get('custo_anual', 0),
+                'ativo': True,
+                'criado_em': agora,
+                'atualizado_em': agora
+            })
+        else:
+            antes[software.id] = software.to_dict()
+            atualizar.append({'id': software.id, **informado, 'atualizado_em': agora})
+
+    if not novos and not atualizar:
+        return
+
+    linhas = [linha for linha, *_ in lote]
+    try:
+        ids = []
+        if novos:
+            ids += db.session.scalars(insert(Software).returning(Software.id), novos).all()
+        if atualizar:
+            # Bulk UPDATE por chave primária (executemany agrupado por conjunto de colunas)
+            db.session.execute(update(Software), atualizar)
+            ids += [registro['id'] for registro in atualizar]
+
+        depois = (Software.query.options(joinedload(Software.asset))
+                  .filter(Software.id.in_(ids)).execution_options(populate_existing=True).all())
+        registrar_historico_em_lote(
+            ((software.id, antes.get(software.id), software.to_dict()) for software in depois),
+            usuario=usuario, entidade="Software"
+        )
+
+        db.session.commit()
+        resultado['sucessos'] += len(novos)
+        resultado['atualizados'] += len(atualizar)
+    except Exception as e:
+        db.session.rollback()
+        erros.append(f"Linhas {min(linhas)} a {max(linhas)}: Erro ao gravar lote - {str(e)}")
+
+
+IMPORTADORES = {
+    'assets': importar_assets,
+    'celulares': importar_celulares,
+    'emails': importar_emails,
+    'softwares': importar_softwares,
+}
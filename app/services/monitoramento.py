@@ -0,0 +1,106 @@
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class ConsultasRepetidasError(RuntimeError):
+    """Requisição repetiu o mesmo SELECT parametrizado além do limite (provável N+1)."""
+
+
+def init_monitoramento(app):
+    """
+    Conta as consultas SQL de cada requisição e expõe o resultado nos
+    cabeçalhos `X-DB-Queries` e `Server-Timing`.
+
+    DB_N1_MODO controla o detector de N+1: 'off', 'warn' (loga) ou 'raise'
+    (lança ConsultasRepetidasError, útil nos testes) quando o mesmo SELECT
+    se repete mais de DB_N1_LIMITE vezes na mesma requisição. Em 'raise' a
+    exceção sai do before_cursor_execute: a consulta excedente não chega a
+    ser executada. Sem valor configurado vale 'warn' com debug e 'off' fora
+    dele.
+    """
+    if not app.config.get('DB_MONITORAMENTO', True):
+        return
+    _registrar_listeners()
+    app.before_request(_iniciar_contagem)
+    app.after_request(_anexar_cabecalhos)
+
+
+_listeners_registrados = False
+
+
+def _registrar_listeners():
+    global _listeners_registrados
+    if _listeners_registrados:
+        return
+    event.listen(Engine, 'before_cursor_execute', _antes_execucao)
+    event.listen(Engine, 'after_cursor_execute', _apos_execucao)
+    _listeners_registrados = True
+
+
+def _iniciar_contagem():
+    g.db_stats = {'consultas': 0, 'tempo': 0.0, 'formas': Counter(), 'repetidas': set()}
+
+
+def _modo_n1():
+    # Lido a cada uso: app.run(debug=True) liga o debug depois do create_app
+    return current_app.config.get('DB_N1_MODO') or ('warn' if current_app.debug else 'off')
+
+
+def _stats_atuais():
+    if not has_request_context():
+        return None
+    return g.get('db_stats')
+
+
+def _antes_execucao(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats_atuais()
+    if stats is None:
+        return
+    # No contexto da execução (receita de tempo do SQLAlchemy): se a consulta
+    # falhar, o início some com ele em vez de ficar na conexão do pool
+    context._monitoramento_inicio = time.perf_counter()
+
+    if statement.lstrip()[:6].upper() != 'SELECT':
+        return
+    # O texto já vem parametrizado, então serve como "forma" da consulta
+    stats['formas'][statement] += 1
+    limite = current_app.config.get('DB_N1_LIMITE', 10)
+    if stats['formas'][statement] > limite and statement not in stats['repetidas']:
+        stats['repetidas'].add(statement)
+        if _modo_n1() == 'raise':
+            raise ConsultasRepetidasError(
+                f"SELECT repetido mais de {limite} vezes: {' '.join(statement.split())[:200]}"
+            )
+
+
+def _apos_execucao(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats_atuais()
+    inicio = getattr(context, '_monitoramento_inicio', None)
+    if stats is None or inicio is None:
+        return
+    stats['tempo'] += time.perf_counter() - inicio
+    stats['consultas'] += 1
+
+
+def _anexar_cabecalhos(response):
+    stats = g.pop('db_stats', None)
+    if stats is None:
+        return response
+
+    duracao_ms = stats['tempo'] * 1000
+    response.headers['X-DB-Queries'] = str(stats['consultas'])
+    response.headers.add(
+        'Server-Timing', f'db;dur={duracao_ms:.1f};desc="{stats["consultas"]} queries"'
+    )
+
+    if stats['repetidas'] and _modo_n1() == 'warn':
+        for statement in stats['repetidas']:
+            current_app.logger.warning(
+                'Possível N+1 em %s: SELECT executado %d vezes: %s',
+                f"{request.method} {request.path}", stats['formas'][statement],
+                ' '.join(statement.split())[:200]
+            )
+    return response
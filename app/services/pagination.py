@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, false
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+
+
+class CursorInvalido(ValueError):
+    """Cursor recebido do cliente não pôde ser decodificado."""
+
+
+def codificar_cursor(valores):
+    """Gera um cursor opaco (base64 url-safe) a partir dos valores da chave."""
+    serializados = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    bruto = json.dumps(serializados, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, quantidade):
+    """Decodifica o cursor e valida a quantidade de valores esperada."""
+    try:
+        preenchido = cursor + '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(preenchido.encode('ascii')))
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise CursorInvalido('Cursor inválido')
+    return valores
+
+
+def ler_limite(valor, padrao=LIMITE_PADRAO, maximo=LIMITE_MAXIMO):
+    """Converte o parâmetro de tamanho de página respeitando o teto do servidor."""
+    try:
+        limite = int(valor) if valor not in (None, '') else padrao
+    except (TypeError, ValueError):
+        limite = padrao
+    return max(1, min(limite, maximo))
+
+
+def paginar_keyset(query, colunas, cursor=None, limite=LIMITE_PADRAO, descendente=False):
+    """
+    Aplica paginação por chave (keyset) sobre `query`.
+
+    `colunas` é a lista ordenada de colunas que formam a chave (a última deve
+    ser única, normalmente o id). Retorna (linhas, proximo_cursor); o custo de
+    cada página é proporcional ao tamanho da página, não ao da tabela.
+    """
+    if cursor:
+        valores = decodificar_cursor(cursor, len(colunas))
+        valores = [_converter_valor(coluna, valor) for coluna, valor in zip(colunas, valores)]
+        query = query.filter(_condicao_apos(colunas, valores, descendente))
+
+    ordem = [coluna.desc() if descendente else coluna.asc() for coluna in colunas]
+    linhas = query.order_by(*ordem).limit(limite + 1).all()
+
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]
+        proximo = codificar_cursor([getattr(ultima, coluna.key) for coluna in colunas])
+    return linhas, proximo
+
+
+def _condicao_apos(colunas, valores, descendente):
+    """Monta (a > x) OR (a = x AND b > y) ... para continuar após a última linha."""
+    condicoes = []
+    for i, coluna in enumerate(colunas):
+        iguais = [colunas[j] == valores[j] for j in range(i)]
+        # No PostgreSQL os nulos ficam no fim em ASC e no início em DESC
+        if valores[i] is None:
+            if not descendente:
+                continue
+            passo = coluna.isnot(None)
+        elif descendente:
+            passo = coluna < valores[i]
+        else:
+            passo = coluna > valores[i]
+            if coluna.nullable:
+                passo = or_(passo, coluna.is_(None))
+        condicoes.append(and_(*iguais, passo) if iguais else passo)
+    return or_(*condicoes) if condicoes else false()
+
+
+def _converter_valor(coluna, valor):
+    if valor is None:
+        return None
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        return valor
+    if tipo is datetime and isinstance(valor, str):
+        try:
+            return datetime.fromisoformat(valor)
+        except ValueError:
+            raise CursorInvalido('Cursor inválido')
+    return valor
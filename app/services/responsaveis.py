@@ -0,0 +1,259 @@
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from flask import current_app
+from sqlalchemy import event, func, select, text, union_all
+from app.models import db, Asset, Celular
+
+# Entidades cujo campo responsavel alimenta o índice
+ENTIDADES = ('Asset', 'Celular')
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos: "João" e "joao" caem na mesma chave."""
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class IndiceResponsaveis:
+    """
+    Responsáveis por filial em memória para o autocompletar.
+
+    Cada filial guarda quantos registros usam cada nome (o nome só sai quando
+    o último registro deixa de usá-lo) e uma lista ordenada de (chave, nome)
+    com uma entrada por palavra do nome, de modo que "sil" acha "João Silva"
+    por busca binária. A carga lê o banco uma vez; depois disso as gravações
+    de ativos e celulares são aplicadas no commit. Com vários processos, cada
+    um só vê as próprias gravações, então o índice é recarregado a cada
+    `recarga` segundos (0 desliga).
+
+    A recarga monta um índice novo fora do lock (as buscas seguem no atual) e
+    o troca de uma vez; os commits aplicados enquanto ela lê o banco ficam no
+    diário com o id da transação (xid) e, antes da troca, só são reaplicados
+    os que o retrato lido pela recarga ainda não via.
+    """
+
+    def __init__(self, recarga=0):
+        self.recarga = recarga
+        self._lock = threading.Lock()        # dados e diário
+        self._lock_carga = threading.Lock()  # uma recarga por vez
+        self._contagem = {}  # filial -> {nome: quantidade de registros}
+        self._chaves = {}    # filial -> [(chave, nome)] ordenada
+        self._ordem = {}     # nome -> nome normalizado, para ordenar o resultado
+        self._carregado_em = None
+        self._diario = None  # [(xid, alteracoes)] durante uma recarga
+
+    def buscar(self, filial=None, termo='', limite=20):
+        """
+        Até `limite` nomes (None = todos) em ordem alfabética cujo início, ou
+        o de uma das palavras, casa com `termo`. Sem filial busca em todas.
+        """
+        self._garantir_carga()
+        prefixo = normalizar(' '.join(termo.split()))
+        with self._lock:
+            normalizados = self._ordem
+            filiais = [filial] if filial else list(self._chaves)
+            nomes = set()
+            for f in filiais:
+                if not prefixo:
+                    nomes.update(self._contagem.get(f, ()))
+                    continue
+                chaves = self._chaves.get(f, [])
+                i = bisect.bisect_left(chaves, (prefixo,))
+                while i < len(chaves) and chaves[i][0].startswith(prefixo):
+                    nomes.add(chaves[i][1])
+                    i += 1
+        ordem = lambda nome: (normalizados[nome], nome)
+        if limite is None:
+            return sorted(nomes, key=ordem)
+        return heapq.nsmallest(limite, nomes, key=ordem)
+
+    def aplicar(self, alteracoes, xid=None):
+        """
+        Aplica [(filial, nome, +1/-1)] já confirmados no banco pela transação
+        `xid` (None quando desconhecida: conta como não vista pela recarga).
+        """
+        with self._lock:
+            if self._diario is not None:
+                self._diario.append((xid, alteracoes))
+            if self._carregado_em is None:
+                return  # a primeira busca carrega tudo do banco
+            for filial, nome, delta in alteracoes:
+                self._somar(filial, nome, delta)
+
+    def _precisa_carga(self):
+        with self._lock:
+            return self._carregado_em is None or (
+                self.recarga and time.monotonic() - self._carregado_em >= self.recarga)
+
+    def _garantir_carga(self):
+        if not self._precisa_carga():
+            return
+        # Só a primeira carga espera; durante uma recarga as outras buscas usam o índice atual
+        if not self._lock_carga.acquire(blocking=self._carregado_em is None):
+            return
+        try:
+            # Outra thread pode ter carregado enquanto esta esperava
+            if self._precisa_carga():
+                self._recarregar()
+        finally:
+            self._lock_carga.release()
+
+    def _recarregar(self):
+        with self._lock:
+            self._diario = []
+        try:
+            novo = IndiceResponsaveis()
+            retrato, linhas = _ler_responsaveis()
+            for filial, nome, quantidade in linhas:
+                novo._somar(filial, nome, quantidade)
+        except Exception:
+            with self._lock:
+                self._diario = None
+                if self._carregado_em is None:
+                    raise
+                # Mantém o índice atual e só tenta de novo na próxima janela
+                self._carregado_em = time.monotonic()
+            current_app.logger.exception('Falha ao recarregar o índice de responsáveis')
+            return
+
+        with self._lock:
+            # Um commit pode chegar ao banco antes do retrato e ao after_commit
+            # depois do início do diário: já está nas linhas lidas e não entra de novo
+            for xid, alteracoes in self._diario:
+                if xid is not None and _visivel(xid, retrato):
+                    continue
+                for filial, nome, delta in alteracoes:
+                    novo._somar(filial, nome, delta)
+            self._contagem, self._chaves, self._ordem = novo._contagem, novo._chaves, novo._ordem
+            self._diario = None
+            self._carregado_em = time.monotonic()
+
+    def _somar(self, filial, nome, delta):
+        contagem = self._contagem.setdefault(filial, {})
+        antes = contagem.get(nome, 0)
+        depois = max(antes + delta, 0)
+        if depois:
+            contagem[nome] = depois
+        else:
+            contagem.pop(nome, None)
+
+        chaves = self._chaves.setdefault(filial, [])
+        if not antes and depois:
+            self._ordem[nome] = normalizar(nome)
+            for chave in _chaves_do_nome(nome):
+                bisect.insort(chaves, chave)
+        elif antes and not depois:
+            for chave in _chaves_do_nome(nome):
+                i = bisect.bisect_left(chaves, chave)
+                if i < len(chaves) and chaves[i] == chave:
+                    del chaves[i]
+
+
+def _ler_responsaveis():
+    """
+    (retrato, linhas): o pg_current_snapshot() e as linhas (filial,
+    responsavel, quantidade) de ativos e celulares, lidos no mesmo retrato.
+    """
+    consultas = [
+        select(modelo.filial, modelo.responsavel, func.count())
+        .where(modelo.responsavel.isnot(None), modelo.responsavel != '')
+        .group_by(modelo.filial, modelo.responsavel)
+        for modelo in (Asset, Celular)
+    ]
+    # Conexão própria para não mexer na transação da requisição; em REPEATABLE
+    # READ as duas consultas enxergam o mesmo retrato
+    with db.engine.connect().execution_options(isolation_level='REPEATABLE READ') as conn:
+        retrato = conn.execute(text('SELECT pg_current_snapshot()::text')).scalar()
+        linhas = conn.execute(union_all(*consultas)).all()
+    return _ler_retrato(retrato), linhas
+
+
+def _ler_retrato(retrato):
+    """'xmin:xmax:xip1,xip2' -> (xmin, xmax, {xids em andamento})."""
+    xmin, xmax, em_andamento = retrato.split(':')
+    return int(xmin), int(xmax), {int(xid) for xid in em_andamento.split(',') if xid}
+
+
+def _visivel(xid, retrato):
+    """Se a transação confirmada `xid` já aparecia no retrato."""
+    xmin, xmax, em_andamento = retrato
+    return xid < xmin or (xid < xmax and xid not in em_andamento)
+
+
+def _chaves_do_nome(nome):
+    palavras = normalizar(nome).split()
+    return {(' '.join(palavras[i:]), nome) for i in range(len(palavras))}
+
+
+def init_responsaveis(app):
+    """Cria o índice; ele é carregado na primeira busca, não na criação do app."""
+    indice = IndiceResponsaveis(recarga=app.config.get('RESPONSAVEIS_RECARGA', 0))
+    app.extensions['responsaveis'] = indice
+    _registrar_listeners()
+    return indice
+
+
+def get_indice():
+    return current_app.extensions['responsaveis']
+
+
+def acompanhar_responsavel(entidade, dados_antigos, dados_novos):
+    """
+    Agenda a troca de filial/responsável de um registro para o índice quando a
+    transação atual for confirmada (chamado pela auditoria em toda gravação).
+    """
+    if entidade not in ENTIDADES:
+        return
+    antes = _par(dados_antigos)
+    depois = _par(dados_novos)
+    if antes == depois:
+        return
+    pendentes = db.session.info.setdefault('responsaveis_pendentes', [])
+    if antes:
+        pendentes.append((*antes, -1))
+    if depois:
+        pendentes.append((*depois, 1))
+
+
+def _par(dados):
+    if not dados or not dados.get('responsavel'):
+        return None
+    return dados.get('filial'), dados['responsavel']
+
+
+_listeners_registrados = False
+
+
+def _registrar_listeners():
+    global _listeners_registrados
+    if _listeners_registrados:
+        return
+    event.listen(db.session, 'before_commit', _antes_commit)
+    event.listen(db.session, 'after_commit', _apos_commit)
+    event.listen(db.session, 'after_rollback', _apos_rollback)
+    _listeners_registrados = True
+
+
+def _antes_commit(session):
+    # O xid diz à recarga se o retrato que ela leu já inclui este commit
+    if session.info.get('responsaveis_pendentes'):
+        session.info['responsaveis_xid'] = int(
+            session.execute(text('SELECT pg_current_xact_id()::text')).scalar())
+
+
+def _apos_commit(session):
+    alteracoes = session.info.pop('responsaveis_pendentes', None)
+    xid = session.info.pop('responsaveis_xid', None)
+    if not alteracoes:
+        return
+    indice = current_app.extensions.get('responsaveis')
+    if indice is not None:
+        indice.aplicar(alteracoes, xid)
+
+
+def _apos_rollback(session):
+    session.info.pop('responsaveis_pendentes', None)
+    session.info.pop('responsaveis_xid', None)
@@ -0,0 +1,27 @@
+import re
+
+# Chaves gravadas mascaradas na auditoria (senha, senha_bios, senha_windows,
+# senha_vpn, password...), em qualquer nível do documento: a auditoria
+# registra que mudaram, não o valor
+PADRAO_SENSIVEL = re.compile(r'senha|password', re.IGNORECASE)
+MASCARA = '********'
+
+
+def campo_sensivel(chave):
+    return isinstance(chave, str) and bool(PADRAO_SENSIVEL.search(chave))
+
+
+def valor_auditado(chave, valor):
+    """Valor como vai para a auditoria: mascarado se a chave é sensível (e preenchida)."""
+    if campo_sensivel(chave):
+        return MASCARA if valor else valor
+    return ocultar_sensiveis(valor)
+
+
+def ocultar_sensiveis(dados):
+    """Cópia de `dados` com as chaves sensíveis mascaradas, descendo em dicts e listas."""
+    if isinstance(dados, dict):
+        return {chave: valor_auditado(chave, valor) for chave, valor in dados.items()}
+    if isinstance(dados, list):
+        return [ocultar_sensiveis(item) for item in dados]
+    return dados
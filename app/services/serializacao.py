@@ -0,0 +1,233 @@
+from flask.json.provider import DefaultJSONProvider
+from app.models import Asset, Celular, Email, Software, Usuario
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele continua o provider padrão do Flask
+    orjson = None
+
+
+class ProviderOrjson(DefaultJSONProvider):
+    """
+    Provider JSON do Flask serializado pelo orjson. Mantém a saída do
+    provider padrão (chaves ordenadas, datas no formato HTTP, Decimal e UUID
+    como texto, indentação no modo debug), exceto que caracteres não ASCII
+    saem em UTF-8 em vez de \\uXXXX. Chamadas com opções do json da
+    biblioteca padrão (indent=..., cls=...) continuam indo para ele.
+    """
+
+    def _opcoes(self, indentar=False):
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._opcoes()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = self.compact is False or (self.compact is None and self._app.debug)
+        corpo = orjson.dumps(obj, default=self.default, option=self._opcoes(indentar))
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Troca o provider JSON pelo orjson quando JSON_ORJSON está ligado e o pacote existe."""
+    if app.config.get('JSON_ORJSON', True) and orjson is not None:
+        app.json = ProviderOrjson(app)
+
+
+# --- Codificadores de linhas ---
+
+def _texto(valor):
+    return str(valor) if valor is not None else None
+
+
+def _iso(valor):
+    return valor.isoformat() if valor else None
+
+
+def _decimal(valor):
+    return float(valor) if valor else None
+
+
+def _lista(valor):
+    return valor or []
+
+
+class CampoDesconhecido(ValueError):
+    """Campo pedido em ?fields= que o recurso não tem."""
+
+
+def ler_campos(valor):
+    """
+    ?fields=patrimonio,filial -> ('patrimonio', 'filial'), sem repetições e na
+    ordem pedida. None quando ausente ou vazio (todos os campos).
+    """
+    if not valor:
+        return None
+    campos = tuple(dict.fromkeys(c.strip() for c in valor.split(',') if c.strip()))
+    return campos or None
+
+
+class Codificador:
+    """
+    Gera os mesmos dicionários de Model.to_dict direto das tuplas de colunas
+    (query.with_entities / db.session.execute(select(...))), sem instanciar
+    objetos ORM. `campos` é [(chave, coluna, conversão ou None)] na ordem do
+    to_dict; `mesclar` é uma coluna JSON cujas chaves entram no dicionário
+    (especificacoes dos ativos), todas ou só as de `chaves_mescladas`.
+    `ocultas` são colunas selecionadas que não vão para o dicionário (chave
+    da paginação fora da projeção).
+    """
+
+    def __init__(self, campos, mesclar=None, ocultas=(), chaves_mescladas=None):
+        self._campos = tuple(campos)
+        self._mesclar = mesclar
+        self.chaves = tuple(chave for chave, _, _ in campos)
+        visiveis = tuple(coluna for _, coluna, _ in campos) + ((mesclar,) if mesclar is not None else ())
+        self.colunas = visiveis + tuple(c for c in ocultas if not any(c is v for v in visiveis))
+        self.conversoes = tuple((i, conversao) for i, (_, _, conversao) in enumerate(campos) if conversao)
+        self.mesclar = mesclar is not None
+        self.chaves_mescladas = chaves_mescladas
+
+    def projetar(self, campos, ocultas=()):
+        """
+        Codificador só com `campos` (vindos de ler_campos; o id vem sempre).
+        Nomes que não são colunas são procurados em `mesclar`; sem ele,
+        CampoDesconhecido. campos=None mantém todos.
+        """
+        if campos is None:
+            if not ocultas:
+                return self
+            return Codificador(self._campos, self._mesclar, ocultas)
+
+        por_chave = {campo[0]: campo for campo in self._campos}
+        escolhidos = [por_chave['id']] + [por_chave[c] for c in campos if c in por_chave and c != 'id']
+        extras = tuple(c for c in campos if c not in por_chave)
+        if extras and self._mesclar is None:
+            raise CampoDesconhecido(f"Campo desconhecido: {extras[0]}")
+        if not extras:
+            return Codificador(escolhidos, ocultas=ocultas)
+        return Codificador(escolhidos, self._mesclar, ocultas, chaves_mescladas=extras)
+
+    def selecionar(self, query):
+        """A mesma query (filtros, joins) trazendo só as colunas do codificador."""
+        return query.with_entities(*self.colunas)
+
+    def codificar(self, linha):
+        quantidade = len(self.chaves)
+        valores = list(linha[:quantidade])
+        for i, conversao in self.conversoes:
+            valores[i] = conversao(valores[i])
+        dados = dict(zip(self.chaves, valores))
+        if self.mesclar:
+            extra = linha[quantidade]
+            if extra:
+                if self.chaves_mescladas is None:
+                    dados.update(extra)
+                else:
+                    dados.update((chave, extra[chave]) for chave in self.chaves_mescladas if chave in extra)
+        return dados
+
+    def lista(self, linhas):
+        codificar = self.codificar
+        return [codificar(linha) for linha in linhas]
+
+    def um(self, query):
+        """Dicionário da primeira linha de `query`, ou None."""
+        linha = self.selecionar(query).first()
+        return self.codificar(linha) if linha is not None else None
+
+
+ASSET = Codificador([
+    ('id', Asset.id, _texto),
+    ('patrimonio', Asset.patrimonio, None),
+    ('tipo', Asset.tipo, None),
+    ('marca', Asset.marca, None),
+    ('modelo', Asset.modelo, None),
+    ('numero_serie', Asset.numero_serie, None),
+    ('filial', Asset.filial, None),
+    ('setor', Asset.setor, None),
+    ('responsavel', Asset.responsavel, None),
+    ('status', Asset.status, None),
+    ('observacoes', Asset.observacoes, None),
+    ('dt_compra', Asset.dt_compra, _iso),
+    ('dt_garantia', Asset.dt_garantia, _iso),
+    ('valor', Asset.valor, _decimal),
+    ('fornecedor', Asset.fornecedor, None),
+    ('nota_fiscal', Asset.nota_fiscal, None),
+    ('anydesk', Asset.anydesk, None),
+    ('criado_em', Asset.criado_em, _iso),
+    ('atualizado_em', Asset.atualizado_em, _iso),
+], mesclar=Asset.especificacoes)
+
+CELULAR = Codificador([
+    ('id', Celular.id, _texto),
+    ('patrimonio', Celular.patrimonio, None),
+    ('filial', Celular.filial, None),
+    ('modelo', Celular.modelo, None),
+    ('imei', Celular.imei, None),
+    ('numero', Celular.numero, None),
+    ('operadora', Celular.operadora, None),
+    ('responsavel', Celular.responsavel, None),
+    ('status', Celular.status, None),
+    ('observacoes', Celular.observacoes, None),
+    ('dt_compra', Celular.dt_compra, _iso),
+    ('valor', Celular.valor, _decimal),
+    ('criado_em', Celular.criado_em, _iso),
+    ('atualizado_em', Celular.atualizado_em, _iso),
+])
+
+# asset_patrimonio vem do Asset já ligado pela query de listagem (join/outerjoin)
+EMAIL = Codificador([
+    ('id', Email.id, _texto),
+    ('endereco', Email.endereco, None),
+    ('tipo', Email.tipo, None),
+    ('asset_id', Email.asset_id, _texto),
+    ('asset_patrimonio', Asset.patrimonio, None),
+    ('usuario', Email.usuario, None),
+    ('recuperacao', Email.recuperacao, None),
+    ('observacoes', Email.observacoes, None),
+    ('ativo', Email.ativo, None),
+    ('criado_em', Email.criado_em, _iso),
+    ('atualizado_em', Email.atualizado_em, _iso),
+])
+
+SOFTWARE = Codificador([
+    ('id', Software.id, _texto),
+    ('nome', Software.nome, None),
+    ('versao', Software.versao, None),
+    ('asset_id', Software.asset_id, _texto),
+    ('asset_patrimonio', Asset.patrimonio, None),
+    ('tipo_licenca', Software.tipo_licenca, None),
+    ('chave_licenca', Software.chave_licenca, None),
+    ('dt_instalacao', Software.dt_instalacao, _iso),
+    ('dt_vencimento', Software.dt_vencimento, _iso),
+    ('custo_anual', Software.custo_anual, _decimal),
+    ('renovacao_automatica', Software.renovacao_automatica, None),
+    ('observacoes', Software.observacoes, None),
+    ('ativo', Software.ativo, None),
+    ('criado_em', Software.criado_em, _iso),
+    ('atualizado_em', Software.atualizado_em, _iso),
+])
+
+USUARIO = Codificador([
+    ('id', Usuario.id, _texto),
+    ('username', Usuario.username, None),
+    ('nome', Usuario.nome, None),
+    ('email', Usuario.email, None),
+    ('filial', Usuario.filial, None),
+    ('permissoes', Usuario.permissoes, _lista),
+    ('ativo', Usuario.ativo, None),
+])
@@ -0,0 +1,102 @@
+"""
+Benchmark do histórico de auditoria: mede a busca de um registro
+(obter_logs_ativo, entidade + entidade_id) e dos logs de um usuário
+conforme audit_logs cresce. Com os índices compostos o tempo fica
+praticamente constante; sem eles cresce junto com a tabela.
+
+Uso: python benchmark_logs_auditoria.py [tamanho1 tamanho2 ...]
+     (padrão: 10000 100000 300000; usa o banco configurado em config.py)
+
+As linhas de teste são inseridas numa transação desfeita no final: nada
+fica gravado no banco.
+"""
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from app import create_app
+from app.models import db, AuditLog
+from app.services.audit import ENTIDADES, obter_logs_ativo
+
+TAMANHOS = [10000, 100000, 300000]
+REGISTROS = 5000      # entidade_id distintos por entidade
+USUARIOS = 50
+REPETICOES = 50
+LOTE = 10000
+
+
+def gerar_logs(inicio, quantidade, agora):
+    for i in range(inicio, inicio + quantidade):
+        yield {
+            'usuario_nome': f'bench_{i % USUARIOS}',
+            'acao': 'Update',
+            'entidade': ENTIDADES[i % len(ENTIDADES)],
+            'entidade_id': str(i % REGISTROS),
+            'descricao': 'Benchmark de auditoria',
+            'timestamp': agora - timedelta(seconds=i),
+        }
+
+
+def medir(funcao):
+    """Mediana em milissegundos de REPETICOES execuções."""
+    tempos = []
+    for i in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def logs_do_usuario(i):
+    return (AuditLog.query.filter_by(usuario_nome=f'bench_{i % USUARIOS}')
+            .order_by(AuditLog.timestamp.desc()).limit(100).all())
+
+
+def indice_usado(sql, **parametros):
+    if db.engine.dialect.name != 'postgresql':
+        return '-'
+    plano = '\n'.join(linha for linha, in db.session.execute(text('EXPLAIN ' + sql), parametros))
+    # Nas partições o índice aparece com o nome da partição (audit_logs_AAAA_MM_..._idx)
+    acesso = re.search(r'(Index Only Scan|Index Scan|Bitmap Index Scan|Seq Scan)(?: Backward)?(?: (?:using|on) (\S+))?', plano)
+    if not acesso:
+        return 'outro'
+    return f"{acesso.group(1)} {acesso.group(2) or ''}".strip()
+
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or TAMANHOS
+    app = create_app()
+
+    with app.app_context():
+        agora = datetime.now()
+        inseridos = 0
+        print(f"{'linhas':>10} | {'registro (ms)':>13} | {'usuário (ms)':>12} | índice")
+        try:
+            for tamanho in sorted(tamanhos):
+                while inseridos < tamanho:
+                    quantidade = min(LOTE, tamanho - inseridos)
+                    db.session.execute(insert(AuditLog), list(gerar_logs(inseridos, quantidade, agora)))
+                    inseridos += quantidade
+                if db.engine.dialect.name == 'postgresql':
+                    db.session.execute(text('ANALYZE audit_logs'))
+
+                registro = medir(lambda i: obter_logs_ativo(
+                    i % REGISTROS, entidade=ENTIDADES[i % len(ENTIDADES)], incluir_arquivados=False
+                ))
+                usuario = medir(logs_do_usuario)
+                indice = indice_usado(
+                    'SELECT * FROM audit_logs WHERE entidade = :entidade AND entidade_id = :id '
+                    'ORDER BY "timestamp" DESC LIMIT 100',
+                    entidade='Asset', id='1'
+                )
+                print(f"{tamanho:>10} | {registro:>13.2f} | {usuario:>12.2f} | {indice}")
+        finally:
+            db.session.rollback()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark da serialização da lista de ativos: compara o caminho antigo
+(objetos ORM + to_dict + json da biblioteca padrão) com o novo (tuplas de
+colunas + codificador de app/services/serializacao.py + orjson), e cada
+etapa separadamente. Também confere que os dois produzem o mesmo JSON.
+
+Uso: python benchmark_serializacao.py [quantidade]
+     (padrão: 10000 ativos; usa o banco configurado em config.py)
+
+Os ativos de teste são inseridos numa transação desfeita no final: nada
+fica gravado no banco.
+"""
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+from app import create_app
+from app.models import db, Asset
+from app.services.serializacao import ASSET, ProviderOrjson, orjson
+
+QUANTIDADE = 10000
+REPETICOES = 10
+PREFIXO = 'BENCH-SER-'
+
+
+def gerar_assets(quantidade, agora):
+    for i in range(quantidade):
+        yield {
+            'patrimonio': f'{PREFIXO}{i}',
+            'tipo': 'Notebook' if i % 3 == 0 else 'Desktop',
+            'marca': 'Dell',
+            'modelo': f'Optiplex {i % 50}',
+            'numero_serie': f'SN{i:08d}',
+            'filial': f'Filial {i % 40}',
+            'setor': f'Setor {i % 20}',
+            'responsavel': f'Funcionário {i}',
+            'status': 'Ativo',
+            'observacoes': 'Benchmark de serialização',
+            'dt_compra': date(2024, 1 + i % 12, 1 + i % 28),
+            'valor': Decimal('3499.90'),
+            'anydesk': str(100000000 + i),
+            'especificacoes': {'hostname': f'pc-{i}.refri.local', 'dominio': 'REFRI', 'vpn': 'sim' if i % 2 else 'nao'},
+            'criado_em': agora,
+            'atualizado_em': agora,
+        }
+
+
+def medir(funcao):
+    """Mediana em milissegundos de REPETICOES execuções."""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else QUANTIDADE
+    if orjson is None:
+        sys.exit('orjson não está instalado (pip install orjson)')
+
+    app = create_app()
+    padrao = DefaultJSONProvider(app)
+    rapido = ProviderOrjson(app)
+
+    with app.app_context():
+        try:
+            db.session.execute(insert(Asset), list(gerar_assets(quantidade, datetime.now())))
+            query = Asset.query.filter(Asset.patrimonio.like(f'{PREFIXO}%'))
+
+            def antigo():
+                db.session.expunge_all()
+                return padrao.dumps([asset.to_dict() for asset in query.all()])
+
+            def novo():
+                return rapido.dumps(ASSET.lista(ASSET.selecionar(query)))
+
+            if json.loads(antigo()) != json.loads(novo()):
+                sys.exit('As saídas antiga e nova são diferentes')
+
+            objetos = query.all()
+            linhas = ASSET.selecionar(query).all()
+            dicionarios = [asset.to_dict() for asset in objetos]
+            etapas = [
+                ('consulta: objetos ORM', lambda: (db.session.expunge_all(), query.all())),
+                ('consulta: tuplas de colunas', lambda: ASSET.selecionar(query).all()),
+                ('dicionários: to_dict', lambda: [asset.to_dict() for asset in objetos]),
+                ('dicionários: codificador', lambda: ASSET.lista(linhas)),
+                ('JSON: biblioteca padrão', lambda: padrao.dumps(dicionarios)),
+                ('JSON: orjson', lambda: rapido.dumps(dicionarios)),
+            ]
+
+            print(f"{quantidade} ativos, mediana de {REPETICOES} execuções\n")
+            for nome, funcao in etapas:
+                print(f"{nome:<30} {medir(funcao):>9.1f} ms")
+
+            tempo_antigo, tempo_novo = medir(antigo), medir(novo)
+            print(f"\n{'total antigo':<30} {tempo_antigo:>9.1f} ms")
+            print(f"{'total novo':<30} {tempo_novo:>9.1f} ms  ({tempo_antigo / tempo_novo:.1f}x)")
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
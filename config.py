@@ -18,4 +18,64 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
-    JWT_HEADER_TYPE = 'Bearer'
\ No newline at end of file
+    JWT_HEADER_TYPE = 'Bearer'
+    JWT_QUERY_STRING_NAME = 'jwt'
+
+    # Eventos de alteração: 'memoria' (um processo) ou 'postgres' (LISTEN/NOTIFY entre processos)
+    EVENTOS_BACKEND = os.environ.get('EVENTOS_BACKEND', 'memoria')
+    # Validade (segundos) do token de POST /api/events/token, que vai na URL do EventSource
+    EVENTOS_TOKEN_VALIDADE = int(os.environ.get('EVENTOS_TOKEN_VALIDADE', 60))
+    # Cada conexão SSE prende uma thread do servidor enquanto está aberta: em
+    # produção use workers com threads ou gevent (gunicorn -k gthread/gevent)
+    # e mantenha este limite por processo abaixo do total de threads
+    EVENTOS_MAX_CONEXOES = int(os.environ.get('EVENTOS_MAX_CONEXOES', 50))
+
+    # Monitoramento de consultas: cabeçalhos X-DB-Queries/Server-Timing e detector de N+1
+    DB_MONITORAMENTO = True
+    DB_N1_LIMITE = int(os.environ.get('DB_N1_LIMITE', 10))
+    DB_N1_MODO = os.environ.get('DB_N1_MODO')  # off | warn | raise; padrão: warn só com debug
+
+    # Índice em memória do autocompletar de responsáveis (/api/responsaveis).
+    # Cada processo só aplica as próprias gravações; a recarga completa a cada
+    # N segundos alcança as feitas pelos outros (0 = nunca recarrega)
+    RESPONSAVEIS_RECARGA = int(os.environ.get('RESPONSAVEIS_RECARGA', 300))
+
+    # Cache em memória de GET /api/filiais: segundos entre conferências da
+    # versão no banco (o prazo para ver filiais criadas por outro processo)
+    FILIAIS_CACHE_INTERVALO = float(os.environ.get('FILIAIS_CACHE_INTERVALO', 5))
+
+    # Cache das respostas de listagem/detalhe (app/services/cache_respostas.py),
+    # invalidado pelas gravações. 'memoria' vale por processo (com vários
+    # processos, as gravações dos outros só aparecem após o TTL); 'redis'
+    # compartilha entradas e invalidações entre todos
+    CACHE_RESPOSTAS = os.environ.get('CACHE_RESPOSTAS', 'true').lower() == 'true'
+    CACHE_RESPOSTAS_BACKEND = os.environ.get('CACHE_RESPOSTAS_BACKEND', 'memoria')
+    CACHE_RESPOSTAS_TTL = int(os.environ.get('CACHE_RESPOSTAS_TTL', 30))
+    CACHE_RESPOSTAS_MAX_MB = int(os.environ.get('CACHE_RESPOSTAS_MAX_MB', 64))
+    CACHE_RESPOSTAS_REDIS_URL = os.environ.get('CACHE_RESPOSTAS_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Serializa as respostas JSON com orjson quando o pacote está instalado
+    JSON_ORJSON = os.environ.get('JSON_ORJSON', 'true').lower() == 'true'
+
+    # Threads que processam importações CSV em segundo plano. Os jobs ficam na
+    # memória do processo: rode a API com um único processo (ou afinidade de
+    # sessão para /api/import), senão o acompanhamento cai em outro processo
+    IMPORTACAO_WORKERS = int(os.environ.get('IMPORTACAO_WORKERS', 2))
+
+    # Auditoria assíncrona: as rotas só enfileiram e uma thread grava em lotes.
+    # Mais rápido, mas os logs deixam de ser atômicos com a alteração.
+    AUDITORIA_ASSINCRONA = os.environ.get('AUDITORIA_ASSINCRONA', 'false').lower() == 'true'
+    AUDITORIA_FILA_MAX = int(os.environ.get('AUDITORIA_FILA_MAX', 10000))
+    AUDITORIA_LOTE = 500
+    AUDITORIA_ESPERA_MAX = 0.5  # segundos que uma requisição espera com a fila cheia antes de descartar
+
+    # Tabela audit_resumo (contagens diárias) mantida a cada log e usada em
+    # /api/logs/estatisticas. Ao ligar, rode: flask auditoria reconstruir-resumo
+    AUDITORIA_RESUMO = os.environ.get('AUDITORIA_RESUMO', 'false').lower() == 'true'
+
+    # Retenção da auditoria: partições mais antigas que isso vão para arquivos
+    # .jsonl.gz em AUDITORIA_ARQUIVO_DIR (flask auditoria arquivar)
+    AUDITORIA_RETENCAO_MESES = int(os.environ.get('AUDITORIA_RETENCAO_MESES', 12))
+    AUDITORIA_ARQUIVO_DIR = os.environ.get('AUDITORIA_ARQUIVO_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'arquivo_auditoria'
+    )
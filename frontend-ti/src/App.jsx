@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import { 
   Box, Flex, Heading, Text, Button, Table, Thead, Tbody, Tr, Th, Td, 
   Badge, Input, Select, useToast, Modal, ModalOverlay, ModalContent, 
@@ -24,6 +24,8 @@ import EmailsComponent from './Emails';
 import ImportModal from './components/ImportModal';
 
 const API_URL = 'http://127.0.0.1:5000/api';
+// Janela de coalescência dos eventos SSE antes de buscar o delta
+const ESPERA_EVENTOS_MS = 1000;
 
 const SETORES_POR_TIPO = {
   'Administrativo': ['Análise de Crédito', 'Auxiliar Televendas', 'Cadastro', 'Cadastro de Produto', 'Cobrança', 'Comercial', 'Compras', 'Contabil / Fiscal', 'Controladoria', 'Controle de Estoque', 'Dep. Pessoal', 'Direção', 'Ecommerce', 'Financeiro', 'Garantia', 'Gerente Televendas', 'Liberação de Pedido / Depósito', 'Logística', 'Marketing', 'Negociação', 'Pricing', 'Projeto', 'RH', 'Servidor', 'TI', 'Televendas'].sort(),
@@ -81,7 +83,7 @@ function App() {
   const [showPassword, setShowPassword] = useState({});
   const [respMenuOpen, setRespMenuOpen] = useState(false);
   const [setoresDisponiveis, setSetoresDisponiveis] = useState([]);
-  const [responsaveisDisponiveis, setResponsaveisDisponiveis] = useState([]);
+  const [responsaveisFiltrados, setResponsaveisFiltrados] = useState([]);
 
   const toast = useToast();
 
@@ -108,45 +110,114 @@ function App() {
     setUsuario(null);
   };
 
-  const fetchData = async (silent = false) => {
-    if (!usuario) return;
-    try {
-      const resF = await axios.get(`${API_URL}/filiais`);
-      setFiliais(resF.data);
+  // Token do /api/sync: após a primeira carga só chegam as linhas alteradas
+  const syncTokenRef = useRef(null);
 
-      if (paginaAtual === 'assets' || paginaAtual === 'emails' || paginaAtual === 'softwares') {
-        const params = filiaisFiltro ? { filial: filiaisFiltro } : {};
-        const resA = await axios.get(`${API_URL}/assets`, { params });
-        setAssets(resA.data.filter(a => a.status !== 'Inativo'));
-      }
+  const mesclar = (lista, alterados, removidos) => {
+    const mapa = new Map(lista.map(item => [item.id, item]));
+    alterados.forEach(item => mapa.set(item.id, item));
+    removidos.forEach(id => mapa.delete(id));
+    return [...mapa.values()];
+  };
 
-      // Busca dados secundários para popular as abas
-      const resC = await axios.get(`${API_URL}/celulares`);
-      setCelulares(resC.data.filter(c => c.status !== 'Inativo'));
+  // Coalescência: com uma busca em andamento, novas chamadas só marcam que é
+  // preciso buscar de novo ao final (uma única vez, não uma por evento)
+  const buscandoRef = useRef(false);
+  const buscarDeNovoRef = useRef(false);
 
-      const resE = await axios.get(`${API_URL}/emails`);
-      setEmails(resE.data.filter(e => e.status !== 'Inativo'));
+  const fetchData = async (silent = false) => {
+    if (!usuario) return;
+    if (buscandoRef.current) {
+      buscarDeNovoRef.current = true;
+      return;
+    }
+    buscandoRef.current = true;
+    try {
+      const params = syncTokenRef.current ? { since: syncTokenRef.current } : {};
+      // Como nas listagens antigas, só os ativos são filtrados pela filial
+      if (filiaisFiltro) Object.assign(params, { filial: filiaisFiltro, filial_em: 'assets' });
+      const { data } = await axios.get(`${API_URL}/sync`, { params });
+
+      if (data.filiais) setFiliais(data.filiais);
+
+      const ativo = item => item.status !== 'Inativo';
+      const aplicar = (setter, chave, filtro = ativo) => {
+        if (data.completo) setter(data[chave].filter(filtro));
+        else if (data[chave].length || data.removidos[chave].length) {
+          setter(prev => mesclar(prev, data[chave], data.removidos[chave]).filter(filtro));
+        }
+      };
+      aplicar(setAssets, 'assets');
+      aplicar(setCelulares, 'celulares');
+      aplicar(setEmails, 'emails');
+      aplicar(setSoftwares, 'softwares');
 
-      const resS = await axios.get(`${API_URL}/softwares`);
-      setSoftwares(resS.data.filter(s => s.status !== 'Inativo'));
-      
+      syncTokenRef.current = data.token;
       setLastUpdate(new Date());
     } catch (error) {
       if (error.response?.status === 401) handleLogout();
+      if (error.response?.status === 400) syncTokenRef.current = null;
+    } finally {
+      buscandoRef.current = false;
+      if (buscarDeNovoRef.current) {
+        buscarDeNovoRef.current = false;
+        fetchData(true);
+      }
     }
   };
 
+  // Trocar de filial invalida o delta: a próxima chamada traz o retrato completo
+  useEffect(() => {
+    syncTokenRef.current = null;
+  }, [usuario, filiaisFiltro]);
+
+  // Atualização dirigida por escrita: o backend avisa via SSE (/api/events) e
+  // só então buscamos o delta no /api/sync. O intervalo longo é só uma rede de
+  // segurança caso o stream caia sem que o navegador perceba. Rajadas de
+  // eventos (vários usuários salvando, importações em lotes) viram uma única
+  // busca depois de ESPERA_EVENTOS_MS sem novidades.
   useEffect(() => {
+    if (!usuario) return;
     fetchData();
-    const intervalId = setInterval(() => {
-      if (!isOpen && !modalFilialOpen) fetchData(true);
-    }, 5000);
-    return () => clearInterval(intervalId);
+    let timerId = null;
+    const atualizar = () => {
+      clearTimeout(timerId);
+      timerId = setTimeout(() => {
+        if (!isOpen && !modalFilialOpen) fetchData(true);
+      }, ESPERA_EVENTOS_MS);
+    };
+    // O stream só aceita o token curto de /events/token (vai na URL). Se a
+    // conexão cair, a reconexão automática usaria um token já vencido: fecha e
+    // abre de novo com um token novo.
+    let eventos = null;
+    let reconexaoId = null;
+    let encerrado = false;
+    const conectar = async () => {
+      try {
+        const { data } = await axios.post(`${API_URL}/events/token`);
+        if (encerrado) return;
+        eventos = new EventSource(`${API_URL}/events?jwt=${encodeURIComponent(data.token)}`);
+        eventos.addEventListener('alteracao', atualizar);
+        eventos.onopen = atualizar;
+        eventos.onerror = () => {
+          eventos.close();
+          reconexaoId = setTimeout(conectar, 5000);
+        };
+      } catch (error) {
+        if (!encerrado) reconexaoId = setTimeout(conectar, 5000);
+      }
+    };
+    conectar();
+    const intervalId = setInterval(atualizar, 60000);
+    return () => {
+      encerrado = true;
+      if (eventos) eventos.close();
+      clearTimeout(reconexaoId);
+      clearInterval(intervalId);
+      clearTimeout(timerId);
+    };
   }, [usuario, paginaAtual, filiaisFiltro, isOpen]);
 
-  // Socket.IO removido - não implementado no backend
-  // Usando polling a cada 5 segundos como mecanismo de sincronização
-
   const filteredAssets = useMemo(() => {
     return assets.filter(asset => {
       if (filtros.pat && !asset.patrimonio?.toLowerCase().includes(filtros.pat.toLowerCase())) return false;
@@ -159,12 +230,25 @@ function App() {
     });
   }, [assets, filtros]);
 
-  const responsaveisFiltrados = useMemo(() => {
-    const termo = (formData.responsavel || '').toLowerCase();
-    return responsaveisDisponiveis
-      .filter(r => r.toLowerCase().includes(termo))
-      .slice(0, 20);
-  }, [responsaveisDisponiveis, formData.responsavel]);
+  // Autocompletar do responsável: cada tecla consulta o índice em memória do backend
+  useEffect(() => {
+    if (!formData.filial) {
+      setResponsaveisFiltrados([]);
+      return;
+    }
+    let cancelado = false;
+    const termo = formData.responsavel || '';
+    axios.get(`${API_URL}/responsaveis`, { params: { filial: formData.filial, q: termo, limit: 20 } })
+      .then(res => { if (!cancelado) setResponsaveisFiltrados(res.data); })
+      .catch(() => {
+        if (cancelado) return;
+        const t = termo.toLowerCase();
+        setResponsaveisFiltrados([...new Set(
+          assets.filter(a => a.filial === formData.filial).map(a => a.responsavel)
+        )].filter(r => r && r.toLowerCase().includes(t)).sort().slice(0, 20));
+      });
+    return () => { cancelado = true; };
+  }, [formData.filial, formData.responsavel, assets]);
 
   const handleOpenCreate = () => { setFormData(initialFormState); setIsEditing(null); setIsOpen(true); };
   const handleOpenEdit = (asset) => { setFormData({ ...initialFormState, ...asset }); setIsEditing(asset.id); setIsOpen(true); };
@@ -213,24 +297,8 @@ function App() {
       } else {
         setSetoresDisponiveis([]);
       }
-
-      const fetchResponsaveis = async () => {
-        try {
-          const encodedFilial = encodeURIComponent(formData.filial);
-          const res = await axios.get(`${API_URL}/funcionarios/${encodedFilial}`);
-          setResponsaveisDisponiveis(res.data);
-        } catch (error) {
-          const respsLocais = [...new Set(
-            assets.filter(a => a.filial === formData.filial).map(a => a.responsavel)
-          )].filter(Boolean).sort();
-          setResponsaveisDisponiveis(respsLocais);
-        }
-      };
-      fetchResponsaveis();
-      
     } else {
       setSetoresDisponiveis([]);
-      setResponsaveisDisponiveis([]);
     }
   }, [formData.filial, filiais]);
 
@@ -11,6 +11,8 @@ const API_URL = 'http://127.0.0.1:5000/api';
 function AssetDetail({ asset, onClose, onSave }) {
   const [logs, setLogs] = useState([]);
   const [loading, setLoading] = useState(false);
+  // Meses arquivados ficam em arquivos fora do banco: só são lidos a pedido
+  const [comArquivados, setComArquivados] = useState(false);
   const [formData, setFormData] = useState(asset);
   const toast = useToast();
   const token = localStorage.getItem('token');
@@ -21,14 +23,15 @@ function AssetDetail({ asset, onClose, onSave }) {
     }
   }, [asset.id]);
 
-  const fetchLogs = async () => {
+  const fetchLogs = async (arquivados = false) => {
     try {
       setLoading(true);
       const response = await axios.get(
         `${API_URL}/logs/ativo/${asset.id}`,
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: { Authorization: `Bearer ${token}` }, params: arquivados ? { arquivados: 'true' } : {} }
       );
       setLogs(response.data);
+      setComArquivados(arquivados);
     } catch (error) {
       console.error('Erro ao carregar logs:', error);
     } finally {
@@ -140,6 +143,11 @@ function AssetDetail({ asset, onClose, onSave }) {
                 </Table>
               </Box>
             )}
+            {!loading && !comArquivados && (
+              <Button size="sm" variant="link" mt={3} onClick={() => fetchLogs(true)}>
+                Incluir meses arquivados
+              </Button>
+            )}
           </TabPanel>
         </TabPanels>
       </Tabs>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import {
   Box, Button, Heading, Table, Thead, Tbody, Tr, Th, Td, Badge, VStack, HStack, 
-  Select, Text, useToast, Spinner, Center
+  Select, Text, useToast, Spinner, Center, Input
 } from '@chakra-ui/react';
 import { ViewIcon } from '@chakra-ui/icons';
 import axios from 'axios';
@@ -12,6 +12,10 @@ function Logs() {
   const [logs, setLogs] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filtroUsuario, setFiltroUsuario] = useState('');
+  const [filtroAcao, setFiltroAcao] = useState('');
+  const [filtroEntidade, setFiltroEntidade] = useState('');
+  const [busca, setBusca] = useState('');
+  const [proximoCursor, setProximoCursor] = useState(null);
   const [usuarios, setUsuarios] = useState([]);
   const [stats, setStats] = useState(null);
   const toast = useToast();
@@ -21,19 +25,26 @@ function Logs() {
   useEffect(() => {
     fetchLogs();
     fetchStats();
-  }, [filtroUsuario]);
+  }, [filtroUsuario, filtroAcao, filtroEntidade]);
 
-  const fetchLogs = async () => {
+  // Sem cursor recarrega a primeira página; com cursor acrescenta a seguinte
+  const fetchLogs = async (cursor = null) => {
     try {
       setLoading(true);
-      const params = filtroUsuario ? { usuario: filtroUsuario } : {};
+      const params = { limite: 200 };
+      if (filtroUsuario) params.usuario = filtroUsuario;
+      if (filtroAcao) params.acao = filtroAcao;
+      if (filtroEntidade) params.entidade = filtroEntidade;
+      if (busca) params.busca = busca;
+      if (cursor) params.cursor = cursor;
       const response = await axios.get(`${API_URL}/logs`, 
         { 
           params,
           headers: { Authorization: `Bearer ${token}` }
         }
       );
-      setLogs(response.data);
+      setLogs(prev => cursor ? [...prev, ...response.data.itens] : response.data.itens);
+      setProximoCursor(response.data.proximo_cursor);
     } catch (error) {
       toast({ title: 'Erro', description: 'Falha ao carregar logs', status: 'error' });
     } finally {
@@ -86,7 +97,7 @@ function Logs() {
     <Box p={6}>
       <HStack justify="space-between" mb={6}>
         <Heading size="lg">Auditoria e Logs</Heading>
-        <Button colorScheme="teal" onClick={fetchLogs}>Atualizar</Button>
+        <Button colorScheme="teal" onClick={() => fetchLogs()}>Atualizar</Button>
       </HStack>
 
       {stats && (
@@ -113,17 +124,46 @@ function Logs() {
       )}
 
       <Box bg="white" shadow="sm" p={4} borderRadius="lg" mb={6}>
-        <Text mb={2} fontSize="sm" fontWeight="bold" color="gray.700">Filtrar por Usuário</Text>
-        <Select
-          value={filtroUsuario}
-          onChange={(e) => setFiltroUsuario(e.target.value)}
-          placeholder="Todos os usuários"
-          maxW="300px"
-        >
-          {usuarios.map(u => (
-            <option key={u} value={u}>{u}</option>
-          ))}
-        </Select>
+        <Text mb={2} fontSize="sm" fontWeight="bold" color="gray.700">Filtros</Text>
+        <HStack spacing={3}>
+          <Select
+            value={filtroUsuario}
+            onChange={(e) => setFiltroUsuario(e.target.value)}
+            placeholder="Todos os usuários"
+            maxW="250px"
+          >
+            {usuarios.map(u => (
+              <option key={u} value={u}>{u}</option>
+            ))}
+          </Select>
+          <Select
+            value={filtroAcao}
+            onChange={(e) => setFiltroAcao(e.target.value)}
+            placeholder="Todas as ações"
+            maxW="200px"
+          >
+            {['CRIACAO', 'ALTERACAO', 'ADICAO', 'REMOCAO', 'EXCLUSAO'].map(a => (
+              <option key={a} value={a}>{a}</option>
+            ))}
+          </Select>
+          <Select
+            value={filtroEntidade}
+            onChange={(e) => setFiltroEntidade(e.target.value)}
+            placeholder="Todas as entidades"
+            maxW="200px"
+          >
+            {['Asset', 'Celular', 'Email', 'Software'].map(e => (
+              <option key={e} value={e}>{e}</option>
+            ))}
+          </Select>
+          <Input
+            value={busca}
+            onChange={(e) => setBusca(e.target.value)}
+            onKeyDown={(e) => e.key === 'Enter' && fetchLogs()}
+            placeholder="Buscar na descrição (Enter)"
+            maxW="300px"
+          />
+        </HStack>
       </Box>
 
       <Box bg="white" shadow="sm" borderRadius="lg" overflow="hidden">
@@ -170,6 +210,14 @@ function Logs() {
           </Tbody>
         </Table>
       </Box>
+
+      {proximoCursor && (
+        <Center mt={4}>
+          <Button onClick={() => fetchLogs(proximoCursor)} isLoading={loading}>
+            Carregar mais
+          </Button>
+        </Center>
+      )}
     </Box>
   );
 }
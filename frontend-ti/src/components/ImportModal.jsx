@@ -1,19 +1,58 @@
-import React, { useRef, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Modal, ModalOverlay, ModalContent, ModalHeader, ModalBody, ModalCloseButton,
-  Button, Text, VStack, useToast, Alert, AlertIcon, Box, List, ListItem
+  Button, Text, VStack, HStack, useToast, Alert, AlertIcon, Box, List, ListItem, Progress, Select
 } from '@chakra-ui/react';
 import { AttachmentIcon } from '@chakra-ui/icons';
 import axios from 'axios';
 
 const API_URL = 'http://127.0.0.1:5000/api/import';
 
+const FINALIZADOS = ['concluido', 'erro', 'cancelado'];
+
 const ImportModal = ({ isOpen, onClose, type, onSuccess }) => {
   const fileInputRef = useRef();
+  const pollRef = useRef(null);
   const [loading, setLoading] = useState(false);
+  const [job, setJob] = useState(null);
   const [report, setReport] = useState(null);
+  const [modo, setModo] = useState('insert');
   const toast = useToast();
 
+  const pararPolling = () => {
+    if (pollRef.current) clearInterval(pollRef.current);
+    pollRef.current = null;
+  };
+
+  useEffect(() => pararPolling, []);
+
+  const finalizar = (dados) => {
+    pararPolling();
+    setLoading(false);
+    setReport(dados);
+    if (dados.status === 'erro') {
+      toast({ title: 'Erro na importação', description: dados.msg, status: 'error' });
+      return;
+    }
+    if (onSuccess) onSuccess();
+    toast({ title: dados.status === 'cancelado' ? 'Importação cancelada' : 'Importação finalizada', status: 'success' });
+  };
+
+  // A importação roda em segundo plano: acompanhamos o job até terminar
+  const acompanharJob = (jobId) => {
+    pollRef.current = setInterval(async () => {
+      try {
+        const res = await axios.get(`${API_URL}/jobs/${jobId}`);
+        setJob(res.data);
+        if (FINALIZADOS.includes(res.data.status)) finalizar(res.data);
+      } catch (error) {
+        pararPolling();
+        setLoading(false);
+        toast({ title: 'Erro ao consultar importação', status: 'error' });
+      }
+    }, 1000);
+  };
+
   const handleUpload = async () => {
     const file = fileInputRef.current.files[0];
     if (!file) {
@@ -26,21 +65,28 @@ const ImportModal = ({ isOpen, onClose, type, onSuccess }) => {
 
     setLoading(true);
     setReport(null);
+    setJob(null);
 
     try {
-      // type deve ser: 'celulares', 'emails' ou 'softwares'
+      // type deve ser: 'assets', 'celulares', 'emails' ou 'softwares'
       const res = await axios.post(`${API_URL}/${type}`, formData, {
-        headers: { 'Content-Type': 'multipart/form-data' }
+        headers: { 'Content-Type': 'multipart/form-data' },
+        params: type === 'emails' ? {} : { mode: modo }
       });
-      
-      setReport(res.data);
-      if (onSuccess) onSuccess();
-      toast({ title: 'Importação finalizada', status: 'success' });
-      
+      setJob(res.data.job);
+      acompanharJob(res.data.job_id);
     } catch (error) {
-      toast({ title: 'Erro na importação', description: error.response?.data?.erro || 'Erro servidor', status: 'error' });
-    } finally {
       setLoading(false);
+      toast({ title: 'Erro na importação', description: error.response?.data?.erro || 'Erro servidor', status: 'error' });
+    }
+  };
+
+  const handleCancelar = async () => {
+    if (!job) return;
+    try {
+      await axios.post(`${API_URL}/jobs/${job.id}/cancelar`);
+    } catch (error) {
+      toast({ title: 'Não foi possível cancelar', status: 'warning' });
     }
   };
 
@@ -90,6 +136,14 @@ const ImportModal = ({ isOpen, onClose, type, onSuccess }) => {
               style={{ border: '1px solid #ccc', padding: '10px', width: '100%' }}
             />
 
+            {type !== 'emails' && (
+              <Select size="sm" value={modo} onChange={(e) => setModo(e.target.value)}>
+                <option value="insert">Somente criar (existentes viram erro)</option>
+                <option value="upsert">Criar ou atualizar existentes</option>
+                <option value="update-only">Somente atualizar existentes</option>
+              </Select>
+            )}
+
             <Button 
               leftIcon={<AttachmentIcon />} 
               colorScheme="blue" 
@@ -99,6 +153,21 @@ const ImportModal = ({ isOpen, onClose, type, onSuccess }) => {
               Enviar e Processar
             </Button>
 
+            {loading && job && (
+              <Box bg="gray.50" p={3} borderRadius="md" w="100%">
+                <Progress
+                  size="sm" colorScheme="blue" hasStripe isAnimated
+                  value={job.total_estimado ? Math.min(100, (job.linhas_processadas / job.total_estimado) * 100) : undefined}
+                  isIndeterminate={!job.total_estimado}
+                />
+                <HStack justify="space-between" mt={2} fontSize="xs" color="gray.600">
+                  <Text>{job.linhas_processadas} / {job.total_estimado} linhas • {job.sucessos} criados • {job.atualizados} atualizados • {job.total_erros} erros</Text>
+                  <Text>{job.linhas_por_segundo ? `${job.linhas_por_segundo} linhas/s` : ''}{job.eta_segundos != null ? ` • ~${Math.ceil(job.eta_segundos)}s` : ''}</Text>
+                </HStack>
+                <Button size="xs" mt={2} variant="outline" colorScheme="red" onClick={handleCancelar}>Cancelar</Button>
+              </Box>
+            )}
+
             {report && (
               <Box bg="gray.50" p={3} borderRadius="md" w="100%">
                 <Text fontWeight="bold" color="green.600">{report.msg}</Text>
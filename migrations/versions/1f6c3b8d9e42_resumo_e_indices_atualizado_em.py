@@ -0,0 +1,44 @@
+"""resumo da auditoria e índices de atualizado_em
+
+Objetos criados pelas otimizações depois do estado inicial: a tabela
+audit_resumo (contagens diárias das estatísticas da auditoria; preencha com
+`flask auditoria reconstruir-resumo` num banco com logs) e os índices de
+atualizado_em usados pelo /api/sync e pela paginação por data. Tudo com IF
+NOT EXISTS, para bancos criados por db.create_all.
+
+Revision ID: 1f6c3b8d9e42
+Revises: e3dd3e5875b0
+Create Date: 2026-10-18 17:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f6c3b8d9e42'
+down_revision = 'e3dd3e5875b0'
+branch_labels = None
+depends_on = None
+
+TABELAS_SINCRONIZADAS = ('assets', 'celulares', 'emails', 'softwares')
+
+
+def upgrade():
+    op.create_table('audit_resumo',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('acao', sa.String(length=50), nullable=False),
+    sa.Column('usuario_nome', sa.String(length=120), nullable=False),
+    sa.Column('entidade', sa.String(length=50), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'acao', 'usuario_nome', 'entidade'),
+    if_not_exists=True
+    )
+    for tabela in TABELAS_SINCRONIZADAS:
+        op.create_index(f'ix_{tabela}_atualizado_em', tabela, ['atualizado_em'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for tabela in reversed(TABELAS_SINCRONIZADAS):
+        op.drop_index(f'ix_{tabela}_atualizado_em', table_name=tabela, if_exists=True)
+    op.drop_table('audit_resumo', if_exists=True)
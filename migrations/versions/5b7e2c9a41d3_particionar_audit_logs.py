@@ -0,0 +1,123 @@
+"""particionar audit_logs por mês
+
+audit_logs vira uma tabela particionada por RANGE ("timestamp"), com uma
+partição por mês (audit_logs_AAAA_MM) e uma partição padrão para o que cair
+fora delas. As partições seguintes são criadas por
+`flask auditoria particoes` e as antigas arquivadas por
+`flask auditoria arquivar`.
+
+Só se aplica ao PostgreSQL.
+
+Revision ID: 5b7e2c9a41d3
+Revises: 1f6c3b8d9e42
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9a41d3'
+down_revision = '1f6c3b8d9e42'
+branch_labels = None
+depends_on = None
+
+MESES_A_FRENTE = 3
+
+COLUNAS = ('id, usuario_id, usuario_nome, acao, entidade, entidade_id, descricao, '
+           'dados_antes, dados_depois, ip_address, "timestamp"')
+
+
+def _proximo_mes(dia):
+    return date(dia.year + (dia.month == 12), dia.month % 12 + 1, 1)
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    particionada = conn.execute(sa.text(
+        "SELECT relkind = 'p' FROM pg_class WHERE relname = 'audit_logs'"
+    )).scalar()
+    if particionada:
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legado")
+    op.execute("ALTER TABLE audit_logs_legado RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legado_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_audit_logs_timestamp RENAME TO ix_audit_logs_legado_timestamp")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+
+    # A chave de partição precisa fazer parte da chave primária
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            usuario_id INTEGER REFERENCES usuarios (id),
+            usuario_nome VARCHAR(120),
+            acao VARCHAR(50) NOT NULL,
+            entidade VARCHAR(50) NOT NULL,
+            entidade_id VARCHAR(50),
+            descricao TEXT,
+            dados_antes JSON,
+            dados_depois JSON,
+            ip_address VARCHAR(50),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('CREATE INDEX ix_audit_logs_timestamp ON audit_logs ("timestamp")')
+    op.execute("CREATE TABLE audit_logs_padrao PARTITION OF audit_logs DEFAULT")
+
+    primeiro = conn.execute(sa.text('SELECT min("timestamp") FROM audit_logs_legado')).scalar()
+    hoje = date.today()
+    mes = date((primeiro or hoje).year, (primeiro or hoje).month, 1)
+    ultimo = date(hoje.year, hoje.month, 1)
+    for _ in range(MESES_A_FRENTE):
+        ultimo = _proximo_mes(ultimo)
+    while mes <= ultimo:
+        seguinte = _proximo_mes(mes)
+        op.execute(
+            f"CREATE TABLE audit_logs_{mes:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{seguinte.isoformat()}')"
+        )
+        mes = seguinte
+
+    op.execute(f"""
+        INSERT INTO audit_logs ({COLUNAS})
+        SELECT id, usuario_id, usuario_nome, acao, entidade, entidade_id, descricao,
+               dados_antes, dados_depois, ip_address, COALESCE("timestamp", now())
+        FROM audit_logs_legado
+    """)
+    op.execute("DROP TABLE audit_logs_legado")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_particionada")
+    op.execute("ALTER INDEX ix_audit_logs_timestamp RENAME TO ix_audit_logs_particionada_timestamp")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq') PRIMARY KEY,
+            usuario_id INTEGER REFERENCES usuarios (id),
+            usuario_nome VARCHAR(120),
+            acao VARCHAR(50) NOT NULL,
+            entidade VARCHAR(50) NOT NULL,
+            entidade_id VARCHAR(50),
+            descricao TEXT,
+            dados_antes JSON,
+            dados_depois JSON,
+            ip_address VARCHAR(50),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute('CREATE INDEX ix_audit_logs_timestamp ON audit_logs ("timestamp")')
+    op.execute(f"INSERT INTO audit_logs ({COLUNAS}) SELECT {COLUNAS} FROM audit_logs_particionada")
+    # Remove a tabela particionada junto com todas as partições
+    op.execute("DROP TABLE audit_logs_particionada CASCADE")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
@@ -0,0 +1,38 @@
+"""índices compostos da auditoria
+
+(entidade, entidade_id, "timestamp" DESC) para o histórico de um registro e
+(usuario_nome, "timestamp" DESC) para os logs de um usuário. Na tabela
+particionada o índice é criado em todas as partições (e nas futuras).
+
+Revision ID: 8c1f4d2e7a90
+Revises: 5b7e2c9a41d3
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f4d2e7a90'
+down_revision = '5b7e2c9a41d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_audit_logs_entidade_timestamp', 'audit_logs',
+        ['entidade', 'entidade_id', sa.text('"timestamp" DESC')],
+        unique=False, if_not_exists=True
+    )
+    op.create_index(
+        'ix_audit_logs_usuario_timestamp', 'audit_logs',
+        ['usuario_nome', sa.text('"timestamp" DESC')],
+        unique=False, if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_usuario_timestamp', table_name='audit_logs', if_exists=True)
+    op.drop_index('ix_audit_logs_entidade_timestamp', table_name='audit_logs', if_exists=True)
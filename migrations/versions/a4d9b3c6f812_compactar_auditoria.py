@@ -0,0 +1,293 @@
+"""compactar logs de auditoria
+
+Converte o histórico para o formato compacto: cada atualização, antes
+gravada como um ALTERACAO/ADICAO/REMOCAO por campo mais um ATUALIZACAO com o
+documento inteiro, vira um único ATUALIZACAO com só as chaves alteradas
+(dados_antes = valores antigos, dados_depois = valores novos). Senhas
+gravadas nos logs de e-mail são mascaradas.
+
+As linhas de uma edição antiga não compartilham o instante (cada uma tinha
+o seu datetime.now()): são ligadas pela ordem dos ids do registro, ver
+_eventos. Edições sem nenhuma diferença real são apagadas.
+
+O downgrade recria as linhas por campo, mas não o documento completo do
+ATUALIZACAO nem as senhas.
+
+Revision ID: a4d9b3c6f812
+Revises: 8c1f4d2e7a90
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9b3c6f812'
+down_revision = '8c1f4d2e7a90'
+branch_labels = None
+depends_on = None
+
+LOTE = 1000
+JANELA = timedelta(seconds=5)  # intervalo máximo entre linhas da mesma edição
+MASCARA = '********'
+POR_CAMPO = ('ALTERACAO', 'ADICAO', 'REMOCAO')
+
+audit_logs = sa.table(
+    'audit_logs',
+    sa.column('id', sa.Integer),
+    sa.column('usuario_id', sa.Integer),
+    sa.column('usuario_nome', sa.String),
+    sa.column('acao', sa.String),
+    sa.column('entidade', sa.String),
+    sa.column('entidade_id', sa.String),
+    sa.column('descricao', sa.Text),
+    sa.column('dados_antes', sa.JSON),
+    sa.column('dados_depois', sa.JSON),
+    sa.column('ip_address', sa.String),
+    sa.column('timestamp', sa.DateTime),
+)
+
+
+def _sem_senha(dados):
+    if not dados or not dados.get('senha'):
+        return dados
+    return {**dados, 'senha': MASCARA}
+
+
+def _resumo_antigo(linha):
+    return linha['acao'] == 'ATUALIZACAO' and 'campos_alterados' in (linha['dados_antes'] or {})
+
+
+def _mesma_edicao(anterior, linha):
+    return (anterior['entidade'], anterior['entidade_id'], anterior['usuario_nome']) == \
+        (linha['entidade'], linha['entidade_id'], linha['usuario_nome']) \
+        and abs(linha['timestamp'] - anterior['timestamp']) <= JANELA
+
+
+def _eventos(conn, condicao):
+    """
+    Linhas agrupadas por edição, na ordem de gravação de cada registro.
+
+    O formato antigo gravava, em sequência, um ALTERACAO/ADICAO/REMOCAO por
+    campo e depois o ATUALIZACAO de resumo, cada um com o seu datetime.now():
+    o instante não se repete entre as linhas de uma edição. O que as liga é
+    a ordem dos ids do mesmo registro e usuário; as linhas por campo são do
+    resumo que vem logo depois delas (com no máximo JANELA entre uma linha e
+    a seguinte). Linhas por campo sem resumo formam um evento próprio; as
+    demais linhas saem uma a uma.
+    """
+    consulta = (sa.select(audit_logs).where(condicao)
+                .order_by(audit_logs.c.entidade, audit_logs.c.entidade_id, audit_logs.c.id)
+                .execution_options(yield_per=LOTE))
+    pendentes = []
+    for linha in conn.execute(consulta).mappings():
+        linha = dict(linha)
+        if pendentes and not _mesma_edicao(pendentes[-1], linha):
+            yield pendentes
+            pendentes = []
+        if linha['acao'] in POR_CAMPO:
+            pendentes.append(linha)
+        elif _resumo_antigo(linha) and pendentes:
+            yield pendentes + [linha]
+            pendentes = []
+        else:
+            yield [linha]
+    if pendentes:
+        yield pendentes
+
+
+def _nome_campo(campo_alterado):
+    # "softwares (+)" -> "softwares"
+    return campo_alterado[:-4] if campo_alterado.endswith((' (+)', ' (-)')) else campo_alterado
+
+
+def _compactar(evento, documento_anterior):
+    """
+    Retorna (linha mantida com o diff, ids apagados), ou None se o evento não
+    é do formato antigo. Os valores antigos vêm das linhas ALTERACAO; para
+    listas e para resumos sem linhas por campo, do documento anterior do
+    registro (criação ou resumo anterior), quando conhecido. Um evento sem
+    nenhuma diferença real é apagado por inteiro (linha mantida None).
+    """
+    resumo = next((linha for linha in evento if _resumo_antigo(linha)), None)
+    por_campo = [linha for linha in evento if linha['acao'] in POR_CAMPO]
+    if not resumo and not por_campo:
+        return None
+
+    documento = (resumo['dados_depois'] or {}) if resumo else {}
+    anterior = documento_anterior or {}
+    antes, depois, listas = {}, {}, {}
+    for linha in por_campo:
+        if linha['acao'] == 'ALTERACAO':
+            antes.update(linha['dados_antes'] or {})
+            depois.update(linha['dados_depois'] or {})
+        elif linha['acao'] == 'ADICAO':
+            dados = linha['dados_depois'] or {}
+            listas.setdefault(dados.get('campo'), ([], []))[0].extend(dados.get('itens_adicionados') or [])
+        else:
+            dados = linha['dados_antes'] or {}
+            listas.setdefault(dados.get('campo'), ([], []))[1].extend(dados.get('itens_removidos') or [])
+
+    for campo, (adicionados, removidos) in listas.items():
+        velha = anterior.get(campo)
+        nova = documento.get(campo)
+        if not isinstance(nova, list):
+            nova = [item for item in velha if item not in removidos] + adicionados \
+                if isinstance(velha, list) else adicionados
+        if not isinstance(velha, list):
+            # Sem o documento anterior: a lista nova sem os adicionados e com os removidos
+            velha = [item for item in nova if item not in adicionados] + removidos
+        antes[campo] = velha
+        depois[campo] = nova
+
+    if resumo and not por_campo:
+        # Resumo sem as linhas por campo: o diff sai dos documentos completos
+        for campo in map(_nome_campo, resumo['dados_antes']['campos_alterados']):
+            if campo in documento:
+                antes[campo] = anterior.get(campo)
+                depois[campo] = documento[campo]
+
+    for campo in [campo for campo in depois if antes.get(campo) == depois[campo]]:
+        antes.pop(campo, None)
+        depois.pop(campo)
+
+    ids = [linha['id'] for linha in evento]
+    if not depois:
+        return None, ids
+
+    mantida = resumo or por_campo[0]
+    return {
+        'b_id': mantida['id'],
+        'acao': 'ATUALIZACAO',
+        'descricao': resumo['descricao'] if resumo else 'Registro atualizado',
+        'dados_antes': _sem_senha(antes),
+        'dados_depois': _sem_senha(depois),
+    }, [i for i in ids if i != mantida['id']]
+
+
+def _documento_apos(documento, evento):
+    """Documento completo do registro depois do evento, quando dá para saber."""
+    for linha in evento:
+        if linha['acao'] == 'CRIACAO' or _resumo_antigo(linha):
+            documento = dict(linha['dados_depois'] or {})
+        elif linha['acao'] == 'EXCLUSAO':
+            documento = None
+        elif linha['acao'] == 'ALTERACAO' and documento is not None:
+            documento.update(linha['dados_depois'] or {})
+    return documento
+
+
+def _gravar(conn, atualizar, apagar, inserir=()):
+    if atualizar:
+        conn.execute(
+            audit_logs.update().where(audit_logs.c.id == sa.bindparam('b_id')),
+            atualizar
+        )
+    if apagar:
+        conn.execute(audit_logs.delete().where(audit_logs.c.id.in_(apagar)))
+    if inserir:
+        conn.execute(audit_logs.insert(), list(inserir))
+
+
+def _reconstruir_resumo(conn):
+    """audit_resumo conta linhas por ação; só é refeito se estiver em uso."""
+    inspector = sa.inspect(conn)
+    if not inspector.has_table('audit_resumo'):
+        return
+    if conn.execute(sa.text('SELECT 1 FROM audit_resumo LIMIT 1')).first() is None:
+        return
+    op.execute('DELETE FROM audit_resumo')
+    op.execute("""
+        INSERT INTO audit_resumo (dia, acao, usuario_nome, entidade, total)
+        SELECT date("timestamp"), acao, COALESCE(usuario_nome, ''), entidade, count(*)
+        FROM audit_logs
+        GROUP BY date("timestamp"), acao, COALESCE(usuario_nome, ''), entidade
+    """)
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Criações entram só para fornecer o documento anterior das listas
+    condicao = sa.or_(audit_logs.c.acao.in_(POR_CAMPO + ('ATUALIZACAO', 'CRIACAO')),
+                      audit_logs.c.entidade == 'Email')
+
+    atualizar, apagar = [], []
+    registro, documento = None, None
+    for evento in _eventos(conn, condicao):
+        if (evento[0]['entidade'], evento[0]['entidade_id']) != registro:
+            registro, documento = (evento[0]['entidade'], evento[0]['entidade_id']), None
+        compactado = _compactar(evento, documento)
+        documento = _documento_apos(documento, evento)
+        if compactado:
+            linha, ids = compactado
+            if linha:
+                atualizar.append(linha)
+            apagar.extend(ids)
+        else:
+            for linha in evento:
+                # Criações/exclusões de e-mail guardavam o documento com a senha
+                if linha['acao'] not in POR_CAMPO + ('ATUALIZACAO',) and (
+                        _sem_senha(linha['dados_antes']) != linha['dados_antes']
+                        or _sem_senha(linha['dados_depois']) != linha['dados_depois']):
+                    atualizar.append({
+                        'b_id': linha['id'], 'acao': linha['acao'], 'descricao': linha['descricao'],
+                        'dados_antes': _sem_senha(linha['dados_antes']),
+                        'dados_depois': _sem_senha(linha['dados_depois']),
+                    })
+        if len(atualizar) + len(apagar) >= LOTE:
+            _gravar(conn, atualizar, apagar)
+            atualizar, apagar = [], []
+    _gravar(conn, atualizar, apagar)
+    _reconstruir_resumo(conn)
+
+
+def _expandir(linha):
+    """Linhas por campo de um ATUALIZACAO compacto e o diff do resumo."""
+    antes, depois = linha['dados_antes'] or {}, linha['dados_depois'] or {}
+    base = {coluna: linha[coluna] for coluna in
+            ('usuario_id', 'usuario_nome', 'entidade', 'entidade_id', 'ip_address', 'timestamp')}
+    campos_alterados, linhas = [], []
+    for chave, valor_novo in depois.items():
+        valor_antigo = antes.get(chave)
+        if isinstance(valor_novo, list) and isinstance(valor_antigo, list):
+            adicionados = [item for item in valor_novo if item not in valor_antigo]
+            removidos = [item for item in valor_antigo if item not in valor_novo]
+            if adicionados:
+                linhas.append({**base, 'acao': 'ADICAO', 'descricao': f"Itens adicionados em {chave}",
+                               'dados_antes': None,
+                               'dados_depois': {'campo': chave, 'itens_adicionados': adicionados}})
+                campos_alterados.append(f"{chave} (+)")
+            if removidos:
+                linhas.append({**base, 'acao': 'REMOCAO', 'descricao': f"Itens removidos em {chave}",
+                               'dados_antes': {'campo': chave, 'itens_removidos': removidos},
+                               'dados_depois': None})
+                campos_alterados.append(f"{chave} (-)")
+        else:
+            linhas.append({**base, 'acao': 'ALTERACAO', 'descricao': f"Campo {chave} alterado",
+                           'dados_antes': {chave: valor_antigo}, 'dados_depois': {chave: valor_novo}})
+            campos_alterados.append(chave)
+    return campos_alterados, linhas
+
+
+def downgrade():
+    conn = op.get_bind()
+
+    atualizar, inserir = [], []
+    for evento in _eventos(conn, audit_logs.c.acao == 'ATUALIZACAO'):
+        for linha in evento:
+            if 'campos_alterados' in (linha['dados_antes'] or {}):
+                continue
+            campos_alterados, linhas = _expandir(linha)
+            inserir.extend(linhas)
+            atualizar.append({
+                'b_id': linha['id'], 'acao': 'ATUALIZACAO', 'descricao': linha['descricao'],
+                'dados_antes': {'campos_alterados': campos_alterados},
+                'dados_depois': linha['dados_depois'],
+            })
+        if len(atualizar) + len(inserir) >= LOTE:
+            _gravar(conn, atualizar, [], inserir)
+            atualizar, inserir = [], []
+    _gravar(conn, atualizar, [], inserir)
+    _reconstruir_resumo(conn)
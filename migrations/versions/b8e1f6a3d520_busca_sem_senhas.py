@@ -0,0 +1,61 @@
+"""tirar as senhas da busca textual
+
+A coluna gerada assets.busca_texto (e o busca_documento derivado dela)
+incluía todos os valores de especificacoes, inclusive senha_bios,
+senha_windows e senha_vpn: a busca global respondia se um palpite de senha
+existia. As colunas são recriadas com a expressão atual de
+c7e2a5d9b314_busca_textual, que descarta as chaves sensíveis (e os valores
+aninhados).
+
+O downgrade recria as colunas com a expressão antiga.
+
+Revision ID: b8e1f6a3d520
+Revises: f3c9a7e1d246
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1f6a3d520'
+down_revision = 'f3c9a7e1d246'
+branch_labels = None
+depends_on = None
+
+CAMPOS_ASSETS = ('patrimonio', 'responsavel', 'setor', 'modelo', 'anydesk', 'marca',
+                 'numero_serie', 'filial', 'tipo')
+# Cópia da regra de app/services/sensiveis.py no momento desta migração
+VALORES_SEM_SENHAS = (
+    'strict $.keyvalue() ? (!(@.key like_regex "senha|password" flag "i")'
+    ' && @.value.type() != "object" && @.value.type() != "array").value'
+)
+VALORES_ANTIGOS = 'strict $.*'
+
+
+def expressao_texto(caminho=VALORES_SEM_SENHAS):
+    partes = [f"coalesce({campo}, '')" for campo in CAMPOS_ASSETS]
+    partes.append(f"coalesce(jsonb_path_query_array(especificacoes::jsonb, '{caminho}')::text, '')")
+    return "lower(" + " || ' ' || ".join(partes) + ")"
+
+
+def _recriar_colunas(texto):
+    op.execute("DROP INDEX IF EXISTS ix_assets_busca_documento")
+    op.execute("DROP INDEX IF EXISTS ix_assets_busca_texto")
+    op.execute("ALTER TABLE assets DROP COLUMN IF EXISTS busca_documento, DROP COLUMN IF EXISTS busca_texto")
+    op.execute(f"""
+        ALTER TABLE assets
+            ADD COLUMN busca_texto text GENERATED ALWAYS AS ({texto}) STORED,
+            ADD COLUMN busca_documento tsvector
+                GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {texto})) STORED
+    """)
+    op.execute("CREATE INDEX ix_assets_busca_texto ON assets USING gin (busca_texto gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_assets_busca_documento ON assets USING gin (busca_documento)")
+
+
+def upgrade():
+    _recriar_colunas(expressao_texto())
+
+
+def downgrade():
+    _recriar_colunas(expressao_texto(VALORES_ANTIGOS))
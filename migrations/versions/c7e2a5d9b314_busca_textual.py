@@ -0,0 +1,74 @@
+"""busca textual (tsvector + pg_trgm)
+
+Cada tabela pesquisável ganha duas colunas geradas: busca_texto (campos
+relevantes e os valores de especificacoes, em minúsculas) com índice GIN de
+trigramas para trechos e erros de digitação, e busca_documento (tsvector)
+com índice GIN para palavras. As colunas não fazem parte dos modelos: quem
+as usa é app/services/busca.py (a busca exige esta migração).
+
+Só se aplica ao PostgreSQL.
+
+Revision ID: c7e2a5d9b314
+Revises: a4d9b3c6f812
+Create Date: 2026-10-18 19:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a5d9b314'
+down_revision = 'a4d9b3c6f812'
+branch_labels = None
+depends_on = None
+
+# Mesmos campos de CAMPOS_BUSCA em app/services/busca.py
+CAMPOS = {
+    'assets': ('patrimonio', 'responsavel', 'setor', 'modelo', 'anydesk', 'marca',
+               'numero_serie', 'filial', 'tipo'),
+    'celulares': ('patrimonio', 'responsavel', 'modelo', 'imei', 'numero', 'operadora', 'filial'),
+    'emails': ('endereco', 'usuario', 'tipo'),
+    'softwares': ('nome', 'versao', 'tipo_licenca'),
+}
+
+# Mesma regra de app/services/sensiveis.py (PADRAO_SENSIVEL); objetos e listas
+# aninhados ficam de fora, já que podem conter chaves sensíveis
+VALORES_ESPECIFICACOES = (
+    'strict $.keyvalue() ? (!(@.key like_regex "senha|password" flag "i")'
+    ' && @.value.type() != "object" && @.value.type() != "array").value'
+)
+
+
+def expressao_texto(tabela):
+    partes = [f"coalesce({campo}, '')" for campo in CAMPOS[tabela]]
+    if tabela == 'assets':
+        # Só os valores de primeiro nível (hostname, dominio, vpn...), sem as chaves
+        # e sem as senhas (senha_bios, senha_windows...): a busca não pode servir
+        # para testar um palpite de senha
+        partes.append(f"coalesce(jsonb_path_query_array(especificacoes::jsonb, '{VALORES_ESPECIFICACOES}')::text, '')")
+    return "lower(" + " || ' ' || ".join(partes) + ")"
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for tabela in CAMPOS:
+        texto = expressao_texto(tabela)
+        op.execute(f"""
+            ALTER TABLE {tabela}
+                ADD COLUMN IF NOT EXISTS busca_texto text GENERATED ALWAYS AS ({texto}) STORED,
+                ADD COLUMN IF NOT EXISTS busca_documento tsvector
+                    GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {texto})) STORED
+        """)
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_busca_texto ON {tabela} USING gin (busca_texto gin_trgm_ops)")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_busca_documento ON {tabela} USING gin (busca_documento)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabela in CAMPOS:
+        op.execute(f"DROP INDEX IF EXISTS ix_{tabela}_busca_documento")
+        op.execute(f"DROP INDEX IF EXISTS ix_{tabela}_busca_texto")
+        op.execute(f"ALTER TABLE {tabela} DROP COLUMN IF EXISTS busca_documento, DROP COLUMN IF EXISTS busca_texto")
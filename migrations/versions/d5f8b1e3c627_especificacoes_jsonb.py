@@ -0,0 +1,78 @@
+"""especificacoes em JSONB com índice GIN
+
+assets.especificacoes passa de JSON para JSONB e ganha um índice GIN
+(jsonb_ops: atende @> e ?), usado pelos filtros spec.<chave>=valor de
+GET /api/assets. As colunas geradas da busca textual dependem de
+especificacoes e por isso são recriadas.
+
+Só se aplica ao PostgreSQL.
+
+Revision ID: d5f8b1e3c627
+Revises: c7e2a5d9b314
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f8b1e3c627'
+down_revision = 'c7e2a5d9b314'
+branch_labels = None
+depends_on = None
+
+# Mesma expressão de busca_texto da migração c7e2a5d9b314 para assets
+CAMPOS_BUSCA = ('patrimonio', 'responsavel', 'setor', 'modelo', 'anydesk', 'marca',
+                'numero_serie', 'filial', 'tipo')
+TEXTO_BUSCA = "lower(" + " || ' ' || ".join(
+    [f"coalesce({campo}, '')" for campo in CAMPOS_BUSCA]
+    + ["coalesce(jsonb_path_query_array(especificacoes::jsonb, 'strict $.*')::text, '')"]
+) + ")"
+
+
+def _tem_busca(conn):
+    return 'busca_documento' in {coluna['name'] for coluna in sa.inspect(conn).get_columns('assets')}
+
+
+def _remover_busca():
+    op.execute("DROP INDEX IF EXISTS ix_assets_busca_documento")
+    op.execute("DROP INDEX IF EXISTS ix_assets_busca_texto")
+    op.execute("ALTER TABLE assets DROP COLUMN busca_documento, DROP COLUMN busca_texto")
+
+
+def _criar_busca():
+    op.execute(f"""
+        ALTER TABLE assets
+            ADD COLUMN busca_texto text GENERATED ALWAYS AS ({TEXTO_BUSCA}) STORED,
+            ADD COLUMN busca_documento tsvector
+                GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {TEXTO_BUSCA})) STORED
+    """)
+    op.execute("CREATE INDEX ix_assets_busca_texto ON assets USING gin (busca_texto gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_assets_busca_documento ON assets USING gin (busca_documento)")
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    busca = _tem_busca(conn)
+    if busca:
+        _remover_busca()
+    op.execute("ALTER TABLE assets ALTER COLUMN especificacoes TYPE jsonb USING especificacoes::jsonb")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_assets_especificacoes ON assets USING gin (especificacoes)")
+    if busca:
+        _criar_busca()
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    busca = _tem_busca(conn)
+    if busca:
+        _remover_busca()
+    op.execute("DROP INDEX IF EXISTS ix_assets_especificacoes")
+    op.execute("ALTER TABLE assets ALTER COLUMN especificacoes TYPE json USING especificacoes::json")
+    if busca:
+        _criar_busca()
@@ -0,0 +1,35 @@
+"""contadores de versão para caches em memória
+
+Tabela versoes (chave, versao): cada conjunto de dados cacheado nos
+processos da API (por enquanto só 'filiais') tem um contador incrementado
+na mesma transação da alteração; os processos comparam com a versão que
+têm em memória para saber quando recarregar.
+
+Revision ID: e8a3c1f5b792
+Revises: d5f8b1e3c627
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3c1f5b792'
+down_revision = 'd5f8b1e3c627'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    versoes = op.create_table(
+        'versoes',
+        sa.Column('chave', sa.String(length=50), nullable=False),
+        sa.Column('versao', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('chave')
+    )
+    op.bulk_insert(versoes, [{'chave': 'filiais', 'versao': 1}])
+
+
+def downgrade():
+    op.drop_table('versoes')
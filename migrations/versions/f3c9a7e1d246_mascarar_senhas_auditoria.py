@@ -0,0 +1,82 @@
+"""mascarar senhas nos logs de auditoria
+
+A auditoria passou a mascarar qualquer chave com "senha" ou "password" no
+nome (senha_bios, senha_windows, senha_vpn...), em qualquer nível do
+documento; antes só a chave `senha` era mascarada. Esta migração aplica a
+mesma regra às linhas já gravadas.
+
+Não há downgrade: os valores originais não são recuperáveis.
+
+Revision ID: f3c9a7e1d246
+Revises: e8a3c1f5b792
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a7e1d246'
+down_revision = 'e8a3c1f5b792'
+branch_labels = None
+depends_on = None
+
+LOTE = 1000
+MASCARA = '********'
+# Cópia da regra de app/services/sensiveis.py no momento desta migração
+PADRAO_SENSIVEL = re.compile(r'senha|password', re.IGNORECASE)
+
+audit_logs = sa.table(
+    'audit_logs',
+    sa.column('id', sa.Integer),
+    sa.column('dados_antes', sa.JSON),
+    sa.column('dados_depois', sa.JSON),
+)
+
+
+def _mascarar(dados):
+    if isinstance(dados, dict):
+        return {
+            chave: (MASCARA if valor else valor) if PADRAO_SENSIVEL.search(chave) else _mascarar(valor)
+            for chave, valor in dados.items()
+        }
+    if isinstance(dados, list):
+        return [_mascarar(item) for item in dados]
+    return dados
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Filtro grosso no banco (texto do JSON); a regra exata é aplicada aqui
+    candidata = sa.or_(
+        sa.cast(audit_logs.c.dados_antes, sa.Text).op('~*')('senha|password'),
+        sa.cast(audit_logs.c.dados_depois, sa.Text).op('~*')('senha|password'),
+    )
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.select(audit_logs.c.id, audit_logs.c.dados_antes, audit_logs.c.dados_depois)
+            .where(candidata, audit_logs.c.id > ultimo_id)
+            .order_by(audit_logs.c.id)
+            .limit(LOTE)
+        ).mappings().all()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1]['id']
+
+        atualizar = []
+        for linha in linhas:
+            antes, depois = _mascarar(linha['dados_antes']), _mascarar(linha['dados_depois'])
+            if (antes, depois) != (linha['dados_antes'], linha['dados_depois']):
+                atualizar.append({'b_id': linha['id'], 'dados_antes': antes, 'dados_depois': depois})
+        if atualizar:
+            conn.execute(
+                audit_logs.update().where(audit_logs.c.id == sa.bindparam('b_id')),
+                atualizar
+            )
+
+
+def downgrade():
+    pass
@@ -38,7 +38,7 @@ def test_import_assets(token):
             
             try:
                 response = requests.post(
-                    f"{BASE_URL}/api/import/assets",
+                    f"{BASE_URL}/api/import/assets?sincrono=true",
                     files=files,
                     headers=headers,
                     timeout=30
@@ -39,7 +39,7 @@ try:
         files = {"file": f}
         
         r = requests.post(
-            f"{BASE_URL}/api/import/assets",
+            f"{BASE_URL}/api/import/assets?sincrono=true",
             files=files,
             headers=headers,
             timeout=60
@@ -0,0 +1,143 @@
+"""
+Fixtures dos testes automatizados (pytest).
+
+Os testes rodam contra um PostgreSQL descartável, nunca contra o banco de
+config.py: TEST_DATABASE_URL aponta para um servidor onde o usuário pode
+criar bancos, por exemplo
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python -m pytest
+
+Cada sessão cria um banco inventario_teste_<aleatório> (removido no fim) com
+o esquema dos modelos; cada teste recebe um app novo (caches em memória
+zerados) e as tabelas são esvaziadas ao final dele. Testes de migração usam
+`app_banco_novo`, um banco só do teste e sem esquema. Sem TEST_DATABASE_URL
+os testes são pulados.
+"""
+import io
+import os
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from flask_jwt_extended import create_access_token
+
+MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def _url_admin():
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('Defina TEST_DATABASE_URL (servidor PostgreSQL descartável) para rodar os testes')
+    return make_url(url)
+
+
+def criar_banco():
+    """Cria um banco vazio no servidor de TEST_DATABASE_URL e retorna a URL dele."""
+    admin = _url_admin()
+    nome = f"inventario_teste_{uuid.uuid4().hex[:10]}"
+    engine = create_engine(admin, isolation_level='AUTOCOMMIT')
+    with engine.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{nome}"'))
+    engine.dispose()
+    return admin.set(database=nome)
+
+
+def remover_banco(url):
+    engine = create_engine(_url_admin(), isolation_level='AUTOCOMMIT')
+    with engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{url.database}" WITH (FORCE)'))
+    engine.dispose()
+
+
+def config_testes(url, **extra):
+    return {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': url.render_as_string(hide_password=False),
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'DB_N1_MODO': 'raise',
+        'IMPORTACAO_WORKERS': 1,
+        **extra,
+    }
+
+
+@pytest.fixture(scope='session')
+def banco():
+    """Banco da sessão com o esquema dos modelos (db.create_all)."""
+    from app import create_app
+    from app.models import db
+
+    url = criar_banco()
+    app = create_app(config_testes(url))
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+    yield url
+    remover_banco(url)
+
+
+@pytest.fixture
+def app(banco, tmp_path):
+    from app import create_app
+    from app.models import db
+
+    app = create_app(config_testes(banco, AUDITORIA_ARQUIVO_DIR=str(tmp_path / 'arquivo')))
+    with app.app_context():
+        yield app
+        db.session.remove()
+        tabelas = ', '.join(tabela.name for tabela in db.metadata.sorted_tables)
+        with db.engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {tabelas} RESTART IDENTITY CASCADE"))
+        db.engine.dispose()
+
+
+@pytest.fixture
+def app_banco_novo():
+    """App num banco vazio só deste teste (removido no fim), para rodar migrações."""
+    from app import create_app
+    from app.models import db
+
+    url = criar_banco()
+    app = create_app(config_testes(url))
+    try:
+        with app.app_context():
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        remover_banco(url)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    token = create_access_token(identity='1', additional_claims={'nome': 'Teste', 'permissoes': ['admin']})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def ativos(app):
+    """25 ativos alternando entre Matriz e Filial 2, um minuto de atualizado_em entre eles."""
+    from app.models import db, Asset
+
+    agora = datetime.now()
+    for i in range(25):
+        db.session.add(Asset(
+            patrimonio=f'PG-{i:02d}', tipo='Desktop', filial='Matriz' if i % 2 else 'Filial 2',
+            responsavel=f'Pessoa {i}', atualizado_em=agora - timedelta(minutes=i)
+        ))
+    db.session.commit()
+
+
+@pytest.fixture
+def importar_csv(client, headers):
+    """Envia `conteudo` como CSV para /api/import/<tipo> no modo síncrono e devolve a resposta."""
+    def importar(tipo, conteudo, modo=None):
+        url = f'/api/import/{tipo}?sincrono=true' + (f'&mode={modo}' if modo else '')
+        dados = {'file': (io.BytesIO(conteudo.encode('utf-8')), f'{tipo}.csv')}
+        return client.post(url, data=dados, headers=headers, content_type='multipart/form-data')
+    return importar
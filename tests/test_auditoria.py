@@ -0,0 +1,83 @@
+"""Senhas na auditoria: mascaradas por padrão de nome, em qualquer nível."""
+import json
+from datetime import datetime
+import pytest
+from flask_migrate import stamp, upgrade
+from sqlalchemy import insert
+from app.models import db, AuditLog
+from app.services.sensiveis import MASCARA, ocultar_sensiveis
+from tests.conftest import MIGRACOES
+
+SEGREDOS = ('bios-123', 'win-456', 'vpn-789', 'pw-000')
+
+
+def _sem_segredos(texto):
+    return not any(segredo in texto for segredo in SEGREDOS)
+
+
+def test_ocultar_sensiveis_por_padrao_e_aninhado():
+    dados = {
+        'senha': 'x', 'Senha_BIOS': 'bios-123', 'modelo': 'A', 'senha_vazia': '',
+        'especificacoes': {'senha_windows': 'win-456', 'rede': [{'SenhaVPN': 'vpn-789'}]},
+        'admin_password': 'pw-000',
+    }
+    assert ocultar_sensiveis(dados) == {
+        'senha': MASCARA, 'Senha_BIOS': MASCARA, 'modelo': 'A', 'senha_vazia': '',
+        'especificacoes': {'senha_windows': MASCARA, 'rede': [{'SenhaVPN': MASCARA}]},
+        'admin_password': MASCARA,
+    }
+
+
+def test_edicao_e_exportacao_nao_vazam_senhas(client, headers):
+    criado = client.post('/api/assets', json={
+        'patrimonio': 'SEG-1', 'tipo': 'Desktop', 'filial': 'Matriz',
+        'especificacoes': {'senha_bios': 'bios-123'}
+    }, headers=headers).json
+    client.put(f"/api/assets/{criado['id']}", json={
+        'especificacoes': {'senha_windows': 'win-456', 'vpn': {'senha_vpn': 'vpn-789'}}
+    }, headers=headers)
+
+    gravado = json.dumps([[log.dados_antes, log.dados_depois] for log in AuditLog.query.all()])
+    assert 'SEG-1' in gravado and _sem_segredos(gravado)
+
+    # Linha gravada em claro antes do mascaramento por padrão
+    db.session.execute(insert(AuditLog), [{
+        'usuario_nome': 'Ana', 'acao': 'CRIACAO', 'entidade': 'Asset', 'entidade_id': criado['id'],
+        'descricao': 'legado', 'dados_antes': None, 'timestamp': datetime.now(),
+        'dados_depois': {'especificacoes': {'senha_bios': 'bios-123', 'admin_password': 'pw-000'}},
+    }])
+    db.session.commit()
+
+    exportado = client.get('/api/logs/export?format=jsonl', headers=headers).get_data(as_text=True)
+    assert 'legado' in exportado and _sem_segredos(exportado)
+    historico = client.get(f"/api/logs/ativo/{criado['id']}", headers=headers)
+    assert historico.status_code == 200
+    assert _sem_segredos(historico.get_data(as_text=True))
+
+
+@pytest.fixture
+def app_antes_do_mascaramento(app_banco_novo):
+    db.create_all()
+    stamp(directory=MIGRACOES, revision='e8a3c1f5b792')
+    return app_banco_novo
+
+
+def test_migracao_mascara_linhas_ja_gravadas(app_antes_do_mascaramento):
+    db.session.execute(insert(AuditLog), [
+        {'usuario_nome': 'Ana', 'acao': 'ATUALIZACAO', 'entidade': 'Asset', 'entidade_id': '1',
+         'descricao': 'x', 'timestamp': datetime.now(),
+         'dados_antes': {'especificacoes': {'senha_bios': 'bios-123'}},
+         'dados_depois': {'especificacoes': {'senha_bios': 'outra', 'modelo': 'B'}}},
+        {'usuario_nome': 'Ana', 'acao': 'ATUALIZACAO', 'entidade': 'Asset', 'entidade_id': '2',
+         'descricao': 'x', 'timestamp': datetime.now(),
+         'dados_antes': {'setor': 'TI'}, 'dados_depois': {'setor': 'RH'}},
+    ])
+    db.session.commit()
+
+    upgrade(directory=MIGRACOES, revision='f3c9a7e1d246')
+
+    db.session.expire_all()
+    logs = AuditLog.query.order_by(AuditLog.entidade_id).all()
+    assert logs[0].dados_antes == {'especificacoes': {'senha_bios': MASCARA}}
+    assert logs[0].dados_depois == {'especificacoes': {'senha_bios': MASCARA, 'modelo': 'B'}}
+    assert (logs[1].dados_antes, logs[1].dados_depois) == ({'setor': 'TI'}, {'setor': 'RH'})
@@ -0,0 +1,43 @@
+"""Busca global: senhas das especificações ficam fora do texto pesquisável."""
+import importlib.util
+import os
+import pytest
+from sqlalchemy import inspect, text
+from app.models import db, Asset
+from tests.conftest import MIGRACOES
+
+SENHA = 'segredo-bios-42'
+
+
+def _migracao(nome):
+    caminho = os.path.join(MIGRACOES, 'versions', f'{nome}.py')
+    especificacao = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(especificacao)
+    especificacao.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture
+def ativo(app):
+    db.session.add(Asset(patrimonio='BUSCA-1', tipo='Desktop', filial='Matriz', especificacoes={
+        'hostname': 'pc-financeiro', 'senha_bios': SENHA, 'Senha_Windows': SENHA,
+        'admin_password': SENHA, 'rede': {'senha_vpn': SENHA},
+    }))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('expressao', [
+    lambda: _migracao('c7e2a5d9b314_busca_textual').expressao_texto('assets'),
+    lambda: _migracao('b8e1f6a3d520_busca_sem_senhas').expressao_texto(),
+])
+def test_texto_indexado_nao_tem_senhas(ativo, expressao):
+    texto = db.session.execute(text(f"SELECT {expressao()} FROM assets")).scalar()
+    assert 'pc-financeiro' in texto
+    assert SENHA not in texto
+
+
+def test_busca_por_senha_nao_acha_nada(client, headers, ativo):
+    if 'busca_documento' not in {coluna['name'] for coluna in inspect(db.engine).get_columns('assets')}:
+        pytest.skip('Banco sem a migração de busca textual (pg_trgm)')
+    assert client.get('/api/search?q=pc-financeiro', headers=headers).json['itens']
+    assert client.get(f'/api/search?q={SENHA}', headers=headers).json['itens'] == []
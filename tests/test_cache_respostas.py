@@ -0,0 +1,91 @@
+"""Invalidação do cache de respostas (X-Cache) pelas gravações."""
+import pytest
+from app.models import db, Asset, Email, Software
+
+
+@pytest.fixture
+def ativo(app):
+    asset = Asset(patrimonio='CACHE-1', tipo='Desktop', filial='Matriz', responsavel='Ana')
+    asset.emails.append(Email(endereco='ana@empresa.com', tipo='google'))
+    asset.softwares.append(Software(nome='Office'))
+    db.session.add(asset)
+    db.session.commit()
+    return asset.id
+
+
+def _get(client, headers, url):
+    resposta = client.get(url, headers=headers)
+    assert resposta.status_code == 200
+    return resposta.headers['X-Cache'], resposta.json
+
+
+def test_gravacao_invalida_a_lista(client, headers, ativo):
+    assert _get(client, headers, '/api/assets')[0] == 'MISS'
+    assert _get(client, headers, '/api/assets')[0] == 'HIT'
+
+    client.put(f'/api/assets/{ativo}', json={'setor': 'TI'}, headers=headers)
+    cache, itens = _get(client, headers, '/api/assets')
+    assert cache == 'MISS'
+    assert itens[0]['setor'] == 'TI'
+
+
+def test_gravacao_desfeita_nao_invalida(app, client, headers, ativo):
+    _get(client, headers, '/api/assets')
+    from app.services.audit import registrar_historico
+    asset = db.session.get(Asset, ativo)
+    registrar_historico(asset.id, asset.to_dict(), {**asset.to_dict(), 'setor': 'X'})
+    db.session.rollback()
+    assert _get(client, headers, '/api/assets')[0] == 'HIT'
+
+
+@pytest.mark.parametrize('colecao', ['emails', 'softwares'])
+def test_mudar_filial_do_ativo_invalida_as_listas_filhas(client, headers, ativo, colecao):
+    cache, itens = _get(client, headers, f'/api/{colecao}?filial=Matriz')
+    assert (cache, len(itens)) == ('MISS', 1)
+
+    client.put(f'/api/assets/{ativo}', json={'filial': 'Filial 2'}, headers=headers)
+
+    cache, itens = _get(client, headers, f'/api/{colecao}?filial=Matriz')
+    assert (cache, itens) == ('MISS', [])
+
+
+def test_inativar_ativo_invalida_as_listas_filhas(client, headers, ativo):
+    _get(client, headers, '/api/emails')
+    client.delete(f'/api/assets/{ativo}', headers=headers)
+    assert _get(client, headers, '/api/emails')[0] == 'MISS'
+
+
+def test_id_com_zeros_a_esquerda_e_invalidado_junto(client, headers, ativo):
+    _get(client, headers, f'/api/assets/{ativo}')
+    _get(client, headers, f'/api/assets/00{ativo}')
+    assert _get(client, headers, f'/api/assets/00{ativo}')[0] == 'HIT'
+
+    client.put(f'/api/assets/{ativo}', json={'setor': 'Compras'}, headers=headers)
+
+    for url in (f'/api/assets/{ativo}', f'/api/assets/00{ativo}'):
+        cache, dados = _get(client, headers, url)
+        assert (cache, dados['setor']) == ('MISS', 'Compras')
+
+
+def test_upsert_que_cria_filhos_de_ativo_existente_invalida(client, headers, ativo, importar_csv):
+    _get(client, headers, '/api/emails')
+    _get(client, headers, '/api/softwares')
+    _get(client, headers, f'/api/assets/{ativo}')
+
+    resultado = importar_csv('assets',
+                             "PAT;Zimbra;PAT Software 1;Software 1\nCACHE-1;ana@zimbra.com;SW-9;Antivírus\n",
+                             modo='upsert').json
+    assert resultado['atualizados'] == 1
+
+    assert len(_get(client, headers, '/api/emails')[1]) == 2
+    assert len(_get(client, headers, '/api/softwares')[1]) == 2
+    cache, dados = _get(client, headers, f'/api/assets/{ativo}')
+    assert cache == 'MISS'
+    assert len(dados['emails']) == 2
+
+
+def test_importacao_de_emails_invalida(client, headers, ativo, importar_csv):
+    _get(client, headers, '/api/emails')
+    resultado = importar_csv('emails', "PAT_PC;Conta Google\nCACHE-1;bia@empresa.com\n").json
+    assert resultado['sucessos'] == 1
+    assert len(_get(client, headers, '/api/emails')[1]) == 2
@@ -0,0 +1,42 @@
+"""
+Regressão de N+1: as listagens devem emitir um número constante de
+consultas, não importa quantas linhas retornem (cabeçalho X-DB-Queries do
+monitoramento; DB_N1_MODO=raise nos testes).
+"""
+import pytest
+from app.models import db, Asset, Email, Software
+
+
+@pytest.fixture
+def ativos(app):
+    for i in range(30):
+        asset = Asset(patrimonio=f'N1-{i}', tipo='Desktop', filial='Matriz')
+        asset.softwares.append(Software(nome=f'Office {i}'))
+        asset.emails.append(Email(endereco=f'n1-{i}@empresa.com', tipo='google'))
+        db.session.add(asset)
+    db.session.commit()
+    return db.session.query(Asset.id).order_by(Asset.id).first().id
+
+
+# Rota -> máximo de consultas (as listagens com GET condicional fazem antes o
+# agregado count/max da impressão da coleção)
+@pytest.mark.parametrize('url, maximo', [
+    ('/api/softwares', 2),
+    ('/api/emails', 2),
+    ('/api/celulares', 2),
+    ('/api/assets', 2),
+    ('/api/softwares/verificar-vencimento?dias=3650', 1),
+])
+def test_listagens_com_consultas_constantes(client, headers, ativos, url, maximo):
+    resposta = client.get(url, headers=headers)
+    assert resposta.status_code == 200
+    assert int(resposta.headers['X-DB-Queries']) <= maximo
+
+
+def test_detalhe_do_ativo_com_relacionamentos(client, headers, ativos):
+    # Asset + softwares + emails
+    resposta = client.get(f'/api/assets/{ativos}', headers=headers)
+    assert resposta.status_code == 200
+    assert len(resposta.json['softwares']) == 1
+    assert len(resposta.json['emails']) == 1
+    assert int(resposta.headers['X-DB-Queries']) <= 3
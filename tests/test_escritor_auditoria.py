@@ -0,0 +1,20 @@
+"""Auditoria assíncrona: gravação em lote pelo EscritorAuditoria."""
+from datetime import datetime
+from app.models import AuditLog
+from app.services.audit import EscritorAuditoria
+
+
+def _linha(entidade_id, acao='CRIACAO'):
+    return {'usuario_nome': 'Ana', 'acao': acao, 'entidade': 'Asset', 'entidade_id': entidade_id,
+            'descricao': 'x', 'dados_antes': None, 'dados_depois': None, 'timestamp': datetime.now()}
+
+
+def test_linha_invalida_nao_derruba_o_lote(app):
+    escritor = EscritorAuditoria(app)
+    tarefas = [lambda: [_linha('1')], lambda: [_linha('2', acao=None)], lambda: [_linha('3')]]
+
+    escritor._gravar(tarefas)
+
+    assert sorted(log.entidade_id for log in AuditLog.query.all()) == ['1', '3']
+    metricas = escritor.metricas()
+    assert (metricas['gravados'], metricas['falhas']) == (2, 1)
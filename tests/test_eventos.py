@@ -0,0 +1,72 @@
+"""Eventos SSE: um evento agregado por commit."""
+import queue
+import pytest
+from app.services.events import get_broadcaster, MAXIMO_IDS_POR_EVENTO
+
+
+@pytest.fixture
+def fila(app):
+    broadcaster = get_broadcaster()
+    fila = broadcaster.assinar()
+    yield fila
+    broadcaster.cancelar(fila)
+
+
+def _eventos(fila):
+    eventos = []
+    while True:
+        try:
+            eventos.append(fila.get_nowait())
+        except queue.Empty:
+            return eventos
+
+
+def test_importacao_publica_um_evento_com_todos_os_ids(importar_csv, fila):
+    linhas = ''.join(f'EV-{i};Desktop;Matriz\n' for i in range(5))
+    assert importar_csv('assets', 'PAT;Tipo;Filial\n' + linhas).json['sucessos'] == 5
+
+    eventos = _eventos(fila)
+    assert len(eventos) == 1
+    [alteracao] = eventos[0]['alteracoes']
+    assert (alteracao['entidade'], alteracao['acao'], alteracao['total']) == ('Asset', 'criado', 5)
+    assert len(set(alteracao['ids'])) == 5
+
+
+def test_lote_grande_manda_so_o_total(importar_csv, fila):
+    total = MAXIMO_IDS_POR_EVENTO + 1
+    linhas = ''.join(f'EV-{i};Desktop;Matriz\n' for i in range(total))
+    importar_csv('assets', 'PAT;Tipo;Filial\n' + linhas)
+
+    [evento] = _eventos(fila)
+    assert evento['alteracoes'] == [{'entidade': 'Asset', 'acao': 'criado', 'ids': None, 'total': total}]
+
+
+def test_stream_so_aceita_o_token_curto_dos_eventos(client, headers):
+    token_login = headers['Authorization'].split()[1]
+    assert client.get(f'/api/events?jwt={token_login}').status_code == 401
+    assert client.get('/api/events', headers=headers).status_code == 401
+
+    token = client.post('/api/events/token', headers=headers).json['token']
+    resposta = client.get(f'/api/events?jwt={token}')
+    assert resposta.status_code == 200
+    assert next(resposta.response) == b'retry: 5000\n\n'
+    resposta.close()
+
+
+def test_token_dos_eventos_nao_abre_outras_rotas(client, headers):
+    token = client.post('/api/events/token', headers=headers).json['token']
+    resposta = client.get('/api/assets', headers={'Authorization': f'Bearer {token}'})
+    assert resposta.status_code == 401
+    assert client.post('/api/events/token', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+
+def test_stream_recusa_conexoes_acima_do_limite(app, client, headers, fila):
+    broadcaster = get_broadcaster()
+    broadcaster.maximo_assinantes = 1  # a fixture `fila` já ocupa a vaga
+    try:
+        token = client.post('/api/events/token', headers=headers).json['token']
+        resposta = client.get(f'/api/events?jwt={token}')
+        assert resposta.status_code == 503
+        assert resposta.headers['Retry-After']
+    finally:
+        broadcaster.maximo_assinantes = None
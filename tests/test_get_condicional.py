@@ -0,0 +1,33 @@
+"""GET condicional (ETag / 304) das listagens."""
+
+
+def test_get_condicional_responde_304_ate_a_colecao_mudar(app, client, headers, ativos):
+    app.extensions.pop('cache_respostas', None)  # só a camada condicional
+    primeira = client.get('/api/celulares', headers=headers)
+    etag = primeira.headers['ETag']
+
+    repetida = client.get('/api/celulares', headers={**headers, 'If-None-Match': etag})
+    assert repetida.status_code == 304
+
+    resposta = client.get('/api/assets', headers=headers)
+    etag_assets = resposta.headers['ETag']
+    assert client.put(f"/api/assets/{resposta.json[0]['id']}", json={'setor': 'TI'}, headers=headers).status_code == 200
+    depois = client.get('/api/assets', headers={**headers, 'If-None-Match': etag_assets})
+    assert depois.status_code == 200
+    assert depois.headers['ETag'] != etag_assets
+
+
+def test_pagina_nao_roda_o_agregado_da_colecao(app, client, headers, ativos):
+    app.extensions.pop('cache_respostas', None)
+    resposta = client.get('/api/assets?limite=5', headers=headers)
+    # Só o SELECT da página: nada de count/max sobre a tabela inteira
+    assert resposta.headers['X-DB-Queries'] == '1'
+
+    repetida = client.get('/api/assets?limite=5', headers={**headers, 'If-None-Match': resposta.headers['ETag']})
+    assert repetida.status_code == 304
+
+    ultimo = resposta.json['itens'][-1]['id']
+    client.put(f'/api/assets/{ultimo}', json={'setor': 'Outro'}, headers=headers)
+    mudou = client.get('/api/assets?limite=5', headers={**headers, 'If-None-Match': resposta.headers['ETag']})
+    assert mudou.status_code == 200
+    assert mudou.json['itens'][-1]['setor'] == 'Outro'
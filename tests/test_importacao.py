@@ -0,0 +1,71 @@
+"""Importação CSV: lotes de e-mails, instantes de gravação por lote e jobs em segundo plano."""
+import io
+import time
+from app.models import db, Asset, AuditLog, Email
+
+
+CSV_ASSETS = "PAT;Tipo;Modelo;Filial;Em uso;Hostname\nIMP-1;Desktop;Optiplex;Matriz;Ana;pc-1\nIMP-2;Notebook;Latitude;Matriz;Bia;pc-2\n"
+
+
+CSV_EMAILS = ("PAT_PC;PAT_CEL;Endereço;Conta Google;Senha Google;Conta Zimbra\n"
+              "IMP-1;;ana@empresa.com;Sim;s3nha;ana@zimbra.com\n"
+              "IMP-2;;ana@empresa.com;Sim;;\n"
+              "NAO-EXISTE;;bia@empresa.com;Sim;;\n"
+              ";CEL-1;cel@empresa.com;Sim;;\n")
+
+
+def test_emails_em_lote_com_erros_por_linha_e_auditoria(importar_csv):
+    importar_csv('assets', CSV_ASSETS)
+    importar_csv('celulares', "PAT;Filial\nCEL-1;Matriz\n")
+
+    resposta = importar_csv('emails', CSV_EMAILS).json
+    assert resposta['sucessos'] == 3
+    assert resposta['total_erros'] == 2
+    assert 'Linha 3: ana@empresa.com repetido no arquivo' in resposta['erros']
+    assert any(erro.startswith('Linha 4:') and 'NAO-EXISTE' in erro for erro in resposta['erros'])
+
+    celular = Email.query.filter_by(endereco='cel@empresa.com').one()
+    assert (celular.asset_id, celular.observacoes) == (None, 'Celular CEL-1')
+    logs = AuditLog.query.filter_by(entidade='Email', acao='CRIACAO').all()
+    assert len(logs) == 3
+    assert all(log.usuario_nome == 'Teste' for log in logs)
+
+    # Endereço é único: o mesmo arquivo de novo só gera erros, qualquer que seja o tipo
+    repetida = importar_csv('emails', CSV_EMAILS.replace('Conta Google', 'Conta Microsoft')).json
+    assert repetida['sucessos'] == 0
+    assert any('ana@empresa.com (microsoft) já existe' in erro for erro in repetida['erros'])
+
+
+def test_cada_lote_de_ativos_leva_o_instante_da_propria_gravacao(app):
+    from datetime import datetime
+    from app.services.importacao import importar_assets
+    marcas = {}
+
+    def linhas():
+        for i in range(4):
+            if i == 2:
+                marcas['segundo_lote'] = datetime.now()  # depois do commit do primeiro lote
+            yield i + 2, {'PAT': f'LOTE-{i}', 'Tipo': 'Desktop'}
+
+    assert importar_assets(linhas(), tamanho_lote=2)['sucessos'] == 4
+    datas = dict(db.session.query(Asset.patrimonio, Asset.atualizado_em))
+    assert datas['LOTE-0'] == datas['LOTE-1'] < marcas['segundo_lote']
+    assert datas['LOTE-2'] == datas['LOTE-3'] >= marcas['segundo_lote']
+
+
+def test_job_so_e_visto_e_cancelado_por_quem_enviou(client, headers):
+    from flask_jwt_extended import create_access_token
+    dados = {'file': (io.BytesIO(b"PAT;Tipo\nJOB-1;Desktop\n"), 'assets.csv')}
+    job_id = client.post('/api/import/assets', data=dados, headers=headers,
+                         content_type='multipart/form-data').json['job_id']
+
+    outro = {'Authorization': f"Bearer {create_access_token(identity='2', additional_claims={'permissoes': ['view']})}"}
+    assert client.get(f'/api/import/jobs/{job_id}', headers=outro).status_code == 403
+    assert client.post(f'/api/import/jobs/{job_id}/cancelar', headers=outro).status_code == 403
+
+    for _ in range(50):
+        job = client.get(f'/api/import/jobs/{job_id}', headers=headers).json
+        if job['finalizado_em']:
+            break
+        time.sleep(0.1)
+    assert job['status'] == 'concluido'
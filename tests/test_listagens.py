@@ -0,0 +1,7 @@
+"""Filtros de texto das listagens."""
+
+
+def test_filtro_de_texto_trata_curingas_como_literais(client, headers, ativos):
+    assert client.get('/api/assets?responsavel=Pessoa%201', headers=headers).json  # Pessoa 1, 10..19
+    assert client.get('/api/assets?responsavel=_', headers=headers).json == []
+    assert client.get('/api/assets?patrimonio=PG-%25', headers=headers).json == []
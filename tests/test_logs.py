@@ -0,0 +1,40 @@
+"""Logs de auditoria: listagem paginada de /api/logs e histórico de um registro."""
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.models import db, AuditLog
+
+
+def test_filtro_por_campo_le_mais_logs_ate_encher_a_pagina(client, headers):
+    agora = datetime.now()
+    base = {'usuario_nome': 'Ana', 'acao': 'ATUALIZACAO', 'entidade': 'Asset', 'entidade_id': '1'}
+    linhas = [
+        # Os 4 mais recentes só trocam o setor; os 3 mais antigos adicionam um item à lista
+        {**base, 'descricao': 'setor', 'timestamp': agora - timedelta(minutes=i),
+         'dados_antes': {'setor': f'S{i}'}, 'dados_depois': {'setor': f'S{i + 1}'}}
+        for i in range(4)
+    ] + [
+        {**base, 'descricao': 'lista', 'timestamp': agora - timedelta(minutes=10 + i),
+         'dados_antes': {'softwares': ['a']}, 'dados_depois': {'softwares': ['a', f'b{i}']}}
+        for i in range(3)
+    ]
+    db.session.execute(insert(AuditLog), linhas)
+    db.session.commit()
+
+    pagina = client.get('/api/logs?acao=ADICAO&limite=2', headers=headers).json
+    assert [item['acao'] for item in pagina['itens']] == ['ADICAO', 'ADICAO']
+    assert pagina['proximo_cursor']
+
+    resto = client.get(f"/api/logs?acao=ADICAO&limite=2&cursor={pagina['proximo_cursor']}", headers=headers).json
+    assert len(resto['itens']) == 1
+    assert resto['proximo_cursor'] is None
+
+
+def test_historico_so_le_o_arquivo_com_arquivados_true(client, headers, monkeypatch):
+    from app.services import audit
+    lidos = []
+    monkeypatch.setattr(audit, 'ler_arquivados', lambda *args, **kwargs: lidos.append(args) or [])
+
+    assert client.get('/api/logs/ativo/1', headers=headers).status_code == 200
+    assert lidos == []
+    assert client.get('/api/logs/ativo/1?arquivados=true', headers=headers).status_code == 200
+    assert len(lidos) == 1
@@ -0,0 +1,144 @@
+"""Migrações de dados da auditoria, rodadas sobre linhas no formato antigo."""
+from datetime import datetime, timedelta
+import pytest
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import insert, inspect, select
+from app.models import db, AuditLog
+from app.services.audit import obter_logs_ativo
+from tests.conftest import MIGRACOES
+
+ANTES_DA_COMPACTACAO = '8c1f4d2e7a90'
+COMPACTACAO = 'a4d9b3c6f812'
+
+
+@pytest.fixture
+def app_migracoes(app_banco_novo):
+    upgrade(directory=MIGRACOES, revision=ANTES_DA_COMPACTACAO)
+    return app_banco_novo
+
+
+class RelogioAntigo:
+    """Imita o código antigo: cada linha de log com o seu próprio datetime.now()."""
+
+    def __init__(self, inicio):
+        self.agora = inicio
+
+    def __call__(self):
+        self.agora += timedelta(microseconds=137)
+        return self.agora
+
+
+def _edicao_antiga(relogio, entidade, entidade_id, antigo, novo, usuario='Ana'):
+    """Linhas de uma edição como o registrar_historico antigo gravava: uma por campo + resumo."""
+    linhas, campos = [], []
+    base = {'usuario_nome': usuario, 'entidade': entidade, 'entidade_id': entidade_id}
+    for chave, valor in novo.items():
+        velho = antigo.get(chave)
+        if velho == valor:
+            continue
+        if isinstance(valor, list):
+            adicionados = [item for item in valor if item not in velho]
+            removidos = [item for item in velho if item not in valor]
+            if adicionados:
+                linhas.append({**base, 'acao': 'ADICAO', 'descricao': f"Itens adicionados em {chave}",
+                               'dados_antes': None, 'timestamp': relogio(),
+                               'dados_depois': {'campo': chave, 'itens_adicionados': adicionados}})
+                campos.append(f"{chave} (+)")
+            if removidos:
+                linhas.append({**base, 'acao': 'REMOCAO', 'descricao': f"Itens removidos em {chave}",
+                               'dados_antes': {'campo': chave, 'itens_removidos': removidos},
+                               'dados_depois': None, 'timestamp': relogio()})
+                campos.append(f"{chave} (-)")
+        else:
+            linhas.append({**base, 'acao': 'ALTERACAO', 'descricao': f"Campo {chave} alterado",
+                           'dados_antes': {chave: velho}, 'dados_depois': {chave: valor},
+                           'timestamp': relogio()})
+            campos.append(chave)
+    linhas.append({**base, 'acao': 'ATUALIZACAO', 'descricao': f"Ativo {novo['patrimonio']} atualizado",
+                   'dados_antes': {'campos_alterados': campos}, 'dados_depois': novo,
+                   'timestamp': relogio()})
+    return linhas
+
+
+def _criacao_antiga(relogio, entidade, entidade_id, documento):
+    return [{'usuario_nome': 'Ana', 'entidade': entidade, 'entidade_id': entidade_id, 'acao': 'CRIACAO',
+             'descricao': 'cadastrado', 'dados_antes': None, 'dados_depois': documento, 'timestamp': relogio()}]
+
+
+def _logs(entidade, entidade_id):
+    return db.session.execute(
+        select(AuditLog.acao, AuditLog.dados_antes, AuditLog.dados_depois)
+        .where(AuditLog.entidade == entidade, AuditLog.entidade_id == entidade_id)
+        .order_by(AuditLog.id)
+    ).all()
+
+
+def test_compactacao_junta_as_linhas_de_cada_edicao(app_migracoes):
+    relogio = RelogioAntigo(datetime(2025, 3, 10, 9, 0))
+    v1 = {'patrimonio': 'PAT-1', 'setor': 'TI', 'responsavel': 'Ana', 'filial': 'Matriz', 'modelo': 'A', 'tags': ['a']}
+    v2 = {**v1, 'setor': 'RH', 'responsavel': 'Bia', 'filial': 'Filial 2', 'tags': ['a', 'b']}
+    v3 = {**v2, 'modelo': 'B'}
+    linhas = _criacao_antiga(relogio, 'Asset', '1', v1)
+    linhas += _edicao_antiga(relogio, 'Asset', '1', v1, v2)
+    # Outro registro gravado no meio não pode se misturar
+    linhas += _criacao_antiga(relogio, 'Asset', '2', {'patrimonio': 'PAT-2'})
+    relogio.agora += timedelta(minutes=5)
+    linhas += _edicao_antiga(relogio, 'Asset', '1', v2, v3, usuario='Caio')
+    # Resumo sem nenhuma diferença real
+    linhas += [{'usuario_nome': 'Caio', 'entidade': 'Asset', 'entidade_id': '1', 'acao': 'ATUALIZACAO',
+                'descricao': 'Ativo PAT-1 atualizado', 'dados_antes': {'campos_alterados': []},
+                'dados_depois': v3, 'timestamp': relogio()}]
+    linhas += _criacao_antiga(relogio, 'Email', '7', {'endereco': 'a@x.com', 'senha': 'segredo'})
+    db.session.execute(insert(AuditLog), linhas)
+    db.session.commit()
+
+    upgrade(directory=MIGRACOES, revision=COMPACTACAO)
+
+    logs = _logs('Asset', '1')
+    assert [acao for acao, _, _ in logs] == ['CRIACAO', 'ATUALIZACAO', 'ATUALIZACAO']
+    assert logs[1].dados_antes == {'setor': 'TI', 'responsavel': 'Ana', 'filial': 'Matriz', 'tags': ['a']}
+    assert logs[1].dados_depois == {'setor': 'RH', 'responsavel': 'Bia', 'filial': 'Filial 2', 'tags': ['a', 'b']}
+    assert (logs[2].dados_antes, logs[2].dados_depois) == ({'modelo': 'A'}, {'modelo': 'B'})
+    assert [acao for acao, _, _ in _logs('Asset', '2')] == ['CRIACAO']
+    assert _logs('Email', '7')[0].dados_depois['senha'] == '********'
+
+    # Visão por campo: uma edição = um resumo + uma linha por campo
+    visao = obter_logs_ativo(1, incluir_arquivados=False)
+    resumos = [log for log in visao if log['acao'] == 'ATUALIZACAO']
+    assert len(resumos) == 2
+    assert sorted(resumos[1]['dados_antes']['campos_alterados']) == ['filial', 'responsavel', 'setor', 'tags (+)']
+
+
+def test_compactacao_de_resumo_sem_linhas_por_campo_usa_o_documento_anterior(app_migracoes):
+    relogio = RelogioAntigo(datetime(2025, 3, 10, 9, 0))
+    v1 = {'patrimonio': 'PAT-9', 'setor': 'TI', 'tags': ['a']}
+    v2 = {**v1, 'setor': 'RH', 'tags': ['a', 'c']}
+    resumo = _edicao_antiga(relogio, 'Asset', '9', v1, v2)[-1]
+    db.session.execute(insert(AuditLog), _criacao_antiga(relogio, 'Asset', '9', v1) + [resumo])
+    db.session.commit()
+
+    upgrade(directory=MIGRACOES, revision=COMPACTACAO)
+
+    logs = _logs('Asset', '9')
+    assert logs[1].dados_antes == {'setor': 'TI', 'tags': ['a']}
+    assert logs[1].dados_depois == {'setor': 'RH', 'tags': ['a', 'c']}
+
+
+def test_downgrade_recria_as_linhas_por_campo(app_migracoes):
+    relogio = RelogioAntigo(datetime(2025, 3, 10, 9, 0))
+    v1 = {'patrimonio': 'PAT-3', 'setor': 'TI', 'modelo': 'A'}
+    db.session.execute(insert(AuditLog), _edicao_antiga(relogio, 'Asset', '3', v1, {**v1, 'setor': 'RH', 'modelo': 'B'}))
+    db.session.commit()
+
+    upgrade(directory=MIGRACOES, revision=COMPACTACAO)
+    downgrade(directory=MIGRACOES, revision=ANTES_DA_COMPACTACAO)
+
+    acoes = sorted(acao for acao, _, _ in _logs('Asset', '3'))
+    assert acoes == ['ALTERACAO', 'ALTERACAO', 'ATUALIZACAO']
+
+
+def test_downgrade_ate_a_base_remove_todo_o_esquema(app_banco_novo):
+    upgrade(directory=MIGRACOES, revision=ANTES_DA_COMPACTACAO)
+    assert 'audit_resumo' in inspect(db.engine).get_table_names()
+    downgrade(directory=MIGRACOES, revision='base')
+    assert inspect(db.engine).get_table_names() == ['alembic_version']
@@ -0,0 +1,54 @@
+"""Modos de importação CSV (?mode=insert|upsert|update-only) e login nas rotas."""
+import io
+import pytest
+from app.models import db, Asset, AuditLog, Celular
+from tests.test_importacao import CSV_ASSETS
+
+
+def test_insert_cria_e_reporta_existentes(importar_csv):
+    resposta = importar_csv('assets', CSV_ASSETS)
+    assert resposta.json['sucessos'] == 2
+    assert Asset.query.filter_by(patrimonio='IMP-2').one().especificacoes['hostname'] == 'pc-2'
+
+    repetida = importar_csv('assets', CSV_ASSETS).json
+    assert repetida['sucessos'] == 0
+    assert repetida['total_erros'] == 2
+    assert 'já existe' in repetida['erros'][0]
+
+
+def test_upsert_atualiza_so_o_que_veio_preenchido(importar_csv):
+    importar_csv('assets', CSV_ASSETS)
+    resposta = importar_csv('assets', "PAT;Em uso\nIMP-1;Carla\nIMP-3;Davi\n", modo='upsert').json
+    assert (resposta['sucessos'], resposta['atualizados']) == (1, 1)
+
+    db.session.expire_all()
+    asset = Asset.query.filter_by(patrimonio='IMP-1').one()
+    assert asset.responsavel == 'Carla'
+    assert asset.modelo == 'Optiplex'
+    assert asset.especificacoes['hostname'] == 'pc-1'
+    log = AuditLog.query.filter_by(entidade_id=str(asset.id), acao='ATUALIZACAO').one()
+    assert log.dados_antes == {'responsavel': 'Ana'}
+    assert log.dados_depois == {'responsavel': 'Carla'}
+
+
+def test_update_only_nao_cria(importar_csv):
+    importar_csv('celulares', "PAT;Filial;Modelo\nCEL-1;Matriz;Moto G\n")
+    resposta = importar_csv('celulares', "PAT;Modelo\nCEL-1;Galaxy\nCEL-2;Galaxy\n", modo='update-only').json
+    assert (resposta['sucessos'], resposta['atualizados']) == (0, 1)
+    assert 'não existe' in resposta['erros'][0]
+
+    db.session.expire_all()
+    assert Celular.query.filter_by(patrimonio='CEL-1').one().modelo == 'Galaxy'
+    assert Celular.query.filter_by(patrimonio='CEL-2').first() is None
+
+
+def test_modo_invalido(importar_csv):
+    assert importar_csv('assets', CSV_ASSETS, modo='merge').status_code == 400
+
+
+@pytest.mark.parametrize('tipo', ['assets', 'celulares', 'emails', 'softwares'])
+def test_importacao_exige_login(client, tipo):
+    dados = {'file': (io.BytesIO(b"PAT\nX-1\n"), f'{tipo}.csv')}
+    resposta = client.post(f'/api/import/{tipo}?sincrono=true&mode=upsert', data=dados,
+                           content_type='multipart/form-data')
+    assert resposta.status_code == 401
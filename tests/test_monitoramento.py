@@ -0,0 +1,37 @@
+"""Contador de consultas por requisição e detector de N+1."""
+import pytest
+from flask import g
+from sqlalchemy import text
+from app.models import db
+from app.services import monitoramento
+from app.services.monitoramento import ConsultasRepetidasError
+
+
+def test_consulta_que_falha_nao_deixa_inicio_na_conexao(app):
+    with app.test_request_context('/'):
+        monitoramento._iniciar_contagem()
+        with pytest.raises(Exception):
+            db.session.execute(text('SELECT 1/0'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        assert g.db_stats['consultas'] == 1
+        assert 'monitoramento_inicio' not in db.session.connection().info
+
+
+def test_modo_raise_barra_a_consulta_antes_de_executar(app):
+    limite = app.config.get('DB_N1_LIMITE', 10)
+    with app.test_request_context('/'):
+        monitoramento._iniciar_contagem()
+        consulta = text("SELECT set_config('teste.n1', :valor, false)")
+        for valor in range(limite):
+            db.session.execute(consulta, {'valor': str(valor)})
+        with pytest.raises(ConsultasRepetidasError):
+            db.session.execute(consulta, {'valor': 'excedente'})
+        assert db.session.execute(text("SELECT current_setting('teste.n1')")).scalar() == str(limite - 1)
+
+
+@pytest.mark.parametrize('debug, esperado', [(True, 'warn'), (False, 'off')])
+def test_modo_padrao_depende_do_debug(app, debug, esperado):
+    app.config['DB_N1_MODO'] = None
+    app.debug = debug
+    assert monitoramento._modo_n1() == esperado
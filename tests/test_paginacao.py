@@ -0,0 +1,39 @@
+"""Paginação por chave (keyset) de GET /api/assets."""
+
+
+def _todas_as_paginas(client, headers, url):
+    itens, cursor = [], None
+    while True:
+        resposta = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert resposta.status_code == 200
+        itens += resposta.json['itens']
+        cursor = resposta.json['proximo_cursor']
+        if not cursor:
+            return itens
+
+
+def test_paginacao_por_id_percorre_tudo_sem_repetir(client, headers, ativos):
+    itens = _todas_as_paginas(client, headers, '/api/assets?limite=10')
+    ids = [int(item['id']) for item in itens]
+    assert ids == sorted(ids)
+    assert len(ids) == len(set(ids)) == 25
+
+
+def test_paginacao_por_atualizado_em_com_filtro(client, headers, ativos):
+    itens = _todas_as_paginas(client, headers, '/api/assets?limite=4&ordenar=atualizado_em&filial=Matriz')
+    assert {item['filial'] for item in itens} == {'Matriz'}
+    assert len(itens) == 12
+    datas = [item['atualizado_em'] for item in itens]
+    assert datas == sorted(datas, reverse=True)
+
+
+def test_paginacao_com_total(client, headers, ativos):
+    resposta = client.get('/api/assets?limite=5&total=true', headers=headers)
+    assert len(resposta.json['itens']) == 5
+    assert resposta.json['total'] == 25
+
+
+def test_cursor_invalido(client, headers, ativos):
+    resposta = client.get('/api/assets?limite=5&cursor=nao-e-um-cursor', headers=headers)
+    assert resposta.status_code == 400
+    assert 'erro' in resposta.json
@@ -0,0 +1,97 @@
+"""Índice de responsáveis: recarga fora do lock e commits concorrentes."""
+import threading
+import pytest
+from app.models import db, Asset
+from app.services import responsaveis
+from app.services.responsaveis import get_indice
+
+
+@pytest.fixture
+def indice(app):
+    db.session.add(Asset(patrimonio='RESP-1', tipo='Desktop', filial='Matriz', responsavel='Ana Souza'))
+    db.session.commit()
+    indice = get_indice()
+    assert indice.buscar('Matriz') == ['Ana Souza']
+    indice.recarga = 60
+    indice._carregado_em -= 61  # vence a janela: a próxima busca recarrega
+    return indice
+
+
+def test_commit_durante_a_recarga_entra_uma_vez(indice, monkeypatch):
+    ler = responsaveis._ler_responsaveis
+
+    def ler_com_commit_no_meio():
+        linhas = ler()
+        # Commit confirmado depois do SELECT, aplicado enquanto a recarga monta o índice novo
+        indice.aplicar([('Matriz', 'Bia Lima', 1)])
+        return linhas
+
+    monkeypatch.setattr(responsaveis, '_ler_responsaveis', ler_com_commit_no_meio)
+    assert indice.buscar('Matriz') == ['Ana Souza', 'Bia Lima']
+    assert indice._contagem['Matriz'] == {'Ana Souza': 1, 'Bia Lima': 1}
+
+
+def _criar_ativo(client, headers, patrimonio, responsavel):
+    resposta = client.post('/api/assets', headers=headers, json={
+        'patrimonio': patrimonio, 'tipo': 'Desktop', 'filial': 'Matriz', 'responsavel': responsavel})
+    assert resposta.status_code == 201
+
+
+def test_commit_visto_pela_recarga_nao_conta_duas_vezes(indice, client, headers, monkeypatch):
+    atrasados = []
+    # Commit confirmado no banco cujo after_commit só chega depois que a recarga leu o retrato
+    monkeypatch.setattr(indice, 'aplicar', lambda alteracoes, xid=None: atrasados.append((alteracoes, xid)))
+    _criar_ativo(client, headers, 'RESP-2', 'Bia Lima')
+    monkeypatch.undo()
+    [(alteracoes, xid)] = atrasados
+    assert xid is not None
+
+    ler = responsaveis._ler_responsaveis
+
+    def ler_e_aplicar_o_atrasado():
+        lido = ler()
+        indice.aplicar(alteracoes, xid)
+        return lido
+
+    monkeypatch.setattr(responsaveis, '_ler_responsaveis', ler_e_aplicar_o_atrasado)
+    assert indice.buscar('Matriz') == ['Ana Souza', 'Bia Lima']
+    assert indice._contagem['Matriz'] == {'Ana Souza': 1, 'Bia Lima': 1}
+
+
+def test_commit_depois_do_retrato_entra_na_recarga(indice, client, headers, monkeypatch):
+    ler = responsaveis._ler_responsaveis
+
+    def ler_e_gravar():
+        lido = ler()
+        _criar_ativo(client, headers, 'RESP-3', 'Caio Reis')
+        return lido
+
+    monkeypatch.setattr(responsaveis, '_ler_responsaveis', ler_e_gravar)
+    assert indice.buscar('Matriz') == ['Ana Souza', 'Caio Reis']
+    assert indice._contagem['Matriz'] == {'Ana Souza': 1, 'Caio Reis': 1}
+
+
+def test_buscas_nao_esperam_a_recarga(indice, monkeypatch):
+    lendo, liberar = threading.Event(), threading.Event()
+
+    def ler_devagar():
+        lendo.set()
+        liberar.wait(5)
+        return (0, 0, set()), [('Matriz', 'Caio Reis', 1)]
+
+    monkeypatch.setattr(responsaveis, '_ler_responsaveis', ler_devagar)
+    recarga = threading.Thread(target=indice.buscar, args=('Matriz',))
+    recarga.start()
+    assert lendo.wait(5)
+    assert indice.buscar('Matriz') == ['Ana Souza']  # índice atual, sem bloquear
+    liberar.set()
+    recarga.join(5)
+    assert indice.buscar('Matriz') == ['Caio Reis']
+
+
+def test_falha_na_recarga_mantem_o_indice(indice, monkeypatch):
+    def falhar():
+        raise RuntimeError('banco fora')
+
+    monkeypatch.setattr(responsaveis, '_ler_responsaveis', falhar)
+    assert indice.buscar('Matriz') == ['Ana Souza']
@@ -0,0 +1,51 @@
+"""Sincronização incremental (/api/sync): delta, exclusões e recorte por filial."""
+
+
+def test_sync_devolve_alterados_e_excluidos(client, headers, ativos):
+    completo = client.get('/api/sync', headers=headers).json
+    assert completo['completo'] is True
+    assert len(completo['assets']) == 25
+
+    alvo, excluido = completo['assets'][0]['id'], completo['assets'][1]['id']
+    client.put(f'/api/assets/{alvo}', json={'setor': 'Financeiro'}, headers=headers)
+    client.delete(f'/api/assets/{excluido}?hard=true', headers=headers)
+
+    delta = client.get(f"/api/sync?since={completo['token']}", headers=headers).json
+    assert delta['completo'] is False
+    assert delta['filiais'] is None
+    assert alvo in {item['id'] for item in delta['assets']}
+    assert delta['removidos']['assets'] == [excluido]
+
+
+def test_sync_token_invalido(client, headers):
+    assert client.get('/api/sync?since=lixo', headers=headers).status_code == 400
+
+
+def test_sync_por_filial_tira_do_delta_o_que_mudou_de_filial(client, headers, ativos):
+    params = 'filial=Matriz&filial_em=assets'
+    completo = client.get(f'/api/sync?{params}', headers=headers).json
+    assert {item['filial'] for item in completo['assets']} == {'Matriz'}
+    assert len(completo['assets']) == 12
+
+    transferido = completo['assets'][0]['id']
+    client.put(f'/api/assets/{transferido}', json={'filial': 'Filial 2'}, headers=headers)
+
+    delta = client.get(f"/api/sync?{params}&since={completo['token']}", headers=headers).json
+    assert delta['assets'] == []
+    # A margem do token pode repetir ids de fora da filial: nenhum da lista local fica
+    matriz = {item['id'] for item in completo['assets']}
+    assert set(delta['removidos']['assets']) & matriz == {transferido}
+
+
+def test_sync_filial_em_invalido(client, headers):
+    assert client.get('/api/sync?filial=Matriz&filial_em=pedidos', headers=headers).status_code == 400
+
+
+def test_sync_manda_filiais_quando_a_versao_muda(client, headers):
+    token = client.get('/api/sync', headers=headers).json['token']
+    assert client.get(f'/api/sync?since={token}', headers=headers).json['filiais'] is None
+
+    assert client.post('/api/filiais', json={'nome': 'Nova', 'tipo': 'Loja'}, headers=headers).status_code == 201
+    delta = client.get(f'/api/sync?since={token}', headers=headers).json
+    assert [filial['nome'] for filial in delta['filiais']] == ['Nova']
+    assert client.get(f"/api/sync?since={delta['token']}", headers=headers).json['filiais'] is None